@@ -0,0 +1,147 @@
+# 图片资源管线基准，使用本地 HTTP 服务代替 B 站 CDN：python -m benchmarks.bench_assets
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from PIL import Image
+
+from benchmarks.bench_renderer import _percentile
+from ui.assets import AssetPipeline, DiskCache
+
+
+def _png(seed: int, size: int = 96) -> bytes:
+    img = Image.new('RGBA', (size, size), ((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256, 255))
+    buf = io.BytesIO()
+    img.save(buf, 'PNG')
+    return buf.getvalue()
+
+
+# 本地替身服务：/img/<n>.png 返回图片，/missing 返回 404；delay 模拟网络延迟，
+# chunk 不为 0 时按块分次发送，模拟慢速 CDN
+class _StandIn:
+
+    def __init__(self, count: int, delay: float, chunk: int = 0):
+        self.images = {f'/img/{i}.png': _png(i) for i in range(count)}
+        self.hits: Dict[str, int] = {}
+        self.delay = delay
+        self.chunk = chunk
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits[self.path] = server.hits.get(self.path, 0) + 1
+                time.sleep(server.delay)
+                data = server.images.get(self.path)
+                if data is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/png')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                if not server.chunk:
+                    self.wfile.write(data)
+                    return
+                for i in range(0, len(data), server.chunk):
+                    self.wfile.write(data[i:i + server.chunk])
+                    self.wfile.flush()
+                    time.sleep(0.002)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def urls(self) -> List[str]:
+        return [self.base + path for path in self.images]
+
+
+# 模拟渲染线程：每帧对所有地址调用 get()，记录单次调用耗时，直到全部就绪
+def _render_until_ready(pipeline: AssetPipeline, keys, timeout: float = 30.0) -> Dict:
+    get_us: List[float] = []
+    frames = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        ready = 0
+        for url, size, circle in keys:
+            t = time.perf_counter()
+            if pipeline.get(url, size, circle) is not None:
+                ready += 1
+            get_us.append((time.perf_counter() - t) * 1e6)
+        frames += 1
+        if ready == len(keys):
+            break
+        time.sleep(1 / 90)
+    return {
+        'ready_ms': round((time.perf_counter() - t0) * 1000, 1),
+        'frames': frames,
+        'get_us_p50': round(_percentile(get_us, 50), 2),
+        'get_us_max': round(max(get_us), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图片资源管线基准')
+    parser.add_argument('--images', type=int, default=40)
+    parser.add_argument('--delay', type=float, default=0.05, help='服务端延迟（秒）')
+    args = parser.parse_args()
+
+    server = _StandIn(args.images, args.delay)
+    urls = server.urls()
+    # 同一地址请求两种尺寸（字号切换）和圆形头像，下载应只发生一次
+    keys = [(url, size, circle) for url in urls for size, circle in ((18, False), (28, False), (18, True))]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = AssetPipeline(cache_dir=cache_dir)
+        result = _render_until_ready(cold, keys)
+        duplicated = sum(1 for n in server.hits.values() if n > 1)
+        print(f"cold   {len(keys)} bitmaps  ready {result['ready_ms']} ms  frames {result['frames']}"
+              f"  get p50 {result['get_us_p50']} us  max {result['get_us_max']} us"
+              f"  server hits {sum(server.hits.values())}  duplicated {duplicated}")
+        cold.stop()
+
+        # 新实例只有磁盘缓存，不应访问服务端
+        server.hits.clear()
+        warm = AssetPipeline(cache_dir=cache_dir)
+        result = _render_until_ready(warm, keys)
+        print(f"disk   {len(keys)} bitmaps  ready {result['ready_ms']} ms  frames {result['frames']}"
+              f"  get p50 {result['get_us_p50']} us  max {result['get_us_max']} us"
+              f"  server hits {sum(server.hits.values())}  disk hits {warm.disk_hits}")
+
+        # 内存命中：全部就绪后每次 get 只是一次字典查找
+        result = _render_until_ready(warm, keys)
+        print(f"memory {len(keys)} bitmaps  get p50 {result['get_us_p50']} us  max {result['get_us_max']} us"
+              f"  resident {warm.memory_bytes // 1024} KB")
+
+        # 失败的地址返回占位，不重复请求
+        missing = server.base + '/missing'
+        for _ in range(50):
+            warm.get(missing, 18)
+            time.sleep(0.01)
+        print(f"404    server hits {server.hits.get('/missing', 0)}  errors {warm.errors}")
+        warm.stop()
+
+    # 磁盘容量限制
+    with tempfile.TemporaryDirectory() as cache_dir:
+        disk = DiskCache(cache_dir, limit=10 * 1024)
+        for i in range(100):
+            disk.put(f'u{i}', b'x' * 1024)
+        files = len(os.listdir(cache_dir))
+        print(f"disk   limit 10 KB  files {files}  newest kept {disk.get('u99') is not None}"
+              f"  oldest evicted {disk.get('u0') is None}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+# 本地推送负载测试：python -m benchmarks.bench_broadcast --ws 200 --sse 100 --slow 5
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from typing import Dict, List
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from benchmarks.bench_renderer import _percentile
+from benchmarks.workloads import message_stream
+from bilibili.broadcast import BroadcastServer
+
+
+# 订阅端在独立进程中运行，避免与推送线程争抢 GIL；记录每条消息从 publish 到收到的延迟
+class _Subscribers:
+
+    def __init__(self, port: int):
+        self.base = f'http://127.0.0.1:{port}'
+        self.latency_ms: List[float] = []
+        self.received: Dict[str, int] = {'ws': 0, 'sse': 0}
+        self.connected = 0
+
+    def _record(self, kind: str, text: str) -> None:
+        sent = json.loads(text).get('bench_t')
+        if sent is not None:
+            self.latency_ms.append((time.time() - sent) * 1000)
+        self.received[kind] += 1
+
+    async def _ws(self, session, types: str) -> None:
+        url = self.base + '/ws' + (f'?types={types}' if types else '')
+        async with session.ws_connect(url) as ws:
+            self.connected += 1
+            async for message in ws:
+                self._record('ws', message.data)
+
+    async def _sse(self, session, types: str) -> None:
+        url = self.base + '/events' + (f'?types={types}' if types else '')
+        async with session.get(url) as resp:
+            self.connected += 1
+            async for line in resp.content:
+                if line.startswith(b'data: '):
+                    self._record('sse', line[6:].decode('utf-8'))
+
+    async def run(self, ws_count: int, sse_count: int, ready, done) -> None:
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=None)) as session:
+            # 十分之一的订阅者只订阅礼物，验证过滤
+            tasks = [asyncio.ensure_future(self._ws(session, 'gift' if i % 10 == 9 else ''))
+                     for i in range(ws_count)]
+            tasks += [asyncio.ensure_future(self._sse(session, 'gift' if i % 10 == 9 else ''))
+                      for i in range(sse_count)]
+            while self.connected < ws_count + sse_count:
+                await asyncio.sleep(0.05)
+            ready.set()
+            while not done.is_set():
+                await asyncio.sleep(0.05)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _subscriber_process(port: int, ws_count: int, sse_count: int, ready, done, results) -> None:
+    subscribers = _Subscribers(port)
+    asyncio.run(subscribers.run(ws_count, sse_count, ready, done))
+    latency = subscribers.latency_ms
+    results.put({
+        'received': subscribers.received,
+        'latency_p50': _percentile(latency, 50),
+        'latency_p99': _percentile(latency, 99),
+        'latency_max': max(latency) if latency else 0.0,
+    })
+
+
+# 不读数据的订阅者：接收缓冲设得很小，服务端队列积满后应被断开
+def _slow_subscribers(port: int, count: int) -> List[socket.socket]:
+    socks = []
+    for _ in range(count):
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        s.connect(('127.0.0.1', port))
+        s.sendall(b'GET /events HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n')
+        socks.append(s)
+    return socks
+
+
+# 模拟接收线程：按固定速率 publish，记录每次调用的耗时
+def _ingest(server: BroadcastServer, rate: float, duration: float, padding: int) -> List[float]:
+    stream = message_stream('gift_combos')
+    pad = 'x' * padding
+    cost_us: List[float] = []
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    next_t = start
+    while time.perf_counter() - start < duration:
+        msg = next(stream)
+        msg['pad'] = pad
+        msg['bench_t'] = time.time()
+        t = time.perf_counter()
+        server.publish(msg)
+        cost_us.append((time.perf_counter() - t) * 1e6)
+        next_t += interval
+        delay = next_t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    return cost_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地推送负载测试')
+    parser.add_argument('--ws', type=int, default=200, help='WebSocket 订阅者数')
+    parser.add_argument('--sse', type=int, default=100, help='SSE 订阅者数')
+    parser.add_argument('--slow', type=int, default=5, help='不读数据的订阅者数')
+    parser.add_argument('--rate', type=float, default=50, help='每秒事件数')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--padding', type=int, default=512, help='每条事件附加的字节数')
+    args = parser.parse_args()
+
+    server = BroadcastServer(port=0)
+    if not server.start():
+        print(f"start failed: {server.error}")
+        return
+    ready, done = multiprocessing.Event(), multiprocessing.Event()
+    results = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_subscriber_process,
+                                   args=(server.port, args.ws, args.sse, ready, done, results), daemon=True)
+    proc.start()
+    ready.wait(30)
+    slow = _slow_subscribers(server.port, args.slow)
+    deadline = time.time() + 10
+    while len(server._subscribers) < args.ws + args.sse + args.slow and time.time() < deadline:
+        time.sleep(0.05)
+    print(f"subscribers ws {args.ws}  sse {args.sse}  slow {args.slow}  connected {len(server._subscribers)}")
+
+    cpu = time.process_time()
+    cost_us = _ingest(server, args.rate, args.duration, args.padding)
+    time.sleep(1.0)
+    cpu = time.process_time() - cpu
+    status = server.status()
+    done.set()
+    result = results.get(timeout=30)
+    proc.join(10)
+    print(f"publish  {len(cost_us)} events  p50 {_percentile(cost_us, 50):.2f} us"
+          f"  p99 {_percentile(cost_us, 99):.2f} us  max {max(cost_us):.1f} us")
+    print(f"latency  p50 {result['latency_p50']:.2f} ms  p99 {result['latency_p99']:.2f} ms"
+          f"  max {result['latency_max']:.1f} ms")
+    print(f"received ws {result['received']['ws']}  sse {result['received']['sse']}"
+          f"  delivered {status['delivered']}  dropped clients {status['dropped_clients']}"
+          f"  remaining {status['clients']}")
+    # 本进程 CPU 包含推送线程与模拟接收线程，单核机器上订阅端进程会抬高延迟
+    print(f"cpu      {cpu:.2f} s  {cpu * 1e6 / max(status['delivered'], 1):.1f} us per delivery"
+          f"  cores {os.cpu_count()}")
+
+    for s in slow:
+        s.close()
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# 显示节奏控制基准：python -m benchmarks.bench_pacer
+import argparse
+import os
+import random
+import sys
+import time
+from collections import deque
+from typing import Dict, List
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from benchmarks.bench_renderer import _percentile
+from benchmarks.workloads import WORKLOADS
+import ui.pacer as pacer_module
+from ui.pacer import DisplayPacer
+
+
+# 模拟 B 站的批量推送：每 interval 秒到达一批，批内服务端时间戳分散在上一个间隔内
+def _bursts(rate: float, interval: float, duration: float, enter_share: float, seed: int = 0):
+    rng = random.Random(seed)
+    t = 1_700_000_000.0
+    end = t + duration
+    msg_id = 0
+    while t < end:
+        count = max(1, int(rng.gauss(rate * interval, rate * interval * 0.3)))
+        batch = []
+        for _ in range(count):
+            msg_id += 1
+            kind = 'enter_flood' if rng.random() < enter_share else 'short_cjk'
+            msg = WORKLOADS[kind](rng)
+            msg['id'] = msg_id
+            msg['time'] = t
+            if msg['type'] == 'danmaku':
+                msg['ts'] = t - interval + rng.random() * interval
+            batch.append(msg)
+        batch.sort(key=lambda m: m.get('ts', t))
+        yield t, batch
+        t += interval
+
+
+def _run(args, backlog_limit: int) -> Dict:
+    pacer_module.BACKLOG_LIMIT = backlog_limit
+    pacer = DisplayPacer(capacity=args.capacity, min_dwell=args.dwell)
+    # 计数器在全局注册表中，多次运行时取差值
+    counters = (pacer._released, pacer._dropped, pacer._merged)
+    base = [c.value for c in counters]
+    source = deque(maxlen=50)
+    version = 0
+    frame = 1 / args.fps
+    releases: List[float] = []
+    per_frame: List[int] = []
+    advance_us: List[float] = []
+    backlog_peak = 0
+    bursts = _bursts(args.rate, args.interval, args.duration, args.enter_share)
+    next_batch = next(bursts, None)
+    now = next_batch[0]
+    shown = pacer._released.value
+    while next_batch is not None or pacer.backlog:
+        if next_batch is not None and now >= next_batch[0]:
+            source.extend(next_batch[1])
+            version += 1
+            next_batch = next(bursts, None)
+        pacer.feed(source, version, now)
+        backlog_peak = max(backlog_peak, pacer.backlog)
+        t = time.perf_counter()
+        pacer.advance(now)
+        advance_us.append((time.perf_counter() - t) * 1e6)
+        released = pacer._released.value - shown
+        shown = pacer._released.value
+        if released:
+            per_frame.append(released)
+            releases.extend([now] * released)
+        now += frame
+    # 第 i 条被第 i + capacity 条挤出可见区域
+    dwell = [releases[i + args.capacity] - releases[i] for i in range(len(releases) - args.capacity)]
+    return {
+        'released': len(releases),
+        'per_frame_max': max(per_frame) if per_frame else 0,
+        'dwell_min': min(dwell) if dwell else 0.0,
+        'dwell_p50': _percentile(dwell, 50),
+        'backlog_peak': backlog_peak,
+        'advance_us_p50': _percentile(advance_us, 50),
+        'advance_us_p99': _percentile(advance_us, 99),
+        'dropped': counters[1].value - base[1],
+        'collapsed': counters[2].value - base[2],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='显示节奏控制基准')
+    parser.add_argument('--rate', type=float, default=12, help='每秒消息数')
+    parser.add_argument('--interval', type=float, default=0.8, help='服务端推送间隔（秒）')
+    parser.add_argument('--duration', type=float, default=120)
+    parser.add_argument('--capacity', type=int, default=16, help='可见行数')
+    parser.add_argument('--dwell', type=float, default=1.5)
+    parser.add_argument('--fps', type=float, default=20, help='VR 线程循环频率')
+    parser.add_argument('--enter-share', type=float, default=0.3)
+    args = parser.parse_args()
+
+    print(f"input  {args.rate}/s in batches every {args.interval}s  capacity {args.capacity}"
+          f"  min dwell {args.dwell}s  (unpaced: ~{args.rate * args.interval:.0f} lines per batch at once)")
+    for limit in (pacer_module.BACKLOG_LIMIT, 10_000):
+        result = _run(args, limit)
+        print(f"backlog limit {limit:>6}  released {result['released']}  max per frame {result['per_frame_max']}"
+              f"  dwell min {result['dwell_min']:.2f}s p50 {result['dwell_p50']:.2f}s"
+              f"  backlog peak {result['backlog_peak']}  dropped {result['dropped']}  collapsed {result['collapsed']}"
+              f"  advance p50 {result['advance_us_p50']:.2f} us p99 {result['advance_us_p99']:.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+# 端到端管线基准：消息注入 -> VR 线程 -> 渲染 -> 上传，无需头显
+# python -m benchmarks.bench_pipeline --backend null --seconds 10
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from benchmarks.bench_renderer import _peak_rss_kb, _percentile
+from benchmarks.workloads import WORKLOADS, message_stream
+from bilibili.users import UserTable
+from bilibili.stats import LiveStats
+from ui.control_panel import AppController
+
+
+# 与 BiliDanmakuClient 相同的接口，不连接网络
+class FakeDanmakuClient:
+
+    def __init__(self, room_id: int = 12345):
+        self.room_id = room_id
+        self.messages = deque(maxlen=50)
+        self.version = 0
+        self._ids = itertools.count(1)
+        self.online = 6789
+        self.connected = True
+        self.reconnect_count = 0
+        self.users = UserTable()
+        self.stats = LiveStats()
+
+    def push(self, msg: dict) -> None:
+        # 与真实客户端一样驻留用户并更新统计，负载中没有 uid，按用户名区分
+        msg_type = msg.get('type')
+        if msg_type == 'danmaku':
+            entry = self.users.intern(0, msg['user'], msg.get('medal'), msg.get('guard', 0))
+            msg.update(user=entry.name, uref=entry.ref, medal=entry.medal, guard=entry.guard)
+            self.stats.on_danmaku()
+        elif msg_type == 'gift':
+            self.stats.on_gift(msg['gift_count'], 'gold', msg['gift_count'] * 100)
+        elif msg_type == 'sc':
+            self.stats.on_sc(msg['price'])
+        elif msg_type == 'enter':
+            self.stats.on_enter()
+        elif msg_type == 'follow':
+            self.stats.on_follow()
+        msg['id'] = next(self._ids)
+        msg['time'] = time.time()
+        self.messages.append(msg)
+        self.version += 1
+
+    def stop(self) -> None:
+        self.connected = False
+
+
+class _RecordingGovernor:
+    # 包装 governor.record，收集每帧耗时
+
+    def __init__(self, governor):
+        self._record = governor.record
+        self.render_ms: List[float] = []
+        self.upload_ms: List[float] = []
+        governor.record = self
+
+    def __call__(self, render_ms: float, upload_ms: float) -> bool:
+        self.render_ms.append(render_ms)
+        self.upload_ms.append(upload_ms)
+        return self._record(render_ms, upload_ms)
+
+
+def run(backend: str, workload: str, rate: float, seconds: float,
+        render_process: bool, seed: int, split: bool = False) -> Dict:
+    app = AppController()
+    app.config = dict(app.config, overlay_backend=backend, render_process=render_process,
+                      split_overlays=split)
+    client = FakeDanmakuClient()
+    app.danmaku_client = client
+    recorder = _RecordingGovernor(app.governor)
+
+    stop = threading.Event()
+
+    def feed():
+        stream = message_stream(workload, seed)
+        interval = 1.0 / rate if rate > 0 else None
+        next_at = time.perf_counter()
+        while not stop.is_set():
+            client.push(next(stream))
+            if interval is None:
+                continue
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    cpu0 = time.process_time()
+    app.init_vr()
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    time.sleep(seconds)
+    stop.set()
+    app._running = False
+    feeder.join(timeout=1)
+    time.sleep(0.1)
+    cpu = time.process_time() - cpu0
+
+    result = app._vr_init_result or {}
+    overlay = app.overlay
+    panel_frames = app.sc_overlay.frames if app.sc_overlay else 0
+    app.shutdown()
+
+    frames = overlay.frames if overlay else 0
+    return {
+        'backend': backend,
+        'workload': workload,
+        'rate': rate,
+        'render_process': render_process,
+        'split': split,
+        'init': result.get('success', False),
+        'messages': client.version,
+        'frames': frames,
+        'fps': round(frames / seconds, 1),
+        'panel_frames': panel_frames,
+        'bounds_updates': overlay.bounds_updates if overlay else 0,
+        'cpu_percent': round(cpu / seconds * 100, 1),
+        'render_ms_p50': round(_percentile(recorder.render_ms, 50), 3),
+        'render_ms_p99': round(_percentile(recorder.render_ms, 99), 3),
+        'upload_ms_p50': round(_percentile(recorder.upload_ms, 50), 3),
+        'resolution': list(app.governor.size),
+        'frame_interval': round(app.governor.frame_interval, 4),
+        'peak_rss_kb': _peak_rss_kb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端管线基准')
+    parser.add_argument('--backend', default='null', help='null / file / shm / openvr')
+    parser.add_argument('--workload', default='short_cjk', choices=list(WORKLOADS))
+    parser.add_argument('--rate', type=float, default=20, help='每秒注入消息数，0 为不限速')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--render-process', action='store_true')
+    parser.add_argument('--split', action='store_true', help='SC 面板独立叠加层')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    case = run(args.backend, args.workload, args.rate, args.seconds, args.render_process, args.seed, args.split)
+    for key, value in case.items():
+        print(f"{key:<16} {value}")
+
+
+if __name__ == '__main__':
+    main()
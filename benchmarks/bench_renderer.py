@@ -0,0 +1,211 @@
+# 渲染器无头基准：python -m benchmarks.bench_renderer --output bench_results/renderer.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Dict, List, Optional
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+import PIL
+from PIL import Image
+
+from benchmarks.workloads import WORKLOADS, message_stream
+from ui.renderer import DanmakuRenderer
+
+
+class FakeClock:
+
+    def __init__(self, start: float = 1_700_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _peak_rss_kb() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位为字节
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _pil_blocks() -> int:
+    stats = Image.core.get_stats()
+    return stats['allocated_blocks'] + stats['reused_blocks']
+
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=_project_root,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or 'unknown'
+    except Exception:
+        return 'unknown'
+
+
+def run_case(workload: str, font_size: int, scale: float, frames: int,
+             per_frame: int, frame_interval: float, seed: int) -> Dict:
+    clock = FakeClock()
+    renderer = DanmakuRenderer(clock=clock)
+    renderer.set_font_size(font_size)
+    renderer.set_render_scale(scale)
+
+    stream = message_stream(workload, seed)
+    messages: deque = deque(maxlen=50)
+
+    def step(count: int) -> None:
+        for _ in range(count):
+            msg = next(stream)
+            msg['time'] = clock()
+            messages.append(msg)
+
+    # 预热：填满消息队列并建立缓存
+    step(50)
+    for _ in range(10):
+        renderer.render(list(messages), 12345, 6789, True, 0)
+        clock.advance(frame_interval)
+
+    timings: List[float] = []
+    for _ in range(frames):
+        step(per_frame)
+        snapshot = list(messages)
+        t0 = time.perf_counter()
+        renderer.render(snapshot, 12345, 6789, True, 0)
+        timings.append((time.perf_counter() - t0) * 1000)
+        clock.advance(frame_interval)
+
+    # 单独一轮统计内存分配，避免 tracemalloc 影响计时
+    # 帧路径包含交给上传端的缓冲区；PIL 自身的像素内存不经过 tracemalloc，单独用 core 统计
+    alloc_frames = min(frames, 50)
+    frame_bytes = renderer.width * renderer.height * 4
+    peaks: List[int] = []
+    blocks: List[int] = []
+    pil_blocks: List[int] = []
+    full_frame_allocs = 0
+    prev_frame = renderer.frame
+    tracemalloc.start()
+    for _ in range(alloc_frames):
+        step(per_frame)
+        snapshot = list(messages)
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        blocks_before = sys.getallocatedblocks()
+        pil_before = _pil_blocks()
+        renderer.render(snapshot, 12345, 6789, True, 0)
+        frame = renderer.frame
+        _, peak = tracemalloc.get_traced_memory()
+        pil_blocks.append(_pil_blocks() - pil_before)
+        peaks.append(peak - before)
+        blocks.append(sys.getallocatedblocks() - blocks_before)
+        # 帧缓冲区必须复用同一对象，且整帧大小的分配不应出现
+        if peak - before >= frame_bytes or frame is not prev_frame:
+            full_frame_allocs += 1
+        prev_frame = frame
+        clock.advance(frame_interval)
+    tracemalloc.stop()
+
+    return {
+        'workload': workload,
+        'font_size': font_size,
+        'scale': scale,
+        'resolution': [renderer.width, renderer.height],
+        'frames': frames,
+        'ms_p50': round(_percentile(timings, 50), 3),
+        'ms_p90': round(_percentile(timings, 90), 3),
+        'ms_p99': round(_percentile(timings, 99), 3),
+        'ms_max': round(max(timings), 3),
+        'alloc_peak_kb_p50': round(_percentile(peaks, 50) / 1024, 1),
+        'alloc_peak_kb_max': round(max(peaks) / 1024, 1),
+        'net_blocks_per_frame': round(sum(blocks) / len(blocks), 1),
+        'pil_blocks_per_frame': round(sum(pil_blocks) / len(pil_blocks), 1),
+        'full_frame_allocs': full_frame_allocs,
+    }
+
+
+def compare(old_path: str, results: List[Dict]) -> None:
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    old_cases = {(c['workload'], c['font_size'], c['scale']): c for c in old.get('cases', [])}
+    print(f"\n对比 {old.get('revision', '?')}:")
+    for case in results:
+        prev = old_cases.get((case['workload'], case['font_size'], case['scale']))
+        if not prev:
+            continue
+        delta = (case['ms_p50'] - prev['ms_p50']) / prev['ms_p50'] * 100 if prev['ms_p50'] else 0.0
+        print(f"  {case['workload']:<14} fs={case['font_size']:<3} x{case['scale']:<5}"
+              f" p50 {prev['ms_p50']:>7.2f} -> {case['ms_p50']:>7.2f} ms ({delta:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DanmakuRenderer 无头基准')
+    parser.add_argument('--workloads', default=','.join(WORKLOADS))
+    parser.add_argument('--font-sizes', default='12,14,20')
+    parser.add_argument('--scales', default='1.0,1.5')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--per-frame', type=int, default=2, help='每帧新增消息数')
+    parser.add_argument('--frame-interval', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='结果 JSON 文件')
+    parser.add_argument('--compare', help='与之前的结果 JSON 对比')
+    args = parser.parse_args()
+
+    results = []
+    for workload in args.workloads.split(','):
+        for fs in (int(v) for v in args.font_sizes.split(',')):
+            for scale in (float(v) for v in args.scales.split(',')):
+                case = run_case(workload, fs, scale, args.frames, args.per_frame,
+                                args.frame_interval, args.seed)
+                results.append(case)
+                print(f"{workload:<14} fs={fs:<3} {case['resolution'][0]}x{case['resolution'][1]:<5}"
+                      f" p50 {case['ms_p50']:>7.2f}  p90 {case['ms_p90']:>7.2f}  p99 {case['ms_p99']:>7.2f} ms"
+                      f"  alloc {case['alloc_peak_kb_p50']:>7.1f} KB/frame"
+                      f"  full-frame allocs {case['full_frame_allocs']}")
+
+    report = {
+        'revision': _git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pillow': PIL.__version__,
+        'platform': platform.platform(),
+        'peak_rss_kb': _peak_rss_kb(),
+        'settings': vars(args),
+        'cases': results,
+    }
+    print(f"peak RSS: {report['peak_rss_kb']} KB")
+
+    if args.compare:
+        compare(args.compare, results)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"结果已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# 回看窗口基准：python -m benchmarks.bench_scrollback
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from itertools import accumulate
+from typing import Dict, List
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from benchmarks.bench_renderer import _percentile
+from benchmarks.workloads import WORKLOADS
+from ui.renderer import DanmakuRenderer
+from ui.scrollback import ScrollbackView
+
+
+def _messages(count: int, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    kinds = ('short_cjk', 'long_cjk', 'medals_guards', 'enter_flood', 'sc_heavy')
+    messages = []
+    for i in range(count):
+        msg = WORKLOADS[rng.choice(kinds)](rng)
+        msg['id'] = i + 1
+        messages.append(msg)
+    return messages
+
+
+# 对照：逐条累加行数定位窗口，每次滚动都与历史长度成正比
+def _linear_locate(heights: List[int], offset: int) -> int:
+    total = 0
+    for position, lines in enumerate(heights):
+        total += lines
+        if total > offset:
+            return position
+    return len(heights)
+
+
+def _run(args, size: int, pool: List[dict], renderer: DanmakuRenderer) -> Dict:
+    tracemalloc.start()
+    view = ScrollbackView(size=size)
+    view.configure({}, renderer.measure_lines)
+    capacity = renderer.list_capacity()
+    # 历史超过容量一倍，覆盖写入路径也被计入
+    feed_us: List[float] = []
+    count = size * 2
+    batch = []
+    for i in range(count):
+        msg = dict(pool[i % len(pool)])
+        msg['id'] = i + 1
+        batch.append(msg)
+        if len(batch) == 10:
+            t = time.perf_counter()
+            view.feed(batch, i)
+            feed_us.append((time.perf_counter() - t) * 1e6 / len(batch))
+            batch = []
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    rng = random.Random(1)
+    window_us: List[float] = []
+    for _ in range(args.scrolls):
+        view.follow()
+        view.scroll(rng.randint(1, view.total), capacity)
+        t = time.perf_counter()
+        rows, _, _ = view.window(capacity)
+        window_us.append((time.perf_counter() - t) * 1e6)
+
+    # 前缀和与逐条累加的结果一致
+    heights = [view.index.get(view._slot(p)) for p in range(view.count)]
+    prefix = list(accumulate(heights))
+    errors = 0
+    linear_us: List[float] = []
+    for _ in range(args.checks):
+        offset = rng.randrange(prefix[-1])
+        position, before = view._locate(offset)
+        t = time.perf_counter()
+        expected = _linear_locate(heights, offset)
+        linear_us.append((time.perf_counter() - t) * 1e6)
+        if position != expected or before != (prefix[position - 1] if position else 0):
+            errors += 1
+    return {
+        'messages': view.count,
+        'lines': view.total,
+        'measured': sum(1 for e in view._epochs if e == view.epoch),
+        'feed_us': _percentile(feed_us, 50),
+        'window_p50': _percentile(window_us, 50),
+        'window_p99': _percentile(window_us, 99),
+        'linear_p50': _percentile(linear_us, 50),
+        'memory_kb': memory / 1024,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回看窗口基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000, 100000],
+                        help='保留的历史消息数')
+    parser.add_argument('--scrolls', type=int, default=500, help='随机滚动次数')
+    parser.add_argument('--checks', type=int, default=200, help='与逐条累加对照的次数')
+    args = parser.parse_args()
+
+    renderer = DanmakuRenderer()
+    renderer.set_show_config({'show_images': False})
+    pool = _messages(2000)
+    print(f"visible lines {renderer.list_capacity()}  scrolls {args.scrolls}  (each history filled twice)")
+    for size in args.sizes:
+        r = _run(args, size, pool, renderer)
+        print(f"history {r['messages']:>7}  lines {r['lines']:>7}  measured {r['measured']:>5}"
+              f"  feed {r['feed_us']:.2f} us/msg  window p50 {r['window_p50']:.1f} us p99 {r['window_p99']:.1f} us"
+              f"  linear locate p50 {r['linear_p50']:.1f} us  memory {r['memory_kb']:.0f} KB  errors {r['errors']}")
+
+
+if __name__ == '__main__':
+    main()
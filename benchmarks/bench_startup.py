@@ -0,0 +1,70 @@
+# 冷启动基准：每轮新开子进程，测量到窗口可创建、到可以连接直播间的耗时
+# python -m benchmarks.bench_startup --runs 10
+# python -m benchmarks.bench_startup --eager   # 启动前导入全部依赖，对照旧行为
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from benchmarks.bench_renderer import _percentile
+
+
+# 子进程：与 main.py 相同的导入顺序，不启动 webview 主循环
+_CHILD = r'''
+import json, sys, time
+sys.path.insert(0, {root!r})
+from utils import startup
+if {eager!r}:
+    for name in startup.PRELOAD_MODULES:
+        __import__(name)
+    startup.mark('eager_imports')
+from ui import control_panel
+startup.mark('imports_done')
+api = control_panel.AppController()
+with open(control_panel.HTML_FILE, 'r', encoding='utf-8') as f:
+    f.read()
+startup.mark('window_ready')
+startup.preload_now()
+print(json.dumps(startup.marks()))
+'''
+
+
+def run_once(eager: bool) -> Dict[str, float]:
+    code = _CHILD.format(root=_project_root, eager=eager)
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                         cwd=_project_root, check=True)
+    wall = time.perf_counter() - t0
+    marks = json.loads(out.stdout.strip().splitlines()[-1])
+    marks['process_exit'] = wall
+    return marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='冷启动基准')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--eager', action='store_true', help='启动前导入全部依赖')
+    args = parser.parse_args()
+
+    # 首轮预热 .pyc 与磁盘缓存
+    run_once(args.eager)
+    samples: Dict[str, List[float]] = {}
+    for _ in range(args.runs):
+        for name, value in run_once(args.eager).items():
+            samples.setdefault(name, []).append(value * 1000)
+
+    print(f"mode: {'eager' if args.eager else 'lazy'}  runs: {args.runs}")
+    print(f"{'mark':<20} {'p50 ms':>10} {'p90 ms':>10}")
+    for name, values in sorted(samples.items(), key=lambda item: _percentile(item[1], 50)):
+        print(f"{name:<20} {_percentile(values, 50):>10.1f} {_percentile(values, 90):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
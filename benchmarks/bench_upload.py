@@ -0,0 +1,148 @@
+# 纹理上传基准，无显示环境下使用 Mesa EGL surfaceless：python -m benchmarks.bench_upload
+import argparse
+import ctypes
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+# 必须在导入 OpenGL 之前选择平台
+if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+    os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+
+from OpenGL import GL
+
+from benchmarks.bench_renderer import _percentile
+from vr.texture import TextureStreamer
+
+
+_EGL_PLATFORM_SURFACELESS_MESA = 0x31DD
+
+
+def _make_context() -> str:
+    if os.environ.get('PYOPENGL_PLATFORM') == 'egl':
+        from OpenGL import EGL
+        display = EGL.eglGetPlatformDisplay(_EGL_PLATFORM_SURFACELESS_MESA, EGL.EGL_DEFAULT_DISPLAY, None)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        EGL.eglInitialize(display, major, minor)
+        attrs = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                 EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        EGL.eglChooseConfig(display, attrs, ctypes.pointer(config), 1, ctypes.pointer(count))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+        EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context)
+    else:
+        import glfw
+        if not glfw.init():
+            raise RuntimeError('glfw 初始化失败')
+        glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+        window = glfw.create_window(64, 64, '', None, None)
+        if not window:
+            raise RuntimeError('无法创建 OpenGL 上下文')
+        glfw.make_context_current(window)
+    return f"{GL.glGetString(GL.GL_RENDERER).decode()} / {GL.glGetString(GL.GL_VERSION).decode()}"
+
+
+# 旧实现：每帧 glTexImage2D 重新分配存储
+class _LegacyUpload:
+
+    def __init__(self):
+        self.texture_id = None
+        self.last_upload_ms = 0.0
+        self.persistent = False
+
+    def create(self) -> int:
+        self.texture_id = int(GL.glGenTextures(1))
+        return self.texture_id
+
+    def upload(self, data, width: int, height: int, rect=None) -> None:
+        t0 = time.perf_counter()
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture_id)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, width, height, 0,
+                        GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, bytes(data))
+        self.last_upload_ms = (time.perf_counter() - t0) * 1000
+
+    def release(self) -> None:
+        GL.glDeleteTextures([self.texture_id])
+
+
+def _read_back(texture_id: int, width: int, height: int) -> bytes:
+    GL.glFinish()
+    GL.glBindTexture(GL.GL_TEXTURE_2D, texture_id)
+    GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 4)
+    return bytes(GL.glGetTexImage(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE))
+
+
+def _fill(buf: bytearray, width: int, height: int, frame: int, rows: Optional[range] = None) -> None:
+    stride = width * 4
+    row = bytes(((frame * 7 + i) & 0xFF) for i in range(stride))
+    for y in (rows if rows is not None else range(height)):
+        buf[y * stride:(y + 1) * stride] = row
+
+
+def run_case(name: str, streamer, width: int, height: int, frames: int, band: float) -> Dict:
+    streamer.create()
+    buf = bytearray(width * height * 4)
+    stride = width * 4
+    band_h = max(1, int(height * band))
+    # 局部更新：只改底部一段行，并只上传该区域
+    rect = (0, 0, width, band_h) if band < 1.0 else None
+    rows = range(band_h) if rect else None
+
+    _fill(buf, width, height, 0)
+    streamer.upload(buf, width, height)
+    timings: List[float] = []
+    for frame in range(1, frames + 1):
+        _fill(buf, width, height, frame, rows)
+        streamer.upload(buf, width, height, rect)
+        timings.append(streamer.last_upload_ms)
+    GL.glFinish()
+
+    # 校验最终纹理内容与源缓冲区一致
+    ok = _read_back(streamer.texture_id, width, height) == bytes(buf)
+    streamer.release()
+    return {
+        'case': name,
+        'resolution': [width, height],
+        'persistent': getattr(streamer, 'persistent', False),
+        'rect_rows': band_h if rect else height,
+        'ms_p50': round(_percentile(timings, 50), 3),
+        'ms_p90': round(_percentile(timings, 90), 3),
+        'ms_max': round(max(timings), 3),
+        'mb_per_s': round(stride * (band_h if rect else height) / 1e6 / (_percentile(timings, 50) / 1000 or 1e-9), 1),
+        'verified': ok,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='纹理上传基准')
+    parser.add_argument('--sizes', default='450x400,900x800,1280x1136')
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--band', type=float, default=0.15, help='局部上传占帧高比例')
+    args = parser.parse_args()
+
+    print(_make_context())
+    for size in args.sizes.split(','):
+        width, height = (int(v) for v in size.split('x'))
+        cases = [
+            ('teximage', _LegacyUpload(), 1.0),
+            ('subimage', TextureStreamer(use_pbo=False), 1.0),
+            ('pbo_orphan', TextureStreamer(allow_persistent=False), 1.0),
+            ('pbo_persistent', TextureStreamer(), 1.0),
+            ('pbo_partial', TextureStreamer(), args.band),
+        ]
+        for name, streamer, band in cases:
+            case = run_case(name, streamer, width, height, args.frames, band)
+            print(f"{name:<15} {width}x{height:<5} rows {case['rect_rows']:<5}"
+                  f" p50 {case['ms_p50']:>7.3f}  p90 {case['ms_p90']:>7.3f}  max {case['ms_max']:>7.3f} ms"
+                  f"  {case['mb_per_s']:>8.1f} MB/s  {'ok' if case['verified'] else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
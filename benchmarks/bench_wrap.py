@@ -0,0 +1,103 @@
+# 换行引擎基准：python -m benchmarks.bench_wrap
+import argparse
+import os
+import sys
+import time
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from PIL import Image, ImageDraw
+
+from utils import text as text_mod
+from utils.fonts import get_font_manager
+from benchmarks.workloads import make_messages
+
+
+# 旧实现：逐字 textbbox + 字符串拼接，作为对照
+def naive_wrap(text, font, max_width, draw):
+    lines = []
+    current_line = ""
+    current_width = 0
+    widths = {}
+    for char in text:
+        w = widths.get(char)
+        if w is None:
+            bbox = draw.textbbox((0, 0), char, font=font)
+            w = widths[char] = bbox[2] - bbox[0]
+        if current_width + w <= max_width:
+            current_line += char
+            current_width += w
+        else:
+            if current_line:
+                lines.append(current_line)
+            current_line = char
+            current_width = w
+    if current_line:
+        lines.append(current_line)
+    return lines
+
+
+def _clear_caches():
+    text_mod._metric_cache.clear()
+    text_mod._wrap_cache.clear()
+
+
+def run(count: int, font_size: int, max_width: int, rounds: int) -> dict:
+    font = get_font_manager().get('regular', font_size)
+    draw = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+    messages = make_messages(count)
+    total_chars = sum(len(m) for m in messages)
+
+    def timed(fn):
+        best = float('inf')
+        for _ in range(rounds):
+            _clear_caches()
+            t0 = time.perf_counter()
+            for m in messages:
+                fn(m, font, max_width, draw)
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    naive = timed(naive_wrap)
+    cold = timed(lambda m, f, w, d: text_mod._break_lines(m, f, w))
+
+    # 热路径：同一批消息每帧重新布局
+    _clear_caches()
+    for m in messages:
+        text_mod.wrap_text(m, font, max_width, draw)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for m in messages:
+            text_mod.wrap_text(m, font, max_width, draw)
+    warm = (time.perf_counter() - t0) / rounds
+
+    return {
+        'messages': count,
+        'chars': total_chars,
+        'font': os.path.basename(getattr(font, 'path', '<default>') or '<default>'),
+        'naive_chars_per_s': total_chars / naive,
+        'engine_cold_chars_per_s': total_chars / cold,
+        'engine_warm_chars_per_s': total_chars / warm,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='wrap_text 吞吐量基准')
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--font-size', type=int, default=14)
+    parser.add_argument('--max-width', type=int, default=300)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    result = run(args.count, args.font_size, args.max_width, args.rounds)
+    for key, value in result.items():
+        if isinstance(value, float):
+            print(f"{key:>26}: {value:,.0f}")
+        else:
+            print(f"{key:>26}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# 合成消息负载，所有生成器都使用固定种子，保证多次运行结果一致
+import random
+from typing import Callable, Dict, Iterator, List
+
+
+_CJK = '的一是了我不人在他有这个上们来到时大地为子中你说生国年着就那和要她出也得里后自以会家可下而过天去能对小多然于心学么之都好看起发当没成只如事把还用第样道想作种开美总从无情己面最女但现前些所同日手又行意动方期它头经长儿回位分爱老因很给名法间斯知世什两次使身者被高已亲其进此话常与活正感'
+_LATIN = ['hello', 'world', 'GG', 'awsl', '233333', 'nice', 'OK', 'lol', 'VRChat', 'SteamVR']
+_PUNCT = '，。！？、~'
+_URLS = ['https://live.bilibili.com/12345', 'https://b23.tv/AbCdEf', 'www.example.com/path?q=1']
+_MEDALS = ['测试', '小狗', '夜猫', '星光', '咸鱼', '干杯']
+_GIFTS = ['辣条', '小心心', '牛哇牛哇', '打call', '小电视飞船', '告白气球']
+
+
+def random_text(rng: random.Random, min_len: int, max_len: int, latin: float = 0.2) -> str:
+    target = rng.randint(min_len, max_len)
+    parts = []
+    length = 0
+    while length < target:
+        r = rng.random()
+        if r < 0.85 - latin:
+            piece = ''.join(rng.choice(_CJK) for _ in range(rng.randint(1, 6)))
+        elif r < 0.85:
+            piece = ' ' + rng.choice(_LATIN) + ' '
+        elif r < 0.97:
+            piece = rng.choice(_PUNCT)
+        else:
+            piece = ' ' + rng.choice(_URLS) + ' '
+        parts.append(piece)
+        length += len(piece)
+    return ''.join(parts)
+
+
+def _user(rng: random.Random, pool: int = 500) -> str:
+    uid = rng.randrange(pool)
+    return f"用户{uid:04d}" if uid % 3 else f"viewer_{uid}"
+
+
+def _danmaku(rng, min_len, max_len, medal_rate=0.0, guard_rate=0.0) -> dict:
+    medal = None
+    if rng.random() < medal_rate:
+        medal = {'name': rng.choice(_MEDALS), 'level': rng.randint(1, 40)}
+    guard = rng.choice((1, 2, 3)) if rng.random() < guard_rate else 0
+    return {'type': 'danmaku', 'user': _user(rng), 'text': random_text(rng, min_len, max_len),
+            'medal': medal, 'guard': guard}
+
+
+def short_cjk(rng: random.Random) -> dict:
+    return _danmaku(rng, 2, 12)
+
+
+def long_cjk(rng: random.Random) -> dict:
+    return _danmaku(rng, 40, 120)
+
+
+def medals_guards(rng: random.Random) -> dict:
+    return _danmaku(rng, 4, 30, medal_rate=0.9, guard_rate=0.4)
+
+
+def sc_heavy(rng: random.Random) -> dict:
+    if rng.random() < 0.3:
+        return {'type': 'sc', 'user': _user(rng), 'text': random_text(rng, 10, 80),
+                'price': rng.choice((30, 50, 100, 500, 1000))}
+    return _danmaku(rng, 4, 30, medal_rate=0.5)
+
+
+def gift_combos(rng: random.Random) -> dict:
+    if rng.random() < 0.7:
+        gift = rng.choice(_GIFTS)
+        count = rng.randint(1, 99)
+        return {'type': 'gift', 'user': _user(rng, 50), 'text': f'{gift} x{count}',
+                'gift_name': gift, 'gift_count': count}
+    return _danmaku(rng, 4, 20)
+
+
+def enter_flood(rng: random.Random) -> dict:
+    r = rng.random()
+    if r < 0.8:
+        return {'type': 'enter', 'user': _user(rng, 5000), 'text': '进入直播间'}
+    if r < 0.85:
+        return {'type': 'follow', 'user': _user(rng, 5000), 'text': '关注了直播间'}
+    return _danmaku(rng, 2, 20)
+
+
+WORKLOADS: Dict[str, Callable[[random.Random], dict]] = {
+    'short_cjk': short_cjk,
+    'long_cjk': long_cjk,
+    'medals_guards': medals_guards,
+    'sc_heavy': sc_heavy,
+    'gift_combos': gift_combos,
+    'enter_flood': enter_flood,
+}
+
+
+def message_stream(name: str, seed: int = 0) -> Iterator[dict]:
+    rng = random.Random(seed)
+    make = WORKLOADS[name]
+    msg_id = 0
+    while True:
+        msg_id += 1
+        msg = make(rng)
+        msg['id'] = msg_id
+        yield msg
+
+
+def make_messages(count: int, seed: int = 0, min_len: int = 20, max_len: int = 160) -> List[str]:
+    rng = random.Random(seed)
+    return [random_text(rng, min_len, max_len) for _ in range(count)]
@@ -1,6 +1,20 @@
 # 哔哩哔哩
-from .credential import (
-    load_credential, save_credential, create_credential_template,
-    qr_login_async
-)
-from .danmaku_client import BiliDanmakuClient
+# bilibili_api 及 aiohttp 导入较慢，首次使用时才加载
+_LAZY = {
+    'load_credential': 'credential',
+    'save_credential': 'credential',
+    'create_credential_template': 'credential',
+    'qr_login_async': 'credential',
+    'has_credential': 'credential',
+    'BiliDanmakuClient': 'danmaku_client',
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
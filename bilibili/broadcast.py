@@ -0,0 +1,262 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import FrozenSet, Optional, Set
+
+from utils.metrics import get_metrics
+
+
+DEFAULT_PORT = 18765
+# 每个订阅者最多积压的事件数，超出即断开
+QUEUE_SIZE = 256
+# SSE 保活间隔（秒）
+SSE_HEARTBEAT = 15.0
+# 推送线程取走待发事件的间隔（秒）；接收线程不做跨线程唤醒
+FLUSH_INTERVAL = 0.01
+# 停止时等待 WebSocket 关闭握手的时间（秒），超时直接断开
+CLOSE_TIMEOUT = 1.0
+
+
+def _parse_types(value: Optional[str]) -> Optional[FrozenSet[str]]:
+    if not value:
+        return None
+    types = frozenset(t.strip() for t in value.split(',') if t.strip())
+    return types or None
+
+
+class Subscriber:
+    __slots__ = ('kind', 'types', 'queue', 'transport', 'response', 'task', 'sent', 'dropped')
+
+    def __init__(self, kind: str, types: Optional[FrozenSet[str]], transport, queue_size: int, response=None):
+        self.kind = kind
+        # None 表示订阅全部类型
+        self.types = types
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.transport = transport
+        self.response = response
+        # 处理该连接的任务，停止时取消，避免等待心跳或对端
+        self.task = asyncio.current_task()
+        self.sent = 0
+        self.dropped = False
+
+
+# 本地推送：把弹幕事件以 WebSocket（/ws）和 SSE（/events）转发给 OBS 浏览器源等本机程序
+# 订阅时可用 ?types=danmaku,gift 过滤；WebSocket 连接也可以发送 {"types": [...]} 修改过滤
+class BroadcastServer:
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, queue_size: int = QUEUE_SIZE):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscriber] = set()
+        # 接收线程只追加到这里，序列化与分发在推送线程中进行
+        self._inbox: deque = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner = None
+        self._flusher: Optional[asyncio.Future] = None
+        self._thread: Optional[threading.Thread] = None
+        self.error = ''
+        metrics = get_metrics()
+        self._published = metrics.counter('broadcast.events')
+        self._delivered = metrics.counter('broadcast.delivered')
+        self._dropped = metrics.counter('broadcast.dropped_clients')
+        metrics.gauge_fn('broadcast.clients', lambda: len(self._subscribers))
+
+    @property
+    def running(self) -> bool:
+        return self._runner is not None
+
+    def start(self, timeout: float = 5.0) -> bool:
+        if self._thread is not None:
+            return self.running
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name='Broadcast', daemon=True)
+        self._thread.start()
+        ready.wait(timeout)
+        return self.running
+
+    def _run(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            loop.run_until_complete(self._serve())
+        except Exception as e:
+            self.error = str(e)
+            ready.set()
+            loop.close()
+            return
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    async def _serve(self) -> None:
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get('/ws', self._handle_ws)
+        app.router.add_get('/events', self._handle_sse)
+        app.router.add_get('/status', self._handle_status)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, self.port)
+        await site.start()
+        # 端口为 0 时取实际绑定的端口
+        self.port = runner.addresses[0][1]
+        self._runner = runner
+        self._flusher = asyncio.ensure_future(self._flush_loop())
+
+    def stop(self) -> None:
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    # 在推送线程中：先断开所有订阅者并取消其处理任务，再清理服务，最后停止事件循环
+    async def _shutdown(self) -> None:
+        try:
+            if self._flusher is not None:
+                self._flusher.cancel()
+            self._inbox.clear()
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+            for sub in subscribers:
+                sub.dropped = True
+                if sub.kind == 'ws' and sub.response is not None:
+                    try:
+                        await asyncio.wait_for(sub.response.close(), CLOSE_TIMEOUT)
+                    except Exception:
+                        pass
+                if sub.transport is not None:
+                    sub.transport.abort()
+                if sub.task is not None:
+                    sub.task.cancel()
+            runner, self._runner = self._runner, None
+            if runner is not None:
+                await runner.cleanup()
+        finally:
+            asyncio.get_running_loop().stop()
+
+    # 在接收线程中调用：只做一次浅拷贝和追加，不序列化、不加锁、不唤醒其他线程
+    def publish(self, msg: dict) -> None:
+        if not self._subscribers:
+            return
+        self._inbox.append(dict(msg))
+
+    async def _flush_loop(self) -> None:
+        inbox = self._inbox
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            while inbox:
+                self._fanout(inbox.popleft())
+
+    # 每个事件只序列化一次，所有订阅者共享同一份数据
+    def _fanout(self, msg: dict) -> None:
+        self._published.inc()
+        msg_type = msg.get('type', '')
+        text = None
+        sse = None
+        for sub in list(self._subscribers):
+            if sub.types is not None and msg_type not in sub.types:
+                continue
+            if text is None:
+                text = json.dumps(msg, ensure_ascii=False, separators=(',', ':'), default=str)
+            if sub.kind == 'ws':
+                payload = text
+            else:
+                if sse is None:
+                    sse = f"event: {msg_type}\ndata: {text}\n\n".encode('utf-8')
+                payload = sse
+            try:
+                sub.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    # 消费过慢的订阅者直接断开，不拖累其他订阅者
+    def _drop(self, sub: Subscriber) -> None:
+        sub.dropped = True
+        self._subscribers.discard(sub)
+        self._dropped.inc()
+        if sub.transport is not None:
+            sub.transport.abort()
+
+    async def _handle_ws(self, request):
+        from aiohttp import web, WSMsgType
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        sub = Subscriber('ws', _parse_types(request.query.get('types')), request.transport, self.queue_size, ws)
+        self._subscribers.add(sub)
+        writer = asyncio.ensure_future(self._pump_ws(ws, sub))
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    types = json.loads(message.data).get('types')
+                    sub.types = frozenset(types) if types else None
+                except Exception:
+                    pass
+        finally:
+            self._subscribers.discard(sub)
+            writer.cancel()
+        return ws
+
+    async def _pump_ws(self, ws, sub: Subscriber) -> None:
+        try:
+            while True:
+                await ws.send_str(await sub.queue.get())
+                sub.sent += 1
+                self._delivered.inc()
+        except (ConnectionError, RuntimeError):
+            pass
+
+    async def _handle_sse(self, request):
+        from aiohttp import web
+        resp = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'Access-Control-Allow-Origin': '*',
+        })
+        await resp.prepare(request)
+        sub = Subscriber('sse', _parse_types(request.query.get('types')), request.transport, self.queue_size)
+        self._subscribers.add(sub)
+        try:
+            queue = sub.queue
+            while not sub.dropped:
+                if queue.empty():
+                    try:
+                        first = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT)
+                    except asyncio.TimeoutError:
+                        await resp.write(b': ping\n\n')
+                        continue
+                    batch = [first]
+                else:
+                    batch = []
+                # 积压的事件合并为一次写入
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                await resp.write(b''.join(batch))
+                sub.sent += len(batch)
+                self._delivered.inc(len(batch))
+        except (ConnectionError, RuntimeError):
+            pass
+        finally:
+            self._subscribers.discard(sub)
+        return resp
+
+    async def _handle_status(self, request):
+        from aiohttp import web
+        return web.json_response(self.status(), headers={'Access-Control-Allow-Origin': '*'})
+
+    def status(self) -> dict:
+        return {
+            'running': self.running,
+            'port': self.port,
+            'clients': len(self._subscribers),
+            'events': self._published.value,
+            'delivered': self._delivered.value,
+            'dropped_clients': self._dropped.value,
+        }
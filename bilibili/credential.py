@@ -1,48 +1,64 @@
-import json
 import os
 import sys
 import asyncio
 import tempfile
+from typing import TYPE_CHECKING, Optional
 
 _project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _project_root not in sys.path:
     sys.path.insert(0, _project_root)
 
-from config import CREDENTIAL_FILE
-from bilibili_api import Credential
-from bilibili_api.login_v2 import QrCodeLogin, QrCodeLoginEvents
+from config import CREDENTIAL_FILE, read_json, write_json
+from config.storage import atomic_write_json
 
+# bilibili_api 导入较慢，只在真正需要 Credential 时导入
+if TYPE_CHECKING:
+    from bilibili_api import Credential
 
-def load_credential():
-    if not os.path.exists(CREDENTIAL_FILE):
+
+def _read_credential_file() -> Optional[dict]:
+    data = read_json(CREDENTIAL_FILE)
+    if not isinstance(data, dict):
         return None
     
     try:
-        with open(CREDENTIAL_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            sessdata = data.get('sessdata', '').strip()
-            bili_jct = data.get('bili_jct', '').strip()
-            
-            if sessdata and bili_jct:
-                return Credential(
-                    sessdata=sessdata,
-                    bili_jct=bili_jct,
-                    buvid3=data.get('buvid3', '').strip()
-                )
+        sessdata = data.get('sessdata', '').strip()
+        bili_jct = data.get('bili_jct', '').strip()
+        
+        if sessdata and bili_jct:
+            return {
+                'sessdata': sessdata,
+                'bili_jct': bili_jct,
+                'buvid3': data.get('buvid3', '').strip()
+            }
     except Exception:
         pass
     
     return None
 
 
-def save_credential(credential: Credential) -> None:
+# 只检查文件内容，不导入 bilibili_api
+def has_credential() -> bool:
+    return _read_credential_file() is not None
+
+
+def load_credential():
+    data = _read_credential_file()
+    if data is None:
+        return None
+    
+    from bilibili_api import Credential
+    return Credential(**data)
+
+
+def save_credential(credential: 'Credential') -> None:
     data = {
         "sessdata": credential.sessdata or "",
         "bili_jct": credential.bili_jct or "",
         "buvid3": credential.buvid3 or "",
     }
-    with open(CREDENTIAL_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    # 登录凭证尽快落盘
+    write_json(CREDENTIAL_FILE, data, delay=0)
 
 
 def create_credential_template() -> None:
@@ -54,11 +70,12 @@ def create_credential_template() -> None:
         "bili_jct": "",
         "buvid3": "",
     }
-    with open(CREDENTIAL_FILE, 'w', encoding='utf-8') as f:
-        json.dump(template, f, indent=2, ensure_ascii=False)
+    atomic_write_json(CREDENTIAL_FILE, template, backup=False)
 
 
 async def qr_login_async(on_status=None):
+    from bilibili_api.login_v2 import QrCodeLogin, QrCodeLoginEvents
+    
     try:
         qr = QrCodeLogin()
         await qr.generate_qrcode()
@@ -1,10 +1,14 @@
 import asyncio
+import itertools
 import time
 from collections import deque
-from typing import Optional, Callable
+from typing import Optional, Callable, List
 
 from bilibili_api import live, Credential
 from utils import log
+from utils.metrics import get_metrics
+from .users import UserTable
+from .stats import LiveStats
 
 
 class BiliDanmakuClient:
@@ -13,10 +17,25 @@ class BiliDanmakuClient:
         self.room_id = room_id
         self.credential = credential
         self.messages = deque(maxlen=50)
+        # 消息版本号，任何新增或合并都会递增，供渲染端判断是否需要重绘
+        self.version = 0
+        self._ids = itertools.count(1)
         self.online = 0
         self.running = False
         self.connected = False
         self.reconnect_count = 0
+        # 常驻观众的用户名、粉丝牌只保存一份，消息通过 uref 引用
+        self.users = UserTable()
+        # 滑动窗口统计（每分钟弹幕、礼物金额、SC 合计等）
+        self.stats = LiveStats()
+        # 新增或更新的消息会同步传给这些回调（本地推送等），回调必须立即返回
+        self.listeners: List[Callable[[dict], None]] = []
+        
+        # 按类型统计事件数，消息队列占用在快照时读取
+        self._metrics = get_metrics()
+        self._reconnects = self._metrics.counter('client.reconnects')
+        self._metrics.gauge_fn('client.queue', lambda: len(self.messages))
+        self._metrics.gauge_fn('client.users', lambda: len(self.users))
         
         self.room = live.LiveDanmaku(room_id, credential=credential)
         self._register_events()
@@ -27,6 +46,7 @@ class BiliDanmakuClient:
         async def on_danmaku(event):
             info = event['data']['info']
             user = info[2][1] if len(info) > 2 and len(info[2]) > 1 else '???'
+            uid = info[2][0] if len(info) > 2 and info[2] else 0
             text = info[1] if len(info) > 1 else ''
             
             medal = None
@@ -36,19 +56,34 @@ class BiliDanmakuClient:
                     medal = {'name': medal_info[1], 'level': medal_info[0]}
             
             guard_level = info[7] if len(info) > 7 else 0
+            entry = self.users.intern(uid, user, medal, guard_level)
+            self.stats.on_danmaku()
             
-            self.messages.append({
-                'type': 'danmaku', 'user': user, 'text': text,
-                'medal': medal, 'guard': guard_level, 'time': time.time()
-            })
+            msg = {
+                'type': 'danmaku', 'user': entry.name, 'uref': entry.ref, 'text': text,
+                'medal': entry.medal, 'guard': entry.guard, 'time': time.time()
+            }
+            extra = info[0] if info else []
+            # 服务端发送时间（毫秒），同一批推送的弹幕据此在显示时错开
+            if len(extra) > 4 and isinstance(extra[4], (int, float)) and extra[4]:
+                msg['ts'] = extra[4] / 1000
+            # 表情弹幕：info[0][13] 为表情信息，否则为空字典或字符串
+            emoticon = extra[13] if len(extra) > 13 else None
+            if isinstance(emoticon, dict) and emoticon.get('url'):
+                msg['emoticon'] = emoticon['url']
+            self._push(msg)
             log(f"[弹幕] {user}: {text}")
         
         @self.room.on('SEND_GIFT')
         async def on_gift(event):
             data = event['data'].get('data', {})
-            user = data.get('uname', '???')
+            entry = self.users.intern(data.get('uid', 0), data.get('uname', '???'))
+            user = entry.name
             gift = data.get('giftName', '礼物')
             num = data.get('num', 1)
+            # 金额按瓜子计算，连击的每个事件各自计入
+            total_coin = data.get('total_coin') or data.get('price', 0) * num
+            self.stats.on_gift(num, data.get('coin_type', ''), total_coin)
             
             # 礼物连击合并
             now = time.time()
@@ -61,13 +96,17 @@ class BiliDanmakuClient:
                     msg['gift_count'] = msg.get('gift_count', 0) + num
                     msg['text'] = f"{gift} x{msg['gift_count']}"
                     msg['time'] = now
+                    msg['rev'] = msg.get('rev', 0) + 1
+                    self.version += 1
+                    self._notify(msg)
                     log(f"[礼物] {user}: {gift} x{msg['gift_count']}")
                     return
             
             # 新礼物
-            self.messages.append({
-                'type': 'gift', 'user': user, 'text': f'{gift} x{num}',
+            self._push({
+                'type': 'gift', 'user': user, 'uref': entry.ref, 'text': f'{gift} x{num}',
                 'gift_name': gift, 'gift_count': num,
+                'icon': (data.get('gift_info') or {}).get('img_basic', ''),
                 'time': now
             })
             log(f"[礼物] {user}: {gift} x{num}")
@@ -93,7 +132,7 @@ class BiliDanmakuClient:
             data = event['data'].get('data', {})
             user = data.get('copy_writing', '').replace('<%', '').replace('%>', '')
             if user:
-                self.messages.append({
+                self._push({
                     'type': 'vip_enter', 'user': user, 'text': '',
                     'time': time.time()
                 })
@@ -103,7 +142,7 @@ class BiliDanmakuClient:
         async def on_warning(event):
             data = event['data'].get('data', event['data'])
             msg = data.get('msg', '直播间收到警告')
-            self.messages.append({
+            self._push({
                 'type': 'warning', 'user': '[警告] ', 'text': msg,
                 'time': time.time()
             })
@@ -113,7 +152,7 @@ class BiliDanmakuClient:
         async def on_cut_off(event):
             data = event['data'].get('data', event['data'])
             msg = data.get('msg', '直播被切断')
-            self.messages.append({
+            self._push({
                 'type': 'warning', 'user': '[切断] ', 'text': msg,
                 'time': time.time()
             })
@@ -122,13 +161,15 @@ class BiliDanmakuClient:
         @self.room.on('GUARD_BUY')
         async def on_guard_buy(event):
             data = event['data'].get('data', {})
-            user = data.get('username', '???')
             guard_level = data.get('guard_level', 0)
+            entry = self.users.intern(data.get('uid', 0), data.get('username', '???'), guard=guard_level)
+            user = entry.name
             gift_name = data.get('gift_name', '舰长')
             guard_names = {1: '总督', 2: '提督', 3: '舰长'}
             guard_name = guard_names.get(guard_level, gift_name)
-            self.messages.append({
-                'type': 'guard', 'user': user, 'text': f'开通了{guard_name}',
+            self.stats.on_guard(data.get('num', 1), data.get('price', 0))
+            self._push({
+                'type': 'guard', 'user': user, 'uref': entry.ref, 'text': f'开通了{guard_name}',
                 'guard_level': guard_level,
                 'time': time.time()
             })
@@ -136,7 +177,7 @@ class BiliDanmakuClient:
         
         @self.room.on('ROOM_LOCK')
         async def on_room_lock(event):
-            self.messages.append({
+            self._push({
                 'type': 'warning', 'user': '[封禁] ', 'text': '直播间已被封禁',
                 'time': time.time()
             })
@@ -149,9 +190,25 @@ class BiliDanmakuClient:
             if count > 0:
                 self.online = count
     
+    def _push(self, msg: dict) -> None:
+        self._metrics.counter('events.' + msg.get('type', 'unknown')).inc()
+        msg['id'] = next(self._ids)
+        self.messages.append(msg)
+        self.version += 1
+        self._notify(msg)
+    
+    def _notify(self, msg: dict) -> None:
+        for listener in self.listeners:
+            try:
+                listener(msg)
+            except Exception:
+                pass
+    
     def _handle_sc(self, event) -> None:
         data = event['data'].get('data', {})
-        user = data.get('user_info', {}).get('uname', '???')
+        user_info = data.get('user_info', {})
+        entry = self.users.intern(data.get('uid', 0), user_info.get('uname', '???'))
+        user = entry.name
         text = data.get('message', '')
         price = data.get('price', 0)
         
@@ -165,9 +222,10 @@ class BiliDanmakuClient:
                 now - msg.get('time', 0) < 5):
                 return
         
-        self.messages.append({
-            'type': 'sc', 'user': user, 'text': text, 'price': price,
-            'time': now
+        self.stats.on_sc(price)
+        self._push({
+            'type': 'sc', 'user': user, 'uref': entry.ref, 'text': text, 'price': price,
+            'face': user_info.get('face', ''), 'time': now
         })
         log(f"[SC {price}元] {user}: {text}")
     
@@ -178,10 +236,12 @@ class BiliDanmakuClient:
         # V1: 直接在 data 中有 uname / msg_type
         # V2: 可能在 pb_decoded 中，也可能直接在 data 中
         user = ''
+        uid = data.get('uid', 0)
         msg_type = 1
         
         pb = data.get('pb_decoded', {})
         if pb:
+            uid = pb.get('uid', uid)
             user = pb.get('uname', '')
             if not user:
                 user = pb.get('user_info', {}).get('base', {}).get('name', '')
@@ -198,6 +258,8 @@ class BiliDanmakuClient:
             msg_type = data.get('msg_type', 1)
         
         now = time.time()
+        if msg_type == 2:
+            self.stats.on_follow()
         # 去重：短时间内同一用户的重复进入事件
         for msg in reversed(list(self.messages)):
             if (msg.get('type') == 'enter' and
@@ -205,15 +267,19 @@ class BiliDanmakuClient:
                 now - msg.get('time', 0) < 3):
                 return
         
+        if msg_type not in (1, 2):
+            return
+        entry = self.users.intern(uid, user)
         if msg_type == 1:
-            self.messages.append({
-                'type': 'enter', 'user': user, 'text': '进入直播间',
+            self.stats.on_enter()
+            self._push({
+                'type': 'enter', 'user': entry.name, 'uref': entry.ref, 'text': '进入直播间',
                 'time': now
             })
             log(f"[进入] {user}")
         elif msg_type == 2:
-            self.messages.append({
-                'type': 'follow', 'user': user, 'text': '关注了直播间',
+            self._push({
+                'type': 'follow', 'user': entry.name, 'uref': entry.ref, 'text': '关注了直播间',
                 'time': now
             })
             log(f"[关注] {user}")
@@ -237,6 +303,7 @@ class BiliDanmakuClient:
                     log(f"连接错误: {error_msg}", 'error')
             if self.running:
                 self.reconnect_count += 1
+                self._reconnects.inc()
                 # 指数退避：3s, 6s, 12s, 24s... 最大 60s
                 delay = min(60, 3 * (2 ** (self.reconnect_count - 1)))
                 log(f"{delay}秒后重连 (第{self.reconnect_count}次)", 'warning')
@@ -270,7 +337,7 @@ class BiliDanmakuClient:
     # 测试方法
     def send_test_message(self, msg_type: str = 'sc') -> None:
         if msg_type == 'sc':
-            self.messages.append({
+            self._push({
                 'type': 'sc',
                 'user': '测试用户',
                 'text': '这是一条测试SC消息，用于测试显示效果，这是第二行，用于测试换行效果。',
@@ -278,7 +345,7 @@ class BiliDanmakuClient:
                 'time': time.time()
             })
         elif msg_type == 'danmaku':
-            self.messages.append({
+            self._push({
                 'type': 'danmaku',
                 'user': '测试用户',
                 'text': '这是一条测试弹幕',
@@ -287,21 +354,21 @@ class BiliDanmakuClient:
                 'time': time.time()
             })
         elif msg_type == 'gift':
-            self.messages.append({
+            self._push({
                 'type': 'gift',
                 'user': '测试用户',
                 'text': '小电视飞船 x1',
                 'time': time.time()
             })
         elif msg_type == 'warning':
-            self.messages.append({
+            self._push({
                 'type': 'warning',
                 'user': '[警告]',
                 'text': '直播内容涉及敏感话题，请注意规范',
                 'time': time.time()
             })
         elif msg_type == 'enter':
-            self.messages.append({
+            self._push({
                 'type': 'enter',
                 'user': '测试用户',
                 'text': '进入直播间',
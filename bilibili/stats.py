@@ -0,0 +1,120 @@
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+# 统计窗口：名称 -> (窗口长度秒, 桶数)
+WINDOWS: Dict[str, Tuple[float, int]] = {
+    '1m': (60.0, 60),
+    '10m': (600.0, 60),
+}
+# 统计项
+FIELDS = ('danmaku', 'gift_count', 'gift_value', 'sc_count', 'sc_value',
+          'follow', 'enter', 'guard', 'guard_value')
+# 1000 金瓜子 = 1 元
+COIN_PER_YUAN = 1000
+
+
+# 环形分桶计数：过期的桶在写入推进时清零并从总和中扣除，写入和读取都是 O(1)（最多遍历一圈桶）
+class RollingCounter:
+    __slots__ = ('bucket_width', 'buckets', '_slot', '_sum')
+
+    def __init__(self, window: float, buckets: int):
+        self.bucket_width = window / buckets
+        self.buckets = [0.0] * buckets
+        self._slot = 0
+        self._sum = 0.0
+
+    def _advance(self, now: float) -> None:
+        slot = int(now // self.bucket_width)
+        if slot == self._slot:
+            return
+        n = len(self.buckets)
+        steps = min(slot - self._slot, n)
+        for i in range(1, steps + 1):
+            index = (self._slot + i) % n
+            self._sum -= self.buckets[index]
+            self.buckets[index] = 0.0
+        if steps == n:
+            # 整圈过期，消除浮点累计误差
+            self._sum = 0.0
+        self._slot = slot
+
+    def add(self, value: float, now: float) -> None:
+        self._advance(now)
+        self.buckets[self._slot % len(self.buckets)] += value
+        self._sum += value
+
+    # 只读，不推进环：写入在接收线程，读取在其他线程，读到的最多是略旧的值
+    def value(self, now: float) -> float:
+        steps = int(now // self.bucket_width) - self._slot
+        if steps <= 0:
+            return max(self._sum, 0.0)
+        n = len(self.buckets)
+        if steps >= n:
+            return 0.0
+        expired = 0.0
+        for i in range(1, steps + 1):
+            expired += self.buckets[(self._slot + i) % n]
+        return max(self._sum - expired, 0.0)
+
+
+# 由 BiliDanmakuClient 的事件处理函数喂入，在接收线程写入，面板与渲染线程只读汇总值
+class LiveStats:
+
+    def __init__(self, clock: Optional[Callable[[], float]] = None):
+        self.clock = clock or time.time
+        self.started = self.clock()
+        self._windows = {
+            name: {field: RollingCounter(window, buckets) for field in FIELDS}
+            for name, (window, buckets) in WINDOWS.items()
+        }
+        self._totals = dict.fromkeys(FIELDS, 0.0)
+
+    def add(self, field: str, value: float = 1) -> None:
+        now = self.clock()
+        self._totals[field] += value
+        for counters in self._windows.values():
+            counters[field].add(value, now)
+
+    def on_danmaku(self) -> None:
+        self.add('danmaku')
+
+    # 只有金瓜子礼物计入金额，银瓜子礼物只计数量
+    def on_gift(self, num: int, coin_type: str, total_coin: int) -> None:
+        self.add('gift_count', num)
+        if coin_type == 'gold' and total_coin:
+            self.add('gift_value', total_coin / COIN_PER_YUAN)
+
+    def on_sc(self, price: float) -> None:
+        self.add('sc_count')
+        self.add('sc_value', price)
+
+    def on_guard(self, num: int, price: int) -> None:
+        self.add('guard', num)
+        if price:
+            self.add('guard_value', price * num / COIN_PER_YUAN)
+
+    def on_enter(self) -> None:
+        self.add('enter')
+
+    def on_follow(self) -> None:
+        self.add('follow')
+
+    def window(self, name: str) -> Dict[str, float]:
+        if name == 'session':
+            return {field: round(value, 2) for field, value in self._totals.items()}
+        now = self.clock()
+        return {field: round(counter.value(now), 2) for field, counter in self._windows[name].items()}
+
+    def snapshot(self) -> Dict[str, object]:
+        data = {name: self.window(name) for name in WINDOWS}
+        data['session'] = self.window('session')
+        data['duration'] = round(self.clock() - self.started)
+        return data
+
+    # 头部显示：(每分钟弹幕, 本场礼物金额, 本场 SC 金额)，取整后不变时渲染端不会重绘
+    def header(self) -> Tuple[int, float, int]:
+        now = self.clock()
+        return (int(self._windows['1m']['danmaku'].value(now)),
+                round(self._totals['gift_value'] + self._totals['guard_value'], 1),
+                int(self._totals['sc_value']))
@@ -0,0 +1,81 @@
+import itertools
+import sys
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+# 保留的用户数量，超出时淘汰最久未出现的
+USER_TABLE_SIZE = 4096
+# 不传入时保留用户已有的粉丝牌 / 舰长等级
+_KEEP = object()
+# ref 全局唯一，重连后新建的表不会与渲染端缓存的旧 ref 冲突
+_refs = itertools.count(1)
+
+
+class UserEntry:
+    __slots__ = ('ref', 'uid', 'name', 'medal', 'guard')
+
+    def __init__(self, ref: int, uid: int, name: str, medal: Optional[dict], guard: int):
+        self.ref = ref
+        self.uid = uid
+        self.name = name
+        self.medal = medal
+        self.guard = guard
+
+
+# 按 uid 驻留用户名、粉丝牌和舰长等级，消息共享同一份对象并通过 uref 引用
+# ref 对应一组不变的 (用户名, 粉丝牌, 舰长等级)，任何一项变化都会分配新 ref，渲染端可以放心按 ref 缓存前缀度量
+class UserTable:
+
+    def __init__(self, capacity: int = USER_TABLE_SIZE):
+        self.capacity = capacity
+        self._entries: OrderedDict = OrderedDict()
+        self._refs: Dict[int, UserEntry] = {}
+        # 同一粉丝牌在大量用户之间共享
+        self._medals: Dict[tuple, dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _medal(self, medal: Optional[dict]) -> Optional[dict]:
+        if not medal:
+            return None
+        key = (medal.get('name', ''), medal.get('level', 0))
+        shared = self._medals.get(key)
+        if shared is None:
+            if len(self._medals) >= self.capacity:
+                self._medals.clear()
+            shared = self._medals[key] = {'name': sys.intern(key[0]), 'level': key[1]}
+        return shared
+
+    # 没有 uid 时（测试消息等）按用户名区分
+    def intern(self, uid: int, name: str, medal=_KEEP, guard=_KEEP) -> UserEntry:
+        key = uid or name
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            new_medal = entry.medal if medal is _KEEP else self._medal(medal)
+            new_guard = entry.guard if guard is _KEEP else (guard or 0)
+            if entry.name == name and entry.medal == new_medal and entry.guard == new_guard:
+                self.hits += 1
+                return entry
+            # 改名、换牌或上舰：分配新 ref，历史消息自带字段，不受影响
+            medal, guard = new_medal, new_guard
+        else:
+            medal = None if medal is _KEEP else self._medal(medal)
+            guard = 0 if guard is _KEEP else (guard or 0)
+        self.misses += 1
+        if entry is not None:
+            self._refs.pop(entry.ref, None)
+        entry = UserEntry(next(_refs), uid, sys.intern(name), medal, guard)
+        self._entries[key] = entry
+        self._refs[entry.ref] = entry
+        while len(self._entries) > self.capacity:
+            _, old = self._entries.popitem(last=False)
+            self._refs.pop(old.ref, None)
+        return entry
+
+    def get(self, ref: int) -> Optional[UserEntry]:
+        return self._refs.get(ref)
@@ -19,6 +19,24 @@ aiohttp_datas, aiohttp_binaries, aiohttp_hiddenimports = collect_all('aiohttp')
 
 binaries_list = bilibili_binaries + aiohttp_binaries
 
+# 包的 __getattr__ 与启动预加载通过 importlib.import_module 按名字导入，静态分析看不到
+LOCAL_LAZY_MODULES = [
+    'vr.backend',
+    'vr.overlay',
+    'vr.initializer',
+    'vr.controller',
+    'vr.devices',
+    'vr.steamvr',
+    'vr.texture',
+    'bilibili.credential',
+    'bilibili.danmaku_client',
+    'bilibili.users',
+    'bilibili.stats',
+    'utils.text',
+    'utils.fonts',
+    'utils.metrics',
+]
+
 openvr_dll = os.path.join(openvr_dir, 'libopenvr_api_64.dll')
 if os.path.exists(openvr_dll):
     binaries_list.append((openvr_dll, 'openvr'))
@@ -64,7 +82,7 @@ a = Analysis(
         # 其他
         'glfw',
         'openvr',
-    ] + bilibili_hiddenimports + aiohttp_hiddenimports,
+    ] + LOCAL_LAZY_MODULES + bilibili_hiddenimports + aiohttp_hiddenimports,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -10,3 +10,5 @@ from .settings import (
     load_hud_config,
     save_hud_config,
 )
+from .snapshot import ConfigChannel, ConfigSnapshot
+from .storage import read_json, write_json, remove_json, flush as flush_storage
@@ -1,5 +1,4 @@
-import json
-import os
+from .storage import read_json, write_json
 
 
 CREDENTIAL_FILE = "bili_credential.json"
@@ -31,8 +30,34 @@ DISPLAY_DEFAULT = {
     "show_follow": True,
     "show_guard": True,
     "show_sc": True,
+    # 表情弹幕、礼物图标与 SC 头像（后台下载并缓存到 cache/assets）
+    "show_images": True,
     "toggle_hand": "left",
+    # 回看滚动输入：pointer（激光指针滚轮，点击回到最新）/ stick（摇杆，输入同时会传给游戏）/ off
+    "scrollback_input": "pointer",
     "last_room_id": 0,
+    # 根据渲染耗时自动调整分辨率与帧率
+    "adaptive_quality": True,
+    # 在独立进程中渲染弹幕
+    "render_process": False,
+    # 叠加层后端：openvr / null / file / shm
+    "overlay_backend": "openvr",
+    # SC / 上舰面板与弹幕列表分为两个叠加层
+    "split_overlays": False,
+    # 分离显示时通过纹理边界平滑滚动，头部移入 SC 面板
+    "smooth_scroll": True,
+    # SC 面板相对弹幕叠加层的偏移（米）
+    "sc_panel_x": 0.0,
+    "sc_panel_y": 0.26,
+    "sc_panel_z": 0.0,
+    # 突发弹幕错开显示；每行至少停留 min_dwell 秒，积压时合并进入/关注、丢弃最旧的弹幕
+    "display_pacing": True,
+    "min_dwell": 1.5,
+    # 本地推送：通过 ws://127.0.0.1:端口/ws 与 /events (SSE) 转发弹幕事件
+    "broadcast_enabled": False,
+    "broadcast_port": 18765,
+    # 慢帧看门狗的帧耗时预算（毫秒）
+    "slow_frame_ms": 50,
 }
 
 DEFAULT_HUD_CONFIG = {
@@ -56,18 +81,18 @@ def load_hud_config() -> dict:
     config['hmd'] = HMD_DEFAULT.copy()
     config['hand'] = HAND_DEFAULT.copy()
     
-    if os.path.exists(HUD_CONFIG_FILE):
+    # 主文件损坏时自动回退到上一代备份
+    saved = read_json(HUD_CONFIG_FILE)
+    if isinstance(saved, dict):
         try:
-            with open(HUD_CONFIG_FILE, 'r', encoding='utf-8') as f:
-                saved = json.load(f)
-                config['attach_mode'] = saved.get('attach_mode', 'hmd')
-                if 'hmd' in saved:
-                    config['hmd'].update(saved['hmd'])
-                if 'hand' in saved:
-                    config['hand'].update(saved['hand'])
-                for key in DISPLAY_DEFAULT:
-                    if key in saved:
-                        config[key] = saved[key]
+            config['attach_mode'] = saved.get('attach_mode', 'hmd')
+            if 'hmd' in saved:
+                config['hmd'].update(saved['hmd'])
+            if 'hand' in saved:
+                config['hand'].update(saved['hand'])
+            for key in DISPLAY_DEFAULT:
+                if key in saved:
+                    config[key] = saved[key]
         except Exception:
             pass
 
@@ -109,5 +134,5 @@ def save_hud_config(config: dict) -> None:
         if key in config:
             save_data[key] = config[key]
     
-    with open(HUD_CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(save_data, f, indent=2, ensure_ascii=False)
+    # 后台合并写入，不阻塞调用线程
+    write_json(HUD_CONFIG_FILE, save_data)
@@ -0,0 +1,93 @@
+import threading
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping, Optional, Set, Tuple
+
+
+# 子系统 -> 依赖的配置项；只有相关项变化时才通知对应子系统
+ROUTES: Dict[str, FrozenSet[str]] = {
+    'transform': frozenset(('attach_mode', 'x', 'y', 'z', 'pitch', 'yaw', 'roll',
+                            'sc_panel_x', 'sc_panel_y', 'sc_panel_z')),
+    'width': frozenset(('scale',)),
+    'alpha': frozenset(('alpha',)),
+    'font': frozenset(('font_size',)),
+    'background': frozenset(('bg_alpha',)),
+    'filters': frozenset(('show_danmaku', 'show_gift', 'show_enter', 'show_follow',
+                          'show_guard', 'show_sc', 'show_images')),
+    'input': frozenset(('toggle_hand', 'scrollback_input')),
+    'quality': frozenset(('adaptive_quality', 'scale')),
+    'pacing': frozenset(('display_pacing', 'min_dwell')),
+}
+
+# 配置项 -> 子系统
+_KEY_ROUTES: Dict[str, Tuple[str, ...]] = {}
+for _subsystem, _keys in ROUTES.items():
+    for _key in _keys:
+        _KEY_ROUTES[_key] = _KEY_ROUTES.get(_key, ()) + (_subsystem,)
+
+
+class ConfigSnapshot:
+    __slots__ = ('version', 'values')
+
+    def __init__(self, version: int, values: Mapping):
+        self.version = version
+        # 只读视图，快照发布后不会再被修改
+        self.values = MappingProxyType(dict(values))
+
+    def get(self, key: str, default=None):
+        return self.values.get(key, default)
+
+
+def diff_keys(old: Mapping, new: Mapping) -> Set[str]:
+    keys = set(old) | set(new)
+    return {key for key in keys if old.get(key) != new.get(key)}
+
+
+def route(changed: Set[str]) -> Set[str]:
+    subsystems = set()
+    for key in changed:
+        subsystems.update(_KEY_ROUTES.get(key, ()))
+    return subsystems
+
+
+# UI 线程发布快照，VR 线程在帧边界取走；两次取之间的多次发布合并为一次
+class ConfigChannel:
+
+    def __init__(self, config: Optional[Mapping] = None):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._latest = ConfigSnapshot(0, config or {})
+        self._applied = self._latest
+        self.published = 0
+        self.applied = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def publish(self, config: Mapping) -> int:
+        with self._lock:
+            self._version += 1
+            self._latest = ConfigSnapshot(self._version, config)
+            self.published += 1
+            return self._version
+
+    # 以当前配置为基线，丢弃未应用的变化（VR 初始化时已整体应用）
+    def reset(self, config: Mapping) -> None:
+        with self._lock:
+            self._version += 1
+            self._latest = self._applied = ConfigSnapshot(self._version, config)
+
+    def pending(self) -> bool:
+        return self._latest is not self._applied
+
+    # 返回 (最新快照, 变化的配置项, 受影响的子系统)；没有新快照时返回 None
+    def take(self) -> Optional[Tuple[ConfigSnapshot, Set[str], Set[str]]]:
+        if self._latest is self._applied:
+            return None
+        with self._lock:
+            latest = self._latest
+            previous = self._applied
+            self._applied = latest
+        changed = diff_keys(previous.values, latest.values)
+        self.applied += 1
+        return latest, changed, route(changed)
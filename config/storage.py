@@ -0,0 +1,193 @@
+import atexit
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+# 合并写入的等待时间（秒），拖动滑块后连续保存只落盘一次
+WRITE_DELAY = 0.5
+BACKUP_SUFFIX = '.bak'
+
+
+def _fsync_dir(path: str) -> None:
+    # Windows 不支持打开目录，os.replace 本身已足够
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# 写临时文件并 fsync，旧文件保留为 .bak，再原子替换；任何时刻崩溃都不会留下半个文件
+def atomic_write_json(path: str, data, backup: bool = True) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        if backup and os.path.exists(path):
+            os.replace(path, path + BACKUP_SUFFIX)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(path)
+
+
+def _load_file(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class JsonStore:
+
+    def __init__(self, delay: float = WRITE_DELAY):
+        self.delay = delay
+        self._cond = threading.Condition()
+        # 串行化落盘，保证后写入的数据不会被先取出的旧数据覆盖
+        self._io_lock = threading.Lock()
+        # 路径 -> (数据, 最早落盘时间)
+        self._pending: Dict[str, Tuple[object, float]] = {}
+        # 路径 -> ((mtime_ns, size), 数据)
+        self._cache: Dict[str, Tuple[Tuple[int, int], object]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.writes = 0
+        self.errors = 0
+
+    # 读取优先返回尚未落盘的数据，其次是按 mtime 缓存的文件内容；主文件损坏时回退到 .bak
+    def read(self, path: str):
+        with self._cond:
+            if path in self._pending:
+                return copy.deepcopy(self._pending[path][0])
+        for candidate in (path, path + BACKUP_SUFFIX):
+            try:
+                st = os.stat(candidate)
+            except OSError:
+                continue
+            stamp = (st.st_mtime_ns, st.st_size)
+            cached = self._cache.get(candidate)
+            if cached and cached[0] == stamp:
+                return copy.deepcopy(cached[1])
+            try:
+                data = _load_file(candidate)
+            except Exception:
+                continue
+            self._cache[candidate] = (stamp, data)
+            return copy.deepcopy(data)
+        return None
+
+    # 只记录最新数据，由后台线程合并后写入；首次修改后 delay 秒内必定落盘，delay=0 表示尽快写入
+    def write(self, path: str, data, delay: Optional[float] = None) -> None:
+        delay = self.delay if delay is None else delay
+        snapshot = copy.deepcopy(data)
+        with self._cond:
+            due = time.monotonic() + delay
+            if path in self._pending:
+                due = min(due, self._pending[path][1])
+            self._pending[path] = (snapshot, due)
+            self._ensure_thread()
+            self._cond.notify()
+
+    def remove(self, path: str) -> None:
+        with self._io_lock:
+            with self._cond:
+                self._pending.pop(path, None)
+            for candidate in (path, path + BACKUP_SUFFIX):
+                self._cache.pop(candidate, None)
+                try:
+                    os.remove(candidate)
+                except FileNotFoundError:
+                    pass
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='ConfigWriter', daemon=True)
+            self._thread.start()
+
+    def _take_due(self, force: bool = False) -> Dict[str, object]:
+        now = time.monotonic()
+        due = {path: data for path, (data, at) in self._pending.items() if force or at <= now}
+        for path in due:
+            del self._pending[path]
+        return due
+
+    def _write_all(self, items: Dict[str, object]) -> None:
+        for path, data in items.items():
+            try:
+                atomic_write_json(path, data)
+                self.writes += 1
+            except Exception:
+                self.errors += 1
+                # 写入失败时保留数据，稍后重试
+                with self._cond:
+                    self._pending.setdefault(path, (data, time.monotonic() + max(self.delay, 1.0)))
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+                wait = min(at for _, at in self._pending.values()) - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            with self._io_lock:
+                with self._cond:
+                    items = self._take_due()
+                self._write_all(items)
+
+    # 立即写入所有待写数据，退出前调用
+    def flush(self) -> None:
+        with self._io_lock:
+            with self._cond:
+                items = self._take_due(force=True)
+            self._write_all(items)
+
+    def close(self) -> None:
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+
+_store = JsonStore()
+atexit.register(_store.flush)
+
+
+def get_store() -> JsonStore:
+    return _store
+
+
+def read_json(path: str):
+    return _store.read(path)
+
+
+def write_json(path: str, data, delay: Optional[float] = None) -> None:
+    _store.write(path, data, delay)
+
+
+def remove_json(path: str) -> None:
+    _store.remove(path)
+
+
+def flush() -> None:
+    _store.flush()
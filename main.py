@@ -1,15 +1,41 @@
 import sys
 import os
 import logging
+import multiprocessing
 import warnings
 
+# 最先导入，作为启动计时零点
+from utils import startup
+
 logging.getLogger('pywebview').setLevel(logging.CRITICAL)
 warnings.filterwarnings('ignore')
 
 if getattr(sys, 'frozen', False):
     os.chdir(os.path.dirname(sys.executable))
 
+# --profile-imports：记录各模块导入耗时，退出时写入 startup_profile.txt
+PROFILE_IMPORTS = '--profile-imports' in sys.argv
+if PROFILE_IMPORTS:
+    startup.enable_import_profile()
+
 from ui.control_panel import main
 
+startup.mark('imports_done')
+
+
+def _write_profile(path: str = 'startup_profile.txt') -> None:
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(startup.report(40))
+    except Exception:
+        pass
+
+
 if __name__ == "__main__":
-    main()
+    # 打包后渲染子进程需要
+    multiprocessing.freeze_support()
+    try:
+        main()
+    finally:
+        if PROFILE_IMPORTS:
+            _write_profile()
@@ -0,0 +1,85 @@
+# 图片资源管线：使用本地替身服务代替 B 站 CDN，python -m pytest tests
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from PIL import Image
+
+from benchmarks.bench_assets import _StandIn
+from ui.assets import AssetPipeline
+
+
+# 随机噪声几乎不可压缩，约 480 KB，远大于一次读取能拿到的缓冲
+def _large_png(size: int = 400) -> bytes:
+    rng = random.Random(0)
+    img = Image.frombytes('RGB', (size, size), bytes(rng.getrandbits(8) for _ in range(size * size * 3)))
+    buf = io.BytesIO()
+    img.save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def _wait(pipeline: AssetPipeline, url: str, height: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        bitmap = pipeline.get(url, height)
+        if bitmap is not None or pipeline.errors:
+            return bitmap
+        time.sleep(0.02)
+    return None
+
+
+def test_multi_chunk_image_is_read_completely_and_cached():
+    data = _large_png()
+    assert len(data) > 256 * 1024
+    server = _StandIn(0, 0.0, chunk=16 * 1024)
+    server.images['/img/large.png'] = data
+    url = server.base + '/img/large.png'
+    with tempfile.TemporaryDirectory() as cache_dir:
+        pipeline = AssetPipeline(cache_dir=cache_dir)
+        try:
+            bitmap = _wait(pipeline, url, 32)
+            assert bitmap is not None
+            assert pipeline.errors == 0
+            assert pipeline.downloads == 1
+            path = os.path.join(cache_dir, pipeline.disk._name(url))
+            assert os.path.getsize(path) == len(data)
+        finally:
+            pipeline.stop()
+
+
+def test_undecodable_download_is_not_cached():
+    server = _StandIn(0, 0.0, chunk=16 * 1024)
+    server.images['/img/broken.png'] = _large_png()[:40000]
+    url = server.base + '/img/broken.png'
+    with tempfile.TemporaryDirectory() as cache_dir:
+        pipeline = AssetPipeline(cache_dir=cache_dir)
+        try:
+            assert _wait(pipeline, url, 32) is None
+            assert pipeline.errors == 1
+            assert not os.path.exists(os.path.join(cache_dir, pipeline.disk._name(url)))
+        finally:
+            pipeline.stop()
+
+
+def test_corrupt_disk_entry_is_replaced_by_download():
+    data = _large_png()
+    server = _StandIn(0, 0.0, chunk=16 * 1024)
+    server.images['/img/large.png'] = data
+    url = server.base + '/img/large.png'
+    with tempfile.TemporaryDirectory() as cache_dir:
+        pipeline = AssetPipeline(cache_dir=cache_dir)
+        pipeline.disk.put(url, data[:16384])
+        try:
+            assert _wait(pipeline, url, 32) is not None
+            assert pipeline.disk_hits == 0
+            assert server.hits['/img/large.png'] == 1
+            assert pipeline.disk.get(url) == data
+        finally:
+            pipeline.stop()
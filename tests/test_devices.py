@@ -0,0 +1,132 @@
+# 设备表与手柄输入：用假的 IVRSystem 驱动事件，python -m pytest tests
+import os
+import sys
+from collections import deque
+
+import openvr
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from vr.controller import VRControllerInput
+from vr.devices import DeviceRegistry, INVALID_INDEX
+
+LEFT = openvr.TrackedControllerRole_LeftHand
+RIGHT = openvr.TrackedControllerRole_RightHand
+CONTROLLER = openvr.TrackedDeviceClass_Controller
+
+
+# 只实现 DeviceRegistry / VRControllerInput 用到的接口，记录扫描与状态读取次数
+class FakeVRSystem:
+
+    def __init__(self):
+        # 设备索引 -> (设备类型, 角色)
+        self.devices = {0: (openvr.TrackedDeviceClass_HMD, openvr.TrackedControllerRole_Invalid)}
+        self.events = deque()
+        self.class_calls = 0
+        self.state_calls = 0
+        self.axis_y = 0.0
+
+    def connect(self, index: int, role: int) -> None:
+        self.devices[index] = (CONTROLLER, role)
+        self.events.append((openvr.VREvent_TrackedDeviceActivated, index, 0))
+
+    def disconnect(self, index: int) -> None:
+        del self.devices[index]
+        self.events.append((openvr.VREvent_TrackedDeviceDeactivated, index, 0))
+
+    def swap_hands(self) -> None:
+        for index, (device_class, role) in list(self.devices.items()):
+            if role in (LEFT, RIGHT):
+                self.devices[index] = (device_class, RIGHT if role == LEFT else LEFT)
+        self.events.append((openvr.VREvent_TrackedDeviceRoleChanged, INVALID_INDEX, 0))
+
+    def press(self, index: int, button: int, pressed: bool = True) -> None:
+        event_type = openvr.VREvent_ButtonPress if pressed else openvr.VREvent_ButtonUnpress
+        self.events.append((event_type, index, button))
+
+    def getTrackedDeviceClass(self, index):
+        self.class_calls += 1
+        return self.devices.get(index, (openvr.TrackedDeviceClass_Invalid, 0))[0]
+
+    def getControllerRoleForTrackedDeviceIndex(self, index):
+        return self.devices.get(index, (0, openvr.TrackedControllerRole_Invalid))[1]
+
+    def pollNextEvent(self, event):
+        if not self.events:
+            return False
+        event.eventType, event.trackedDeviceIndex, event.data.controller.button = self.events.popleft()
+        return True
+
+    def getControllerState(self, index):
+        self.state_calls += 1
+        state = openvr.VRControllerState_t()
+        state.rAxis[0].y = self.axis_y
+        return True, state
+
+
+def test_registry_tracks_connect_disconnect_and_role_change():
+    system = FakeVRSystem()
+    registry = DeviceRegistry(system)
+    assert not registry.has_controller()
+    assert registry.rescans == 1
+
+    system.connect(3, LEFT)
+    system.connect(4, RIGHT)
+    assert registry.poll_events() == 2
+    assert registry.index_for_role(LEFT) == 3
+    assert registry.index_for_role(RIGHT) == 4
+    # 连接与断开只查询对应设备，不重新扫描全部槽位
+    assert registry.rescans == 1
+
+    generation = registry.generation
+    system.swap_hands()
+    registry.poll_events()
+    assert registry.index_for_role(LEFT) == 4
+    assert registry.index_for_role(RIGHT) == 3
+    assert registry.generation > generation
+
+    system.disconnect(4)
+    registry.poll_events()
+    assert registry.index_for_role(LEFT) == INVALID_INDEX
+    assert registry.has_controller()
+
+    # 没有事件时不访问设备
+    calls = system.class_calls
+    assert registry.poll_events() == 0
+    assert system.class_calls == calls
+
+
+def test_grip_event_toggles_without_state_polling():
+    system = FakeVRSystem()
+    system.connect(3, LEFT)
+    controller = VRControllerInput(system)
+    toggles = []
+    controller.on_toggle(lambda: toggles.append(1))
+
+    system.press(3, openvr.k_EButton_Grip)
+    system.press(3, openvr.k_EButton_Grip, False)
+    controller.poll()
+    assert toggles == [1]
+
+    # 状态兜底按间隔读取，不是每帧
+    for _ in range(50):
+        controller.poll()
+    assert system.state_calls <= 1
+
+
+def test_stick_scroll_reads_state_every_poll():
+    system = FakeVRSystem()
+    system.connect(4, RIGHT)
+    controller = VRControllerInput(system)
+    controller.set_toggle_hand("always_on")
+    controller.poll()
+    assert system.state_calls == 0
+
+    controller.stick_scroll = True
+    system.axis_y = 1.0
+    for _ in range(5):
+        controller.poll()
+    assert system.state_calls == 5
+    assert controller.scroll_velocity > 0
@@ -1,3 +1,10 @@
 # UI
-from .renderer import DanmakuRenderer
-from .control_panel import HUDControlPanel
+# 渲染器依赖 PIL，控制面板依赖 pywebview，按需导入
+def __getattr__(name):
+    if name == 'DanmakuRenderer':
+        from .renderer import DanmakuRenderer
+        return DanmakuRenderer
+    if name == 'HUDControlPanel':
+        from .control_panel import HUDControlPanel
+        return HUDControlPanel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
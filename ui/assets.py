@@ -0,0 +1,319 @@
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from PIL import Image, ImageDraw
+
+from utils import log
+
+
+# 磁盘缓存目录与容量
+CACHE_DIR = os.path.join('cache', 'assets')
+DISK_LIMIT = 64 * 1024 * 1024
+# 解码后位图的内存上限（按 RGBA 字节计算）
+MEMORY_LIMIT = 32 * 1024 * 1024
+# 单个图片的下载上限
+MAX_ASSET_BYTES = 2 * 1024 * 1024
+FETCH_TIMEOUT = 10.0
+# 按块读取响应，累计大小超过上限立即放弃
+READ_CHUNK = 64 * 1024
+MAX_CONCURRENT = 4
+# 下载或解码失败的地址在这段时间内不再重试（秒）
+RETRY_AFTER = 60.0
+# 位图最大宽高比，过宽的图片按比例缩小
+MAX_ASPECT = 4.0
+
+
+# 弹幕数据中的图片地址可能省略协议
+def normalize_url(url: str) -> str:
+    if url.startswith('//'):
+        return 'https:' + url
+    return url
+
+
+# 按 URL 的哈希存放原始文件，超出容量时淘汰最久未使用的；只在线程池中调用
+class DiskCache:
+
+    def __init__(self, directory: str = CACHE_DIR, limit: int = DISK_LIMIT):
+        self.directory = directory
+        self.limit = limit
+        self._lock = threading.Lock()
+        # 文件名 -> 大小，按最近使用排序
+        self._index: Optional[OrderedDict] = None
+        self._size = 0
+
+    def _name(self, url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _load_index(self) -> None:
+        if self._index is not None:
+            return
+        entries = []
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, entry.name, st.st_size))
+        except OSError:
+            pass
+        entries.sort()
+        self._index = OrderedDict((name, size) for _, name, size in entries)
+        self._size = sum(size for _, _, size in entries)
+
+    def get(self, url: str) -> Optional[bytes]:
+        name = self._name(url)
+        with self._lock:
+            self._load_index()
+            if name not in self._index:
+                return None
+            self._index.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # mtime 记录最近使用时间，重启后按它恢复淘汰顺序
+            os.utime(path)
+            return data
+        except OSError:
+            with self._lock:
+                self._size -= self._index.pop(name, 0)
+            return None
+
+    # 删除无法解码的缓存文件，之后的请求重新下载
+    def remove(self, url: str) -> None:
+        name = self._name(url)
+        with self._lock:
+            self._load_index()
+            self._size -= self._index.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def put(self, url: str, data: bytes) -> None:
+        name = self._name(url)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            self._load_index()
+        fd, tmp_path = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._size += len(data) - self._index.pop(name, 0)
+            self._index[name] = len(data)
+            while self._size > self.limit and len(self._index) > 1:
+                old, size = self._index.popitem(last=False)
+                self._size -= size
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except OSError:
+                    pass
+
+
+# 检查数据是完整可解码的图片，写入磁盘缓存前和读取磁盘缓存后调用
+def validate_image(data: bytes) -> None:
+    with Image.open(io.BytesIO(data)) as src:
+        src.seek(0)
+        src.load()
+
+
+# 解码第一帧并按目标高度缩放；circle 时裁成圆形（头像）
+def decode_bitmap(data: bytes, height: int, circle: bool = False) -> Image.Image:
+    with Image.open(io.BytesIO(data)) as src:
+        src.seek(0)
+        img = src.convert('RGBA')
+    width = max(1, min(round(img.width * height / max(img.height, 1)), int(height * MAX_ASPECT)))
+    if circle:
+        width = height
+    img = img.resize((width, height), Image.LANCZOS)
+    if circle:
+        mask = Image.new('L', (height * 4, height * 4), 0)
+        ImageDraw.Draw(mask).ellipse((0, 0, height * 4 - 1, height * 4 - 1), fill=255)
+        mask = mask.resize((height, height), Image.LANCZOS)
+        alpha = Image.composite(img.getchannel('A'), mask, mask)
+        img.putalpha(alpha)
+    return img
+
+
+# 表情、礼物图标、头像的异步加载：
+# 渲染线程只调用 get()，命中返回已缩放的位图，未命中返回 None 并在网络线程中排队加载，从不阻塞
+class AssetPipeline:
+
+    def __init__(self, cache_dir: str = CACHE_DIR, disk_limit: int = DISK_LIMIT,
+                 memory_limit: int = MEMORY_LIMIT):
+        self.disk = DiskCache(cache_dir, disk_limit)
+        self.memory_limit = memory_limit
+        self._lock = threading.Lock()
+        # (url, 高度, 圆形) -> 位图
+        self._bitmaps: OrderedDict = OrderedDict()
+        self._memory = 0
+        # 已排队的位图，避免同一帧内重复提交
+        self._pending: Set[Tuple[str, int, bool]] = set()
+        self._failed: Dict[str, float] = {}
+        # 网络线程内的状态
+        self._downloads: Dict[str, asyncio.Future] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # 有新位图可用时递增，渲染端据此重绘
+        self.version = 0
+        self.requests = 0
+        self.downloads = 0
+        self.disk_hits = 0
+        self.errors = 0
+
+    def get(self, url: str, height: int, circle: bool = False) -> Optional[Image.Image]:
+        key = (url, height, circle)
+        with self._lock:
+            bitmap = self._bitmaps.get(key)
+            if bitmap is not None:
+                self._bitmaps.move_to_end(key)
+                return bitmap
+            if key in self._pending:
+                return None
+            failed = self._failed.get(url)
+            if failed is not None and time.monotonic() - failed < RETRY_AFTER:
+                return None
+            self._pending.add(key)
+        self.requests += 1
+        loop = self._ensure_loop()
+        loop.call_soon_threadsafe(self._schedule, key)
+        return None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._run_loop, args=(ready,),
+                                                name='AssetLoop', daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def _run_loop(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            if self._session is not None:
+                loop.run_until_complete(self._session.close())
+            loop.close()
+
+    def _schedule(self, key: Tuple[str, int, bool]) -> None:
+        asyncio.ensure_future(self._load(key))
+
+    async def _load(self, key: Tuple[str, int, bool]) -> None:
+        url, height, circle = key
+        loop = asyncio.get_running_loop()
+        try:
+            data = await self._download(url)
+            bitmap = await loop.run_in_executor(None, decode_bitmap, data, height, circle)
+        except Exception as e:
+            self.errors += 1
+            with self._lock:
+                if len(self._failed) > 1024:
+                    self._failed.clear()
+                self._failed[url] = time.monotonic()
+                self._pending.discard(key)
+            log(f"图片加载失败: {url} ({e})", 'warning')
+            return
+        size = bitmap.width * bitmap.height * 4
+        with self._lock:
+            self._pending.discard(key)
+            self._bitmaps[key] = bitmap
+            self._memory += size
+            while self._memory > self.memory_limit and len(self._bitmaps) > 1:
+                _, old = self._bitmaps.popitem(last=False)
+                self._memory -= old.width * old.height * 4
+        self.version += 1
+
+    # 同一地址的并发请求（不同尺寸）共享一次下载
+    async def _download(self, url: str) -> bytes:
+        future = self._downloads.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(url))
+            self._downloads[url] = future
+            future.add_done_callback(lambda _: self._downloads.pop(url, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, url: str) -> bytes:
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, self.disk.get, url)
+        if data is not None:
+            try:
+                await loop.run_in_executor(None, validate_image, data)
+                self.disk_hits += 1
+                return data
+            except Exception:
+                # 损坏或不完整的缓存文件，删除后重新下载
+                await loop.run_in_executor(None, self.disk.remove, url)
+        async with self._semaphore:
+            data = await self._http_get(normalize_url(url))
+        self.downloads += 1
+        # 只缓存能解码的数据，失败的下载不会在重试时从磁盘再次读出
+        await loop.run_in_executor(None, validate_image, data)
+        await loop.run_in_executor(None, self.disk.put, url, data)
+        return data
+
+    async def _http_get(self, url: str) -> bytes:
+        import aiohttp
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT),
+                                                  headers={'Referer': 'https://live.bilibili.com/'})
+        async with self._session.get(url) as resp:
+            resp.raise_for_status()
+            if (resp.content_length or 0) > MAX_ASSET_BYTES:
+                raise ValueError('图片过大')
+            # content.read(n) 只返回已缓冲的部分，按块读完整个响应
+            chunks = []
+            size = 0
+            async for chunk in resp.content.iter_chunked(READ_CHUNK):
+                size += len(chunk)
+                if size > MAX_ASSET_BYTES:
+                    raise ValueError('图片过大')
+                chunks.append(chunk)
+            return b''.join(chunks)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory
+
+    def stop(self) -> None:
+        with self._lock:
+            loop = self._loop
+            self._loop = None
+            self._pending.clear()
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.stop)
+
+
+_pipeline: Optional[AssetPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_asset_pipeline() -> AssetPipeline:
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = AssetPipeline()
+        return _pipeline
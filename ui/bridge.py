@@ -0,0 +1,148 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# 两次推送的最小间隔（秒）
+FLUSH_INTERVAL = 0.1
+# 待推送事件上限，超出时丢弃最旧的
+MAX_EVENTS = 500
+# 页面端入口函数
+JS_ENTRY = '__bridge'
+
+
+# Python -> 网页的批量推送通道：事件按序排队，状态只保留最新值，每个间隔一次 evaluate_js
+class UIBridge:
+
+    def __init__(self, interval: float = FLUSH_INTERVAL, max_events: int = MAX_EVENTS):
+        self.interval = interval
+        self.window = None
+        self._lock = threading.Lock()
+        self._events: deque = deque(maxlen=max_events)
+        self._state: Dict[str, object] = {}
+        self._dropped = 0
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        # 页面加载完成前不推送，数据留在队列里
+        self._ready = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_flush = 0.0
+        self.flushes = 0
+        self.events_sent = 0
+        self.dropped_total = 0
+
+    def attach(self, window) -> None:
+        self.window = window
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='UIBridge', daemon=True)
+            self._thread.start()
+
+    def set_ready(self) -> None:
+        self._ready = True
+        self._dirty.set()
+
+    # 有序事件（日志、进度）
+    def emit(self, kind: str, payload=None) -> None:
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self._dropped += 1
+            self._events.append((kind, payload))
+        self._dirty.set()
+
+    # 状态（连接、二维码、统计），同一 key 只推送最新值
+    def set_state(self, key: str, payload) -> None:
+        with self._lock:
+            self._state[key] = payload
+        self._dirty.set()
+
+    def _take(self) -> Optional[Tuple[List, Dict, int]]:
+        with self._lock:
+            if not self._events and not self._state and not self._dropped:
+                return None
+            events = list(self._events)
+            self._events.clear()
+            state = self._state
+            self._state = {}
+            dropped = self._dropped
+            self._dropped = 0
+        return events, state, dropped
+
+    def flush(self) -> bool:
+        if not self.window or not self._ready:
+            return False
+        batch = self._take()
+        if batch is None:
+            return False
+        events, state, dropped = batch
+        text = json.dumps({'events': events, 'state': state, 'dropped': dropped},
+                          ensure_ascii=False, separators=(',', ':'), default=str)
+        self._last_flush = time.monotonic()
+        try:
+            self.window.evaluate_js(f'window.{JS_ENTRY} && {JS_ENTRY}({text})')
+        except Exception:
+            return False
+        self.flushes += 1
+        self.events_sent += len(events)
+        self.dropped_total += dropped
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._dirty.wait()
+            if self._stop.is_set():
+                break
+            # 合并一个间隔内的所有更新
+            delay = self._last_flush + self.interval - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            self._dirty.clear()
+            self.flush()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._dirty.set()
+
+
+# 耗时的 API 调用立即返回任务编号，进度与结果通过 bridge 的 job 事件推送
+class JobRunner:
+
+    def __init__(self, bridge: UIBridge):
+        self.bridge = bridge
+        self._ids = itertools.count(1)
+        self._jobs: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+    # fn(progress) 返回结果字典；progress(detail) 推送进度文本
+    def submit(self, name: str, fn: Callable[[Callable[[str], None]], dict]) -> int:
+        job_id = next(self._ids)
+        job = {'id': job_id, 'name': name, 'state': 'running', 'detail': '', 'result': None}
+        with self._lock:
+            # 只保留最近的已结束任务
+            finished = [k for k, v in self._jobs.items() if v['state'] != 'running']
+            for k in finished[:-32]:
+                del self._jobs[k]
+            self._jobs[job_id] = job
+
+        def progress(detail: str) -> None:
+            job['detail'] = detail
+            self.bridge.emit('job', dict(job))
+
+        def run():
+            try:
+                job['result'] = fn(progress)
+                job['state'] = 'done'
+            except Exception as e:
+                job['result'] = {'success': False, 'error': str(e)}
+                job['state'] = 'failed'
+            self.bridge.emit('job', dict(job))
+
+        threading.Thread(target=run, name=f'Job-{name}', daemon=True).start()
+        return job_id
+
+    def get(self, job_id: int) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return dict(job) if job else None
@@ -4,7 +4,7 @@ import threading
 import time
 import asyncio
 import logging
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 
 logging.getLogger('pywebview').setLevel(logging.CRITICAL)
 logging.getLogger('clr_loader').setLevel(logging.CRITICAL)
@@ -16,10 +16,19 @@ _project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _project_root not in sys.path:
     sys.path.insert(0, _project_root)
 
-from config import load_hud_config, save_hud_config, HUD_PRESETS, HMD_DEFAULT, HAND_DEFAULT
-from bilibili import qr_login_async, load_credential, BiliDanmakuClient
-from vr import VROverlay, VRControllerInput
-from utils import set_log_callback
+from config import load_hud_config, save_hud_config, HUD_PRESETS, HMD_DEFAULT, HAND_DEFAULT, ConfigChannel, flush_storage
+from vr.quality import QualityGovernor, BASE_WIDTH, BASE_HEIGHT
+from utils import set_log_callback, startup
+from utils.metrics import get_metrics, export_snapshots
+from utils import profiling
+from ui.bridge import UIBridge, JobRunner
+from ui.pacer import DisplayPacer
+from ui.scrollback import ScrollbackView
+
+# bilibili_api / openvr / OpenGL 等重依赖在首次使用时导入，窗口显示后后台预加载
+if TYPE_CHECKING:
+    from bilibili import BiliDanmakuClient
+    from vr import OverlayBackend
 
 try:
     import webview
@@ -35,39 +44,137 @@ def _get_resource_path(filename):
 
 
 HTML_FILE = _get_resource_path('control_panel.html')
+# 关闭时等待 VR 线程退出并释放叠加层的时间（秒）
+VR_JOIN_TIMEOUT = 3.0
 
 
 class AppController:
     def __init__(self):
         self.config = load_hud_config()
-        self.overlay: Optional[VROverlay] = None
-        self.controller: Optional[VRControllerInput] = None
-        self.danmaku_client: Optional[BiliDanmakuClient] = None
+        # UI 线程发布配置快照，VR 线程在帧边界按变化项增量应用
+        self._config_channel = ConfigChannel(self.config)
+        self.overlay: Optional['OverlayBackend'] = None
+        self.danmaku_client: Optional['BiliDanmakuClient'] = None
         self.renderer = None
+        self.render_worker = None
+        self._vr_initializer = None
+        self._vr_worker: Optional[threading.Thread] = None
+        # 分离的 SC / 上舰面板
+        self.sc_renderer = None
+        self.sc_overlay: Optional['OverlayBackend'] = None
+        self._scroll_tick = 0.0
+        self.governor = QualityGovernor()
+        self._quality_dirty = True
         self.window = None
         self._running = False
         self._qr_status = None
         self._qr_path = None
+        self._qr_opened = False
+        # 日志、状态、任务进度合并为批次推送到页面
+        self.bridge = UIBridge()
+        self.jobs = JobRunner(self.bridge)
+        self._stopping = threading.Event()
+        # 按需开启的分析工具，关闭时热路径上只有一次属性判断
+        self.watchdog = profiling.FrameWatchdog('vr', self.config.get('slow_frame_ms', 50))
+        self._section_timing = False
+        # 本地推送服务，启用时创建
+        self.broadcast = None
+        # 突发弹幕错开显示，保证最短停留时间；只在 VR 线程中使用
+        self.pacer = DisplayPacer()
+        self._paced_client = None
+        # 回看历史，叠加层隐藏时也持续记录；只在 VR 线程中使用
+        self.scrollback = ScrollbackView()
+        self._scrollback_client = None
+        self._scroll_input_tick = 0.0
     
     def set_window(self, window):
         self.window = window
+        self.bridge.attach(window)
         set_log_callback(self.log)
+        threading.Thread(target=self._metrics_loop, name='Metrics', daemon=True).start()
     
-    def log(self, msg: str, level: str = 'info'):
-        if self.window:
+    # 每秒生成一次指标快照，推送到统计页并保留历史供导出
+    def _metrics_loop(self, interval: float = 1.0):
+        metrics = get_metrics()
+        while not self._stopping.wait(interval):
             try:
-                # 转义
-                safe_msg = msg.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '')
-                self.window.evaluate_js(f'addLog("{safe_msg}", "{level}")')
-            except:
+                snap = metrics.snapshot()
+                client = self.danmaku_client
+                if client:
+                    snap['live'] = client.stats.snapshot()
+                self.bridge.set_state('metrics', snap)
+            except Exception:
                 pass
     
+    def export_metrics(self, fmt: str = 'json') -> dict:
+        fmt = 'csv' if fmt == 'csv' else 'json'
+        path = os.path.join('metrics', time.strftime('metrics_%Y%m%d_%H%M%S') + '.' + fmt)
+        try:
+            export_snapshots(path, get_metrics().history)
+            return {"success": True, "path": os.path.abspath(path)}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    # 分析 VR 线程（vr）或弹幕接收线程（ingest）；cprofile 输出 .pstats，sample 输出 collapsed stack
+    def start_profile(self, target: str = 'vr', mode: str = 'cprofile') -> dict:
+        if target not in ('vr', 'ingest'):
+            return {"success": False, "error": f"未知线程: {target}"}
+        if profiling.thread_ident(target) is None:
+            return {"success": False, "error": "线程未运行"}
+        if not profiling.start_profile(target, mode):
+            return {"success": False, "error": "已在分析中"}
+        self.log(f"开始分析 {target} ({mode})")
+        return {"success": True}
+    
+    def stop_profile(self, target: str = 'vr') -> dict:
+        paths = profiling.stop_profile(target)
+        if not paths:
+            return {"success": False, "error": "没有分析结果"}
+        for path in paths:
+            self.log(f"分析结果已保存: {path}", "success")
+        return {"success": True, "paths": paths}
+    
+    def set_watchdog(self, enabled: bool, budget_ms: float = 0) -> dict:
+        if enabled:
+            self.watchdog.enable(budget_ms or self.config.get('slow_frame_ms', 50))
+        else:
+            self.watchdog.disable()
+        return {"success": True, "budget_ms": self.watchdog.budget_ms}
+    
+    def dump_slow_frames(self) -> dict:
+        path = self.watchdog.dump()
+        if not path:
+            return {"success": False, "error": "没有慢帧记录"}
+        return {"success": True, "path": path, "count": len(self.watchdog.slow_frames)}
+    
+    # render() 各阶段与纹理上传的分段耗时，写入 render.*.section.* / overlay*.section.* 直方图
+    def set_section_timers(self, enabled: bool) -> bool:
+        self._section_timing = bool(enabled)
+        self._attach_section_timers()
+        return True
+    
+    def _attach_section_timers(self):
+        enabled = self._section_timing
+        for renderer in (self.renderer, self.sc_renderer):
+            if renderer:
+                renderer.sections = profiling.SectionTimer(f'render.{renderer.section}.section') if enabled else None
+        for overlay in (self.overlay, self.sc_overlay):
+            if overlay:
+                overlay.sections = profiling.SectionTimer(f'{overlay.metrics_prefix}.section') if enabled else None
+    
+    # 页面脚本加载完成后调用，此前的推送留在队列中
+    def bridge_ready(self) -> bool:
+        self.bridge.set_ready()
+        return True
+    
+    def get_job(self, job_id: int) -> Optional[dict]:
+        return self.jobs.get(job_id)
+    
+    def log(self, msg: str, level: str = 'info'):
+        self.bridge.emit('log', {'msg': msg, 'level': level})
+    
     def update_status(self, connected: bool, online: int = 0):
-        if self.window:
-            try:
-                self.window.evaluate_js(f'updateConnectionStatus({str(connected).lower()}, {online})')
-            except:
-                pass
+        self.bridge.set_state('connection', {'connected': connected, 'online': online})
     
     # 配置
     def get_config(self) -> dict:
@@ -86,22 +193,83 @@ class AppController:
                 self.config[k] = new_config.get(k, defaults.get(k, 0))
         else:
             self.config[key] = value
+            if key in ('split_overlays', 'render_process', 'overlay_backend') and self.overlay:
+                self.log("该设置将在下次初始化 VR 时生效", "warning")
+            if key == 'broadcast_enabled':
+                self._set_broadcast(bool(value))
+            elif key == 'broadcast_port' and self.broadcast:
+                self.log("端口将在重新启用本地推送后生效", "warning")
         
         self._apply_config()
     
+    # 只发布快照，拖动滑块时多次更新在下一帧合并为一次
     def _apply_config(self):
-        if self.overlay:
-            self.overlay.apply_config(self.config)
-        if self.renderer:
-            self.renderer.set_font_size(int(self.config.get('font_size', 14)))
-            self.renderer.set_show_config(self.config)
-            if 'bg_alpha' in self.config:
-                self.renderer.bg_alpha = self.config['bg_alpha']
-        if self.controller:
-            self.controller.set_toggle_hand(self.config.get('toggle_hand', 'left'))
-            if self.config.get('toggle_hand') == 'always_on' and self.overlay:
+        self._config_channel.publish(self.config)
+    
+    # VR 线程帧边界调用：对比上次应用的快照，只通知受影响的子系统
+    def _apply_pending_config(self):
+        pending = self._config_channel.take()
+        if not pending:
+            return
+        snapshot, _, subsystems = pending
+        config = dict(snapshot.values)
+        
+        if 'quality' in subsystems:
+            if self.governor.set_enabled(bool(config.get('adaptive_quality', True))):
+                self._quality_dirty = True
+            if self.governor.set_physical_width(config.get('scale', 0.4)):
+                self._quality_dirty = True
+        
+        overlays = [(self.overlay, config)]
+        if self.sc_overlay:
+            overlays.append((self.sc_overlay, self._panel_config(config)))
+        for overlay, overlay_config in overlays:
+            if overlay is None:
+                continue
+            if 'width' in subsystems:
+                overlay.apply_width(overlay_config)
+            if 'alpha' in subsystems:
+                overlay.apply_alpha(overlay_config)
+            if 'transform' in subsystems:
+                overlay.apply_transform(overlay_config)
+        
+        if self.render_worker and subsystems & {'font', 'background', 'filters'}:
+            self.render_worker.set_config(config)
+        for renderer in (self.renderer, self.sc_renderer):
+            if renderer is None:
+                continue
+            if 'font' in subsystems:
+                renderer.set_font_size(int(config.get('font_size', 14)))
+            if subsystems & {'background', 'filters'}:
+                renderer.set_show_config(config)
+        
+        if subsystems & {'pacing', 'font', 'filters'}:
+            self.pacer.configure(config, self._list_capacity())
+        if subsystems & {'font', 'filters'}:
+            self._configure_scrollback(config)
+        
+        if 'input' in subsystems and self.overlay:
+            self.overlay.set_toggle_hand(config.get('toggle_hand', 'left'))
+            self.overlay.set_scroll_input(config.get('scrollback_input', 'pointer'))
+            if config.get('toggle_hand') == 'always_on':
                 self.overlay.visible = True
     
+    # SC 面板位置为相对主叠加层的偏移
+    def _panel_config(self, base: Optional[dict] = None) -> dict:
+        config = dict(self.config if base is None else base)
+        config['x'] = config.get('x', 0) + config.get('sc_panel_x', 0.0)
+        config['y'] = config.get('y', 0) + config.get('sc_panel_y', 0.26)
+        config['z'] = config.get('z', 0) + config.get('sc_panel_z', 0.0)
+        return config
+    
+    def _toggle_overlays(self):
+        self.overlay.toggle()
+        if self.sc_overlay:
+            if self.overlay.visible:
+                self.sc_overlay.show()
+            else:
+                self.sc_overlay.hide()
+    
     def apply_preset(self, name: str) -> dict:
         if name in HUD_PRESETS:
             self.config.update(HUD_PRESETS[name])
@@ -124,41 +292,63 @@ class AppController:
     def init_vr(self) -> dict:
         self._vr_init_result = None
         self._running = True
-        threading.Thread(target=self._vr_thread, daemon=True).start()
+        self._vr_worker = threading.Thread(target=self._vr_thread, name='VR', daemon=True)
+        self._vr_worker.start()
         # 立即返回，不阻塞 UI 线程
         return {"success": True, "pending": True}
     
     def _notify_vr_status(self, success: bool, error: Optional[str]):
-        if self.window:
-            try:
-                if success:
-                    self.window.evaluate_js('onVRInitResult(true, null)')
-                else:
-                    safe_error = (error or '未知错误').replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
-                    self.window.evaluate_js(f'onVRInitResult(false, "{safe_error}")')
-            except:
-                pass
+        self.bridge.emit('vr_result', {'success': success, 'error': None if success else (error or '未知错误')})
+    
+    def _notify_vr_progress(self, stage: str, detail: str):
+        if stage == 'waiting_steamvr':
+            self.log(detail, "warning")
+        self.bridge.emit('vr_progress', {'stage': stage, 'detail': detail})
+    
+    # 加载字体并渲染一帧空白，首帧不再等待字体与字形缓存
+    def _warm_renderer(self):
+        from ui.renderer import DanmakuRenderer
+        DanmakuRenderer().render([], 0, 0, False, 0)
     
     def _vr_thread(self):
+        profiling.register_thread('vr')
         try:
-            from ui import DanmakuRenderer
-            self.renderer = DanmakuRenderer()
-            self.renderer.set_show_config(self.config)
+            if self.config.get('render_process'):
+                # 独立进程渲染，VR 线程只负责上传
+                from ui.render_worker import RenderWorker
+                self.render_worker = RenderWorker()
+                self.render_worker.set_config(self.config)
+                self.render_worker.start()
             
-            self.overlay = VROverlay()
-            if not self.overlay.init():
-                error = getattr(self.overlay, '_init_error', 'SteamVR 未运行')
+            # 后端由配置选择：openvr / null / file / shm
+            from vr import create_overlay_backend, VRInitializer
+            self.overlay = create_overlay_backend(self.config.get('overlay_backend', 'openvr'))
+            # SteamVR 检测、GL 上下文与字体预热并行进行
+            initializer = VRInitializer(self.overlay, self._notify_vr_progress)
+            if not self.render_worker:
+                initializer.add_task('renderer', self._warm_renderer)
+            self._vr_initializer = initializer
+            if not initializer.run():
+                error = initializer.error
                 self._vr_init_result = {"success": False, "error": f"初始化失败： {error}"}
                 self._notify_vr_status(False, error)
                 return
             
+            # 初始化时整体应用一次，之后只应用变化项
+            self._config_channel.reset(self.config)
             self.overlay.apply_config(self.config)
-            self.controller = VRControllerInput(self.overlay.vr_system)
-            self.controller.on_toggle(self.overlay.toggle)
-            self.controller.set_toggle_hand(self.config.get('toggle_hand', 'left'))
+            if self.render_worker:
+                self.render_worker.set_config(self.config)
+            else:
+                self._create_renderers()
+            self.pacer.configure(self.config, self._list_capacity())
+            self._configure_scrollback(self.config)
+            self.overlay.on_toggle(self._toggle_overlays)
+            self.overlay.set_toggle_hand(self.config.get('toggle_hand', 'left'))
+            self.overlay.set_scroll_input(self.config.get('scrollback_input', 'pointer'))
             
             # 检查手柄
-            if not self.controller.has_controller():
+            if not self.overlay.has_controller():
                 self.log("未检测到手柄, 默认使用 HUD 显示", "warning")
                 self.overlay.visible = True
             elif self.config.get('toggle_hand') == 'always_on':
@@ -168,52 +358,257 @@ class AppController:
             self._vr_init_result = {"success": True}
             self._notify_vr_status(True, None)
             
+            self.governor.set_enabled(bool(self.config.get('adaptive_quality', True)))
+            self.governor.set_physical_width(self.config.get('scale', 0.4))
+            self._quality_dirty = True
+            
             # VR 主循环
+            metrics = get_metrics()
+            loop_counter = metrics.counter('vr.loop')
+            skip_counter = metrics.counter('vr.skipped')
+            error_counter = metrics.counter('vr.errors')
+            metrics.gauge_fn('quality.width', lambda: self.governor.size[0])
+            metrics.gauge_fn('quality.frame_interval_ms', lambda: round(self.governor.frame_interval * 1000, 1))
+            profiler = profiling.thread_profiler('vr')
+            watchdog = self.watchdog
             last_messages = []
-            last_msg_len = 0
+            last_version = -1
             while self._running:
+                loop_counter.inc()
+                if watchdog.enabled:
+                    watchdog.begin()
                 try:
-                    if self.controller:
-                        self.controller.poll()
+                    if profiler.pending:
+                        profiler.checkpoint()
+                    self._apply_pending_config()
+                    if self.overlay:
+                        self.overlay.poll_input()
+                    client = self.danmaku_client
+                    if client:
+                        self._feed_scrollback(client)
                     
-                    if self.overlay and self.overlay.visible and self.renderer:
-                        if self.danmaku_client:
-                            # 只在消息数量变化时才拷贝列表
-                            current_len = len(self.danmaku_client.messages)
-                            if current_len != last_msg_len:
-                                last_messages = list(self.danmaku_client.messages)
-                                last_msg_len = current_len
-                            room_id = self.danmaku_client.room_id
-                            online = self.danmaku_client.online
-                            connected = self.danmaku_client.connected
-                            reconnect = self.danmaku_client.reconnect_count
+                    if self.overlay and self.overlay.visible and (self.renderer or self.render_worker):
+                        if client and self.pacer.enabled:
+                            last_messages, last_version = self._paced_messages(client)
+                        elif client:
+                            # 只在消息版本变化时才拷贝列表
+                            if client.version != last_version:
+                                last_messages = list(client.messages)
+                                last_version = client.version
+                        if client:
+                            state = (client.room_id, client.online, client.connected, client.reconnect_count,
+                                     client.stats.header())
                         else:
                             last_messages = []
-                            last_msg_len = 0
-                            room_id = 0
-                            online = 0
-                            connected = False
-                            reconnect = 0
+                            last_version = -1
+                            state = (0, 0, False, 0, None)
+                        
+                        if self._quality_dirty:
+                            self._apply_quality()
+                        
+                        chat_messages, chat_version, scrollbar = self._scrollback_view(last_messages, last_version)
+                        chat_state = state + (scrollbar,)
+                        if self.render_worker:
+                            self._present_worker_frame(chat_messages, chat_version, chat_state)
+                        elif self.renderer.should_render(self.renderer.content_key(chat_messages, chat_version, scrollbar)):
+                            t0 = time.perf_counter()
+                            self.renderer.render(chat_messages, *chat_state)
+                            t1 = time.perf_counter()
+                            self.overlay.update_texture(self.renderer.frame)
+                            if self.renderer.scroll_margin:
+                                # 新纹理先停在旧位置，随后由边界动画滚到底部
+                                self.overlay.set_texture_bounds(*self.renderer.texture_bounds())
+                                self._scroll_tick = time.perf_counter()
+                            if self.governor.record((t1 - t0) * 1000, self.overlay.last_upload_ms):
+                                self._quality_dirty = True
+                            self.renderer.active_frame_interval = self.governor.frame_interval
+                        else:
+                            skip_counter.inc()
+                        
+                        if self.sc_renderer:
+                            self._present_sc_panel(last_messages, state)
                         
-                        if self.renderer.should_render(last_msg_len):
-                            img = self.renderer.render(
-                                last_messages, room_id, online, connected, reconnect
-                            )
-                            self.overlay.update_texture(img)
+                        if self.renderer and self.renderer.scroll_pos > 0:
+                            self._animate_scroll()
+                            if watchdog.enabled:
+                                watchdog.end()
+                            # 滚动期间按合成器刷新率更新边界，不重绘也不上传
+                            time.sleep(1 / self.overlay.display_frequency)
+                            continue
                 except Exception as e:
-                    pass
-                time.sleep(0.05)
+                    error_counter.inc()
+                if watchdog.enabled:
+                    watchdog.end()
+                time.sleep(min(0.05, self.governor.frame_interval))
+            profiler.finish()
                 
         except Exception as e:
             import traceback
             self._vr_init_result = {"success": False, "error": str(e)}
             self._notify_vr_status(False, str(e))
+        finally:
+            self._release_overlays()
+            profiling.unregister_thread('vr')
+    
+    # 叠加层的纹理与 GL 上下文属于 VR 线程，只在这里释放，此时已不再上传
+    def _release_overlays(self):
+        overlays = (self.sc_overlay, self.overlay)
+        self.sc_overlay = None
+        self.overlay = None
+        for overlay in overlays:
+            if overlay:
+                try:
+                    overlay.shutdown()
+                except Exception:
+                    pass
     
-    # 弹幕
+    # 显示节奏控制：新消息先进入 pacer，渲染端只看到已放出的部分
+    def _paced_messages(self, client) -> tuple:
+        pacer = self.pacer
+        if client is not self._paced_client:
+            self._paced_client = client
+            pacer.reset()
+        now = time.time()
+        pacer.feed(client.messages, client.version, now)
+        pacer.advance(now)
+        # 与客户端版本号区分，开关节奏控制时不会误判为未变化
+        return pacer.messages(), ('paced', pacer.version)
+    
+    def _feed_scrollback(self, client) -> None:
+        if client is not self._scrollback_client:
+            self._scrollback_client = client
+            self.scrollback.reset()
+        self.scrollback.feed(client.messages, client.version)
+    
+    # 回看：按滚动输入移动窗口，回看期间弹幕列表只显示窗口内的消息和仍在置顶的 SC；
+    # 返回 (消息列表, 版本, 滚动条信息)，跟随最新消息时原样返回、滚动条为 None
+    def _scrollback_view(self, messages: list, version) -> tuple:
+        view = self.scrollback
+        now = time.perf_counter()
+        dt = min(0.1, now - self._scroll_input_tick)
+        self._scroll_input_tick = now
+        lines, home = self.overlay.take_scroll(dt)
+        capacity = self._list_capacity()
+        if home:
+            view.follow()
+        elif lines:
+            view.scroll(lines, capacity)
+        if not view.active:
+            return messages, version, None
+        rows, key, scrollbar = view.window(capacity)
+        pinned = [m for m in messages if m.get('type') == 'sc']
+        return pinned + rows, ('scroll', key, version), scrollbar
+    
+    # 独立进程渲染时无法在本进程测量，按估算行数滚动
+    def _configure_scrollback(self, config: dict) -> None:
+        self.scrollback.configure(config, self.renderer.measure_lines if self.renderer else None)
+    
+    def _list_capacity(self) -> int:
+        if self.renderer:
+            return self.renderer.list_capacity()
+        # 独立进程渲染时按默认布局估算
+        fs = int(self.config.get('font_size', 14))
+        return max(1, (BASE_HEIGHT - 4 * fs) // (fs + max(6, fs // 2)))
+    
+    # 在 VR 线程中应用分辨率，避免与渲染并发修改缓冲区
+    def _apply_quality(self):
+        self._quality_dirty = False
+        if self.render_worker:
+            self.render_worker.set_render_scale(self.governor.render_scale)
+            self.render_worker.set_frame_interval(self.governor.frame_interval)
+            return
+        self.renderer.set_render_scale(self.governor.render_scale)
+        self.overlay.resize(self.renderer.width, self.renderer.height)
+        # 分辨率变化后折行可能不同，回看行数重新测量
+        self.scrollback.invalidate()
+        self.renderer.active_frame_interval = self.governor.frame_interval
+        if self.renderer.scroll_margin:
+            self.overlay.set_texture_bounds(*self.renderer.texture_bounds())
+        if self.sc_renderer:
+            self.sc_renderer.set_render_scale(self.governor.render_scale)
+            self.sc_overlay.resize(self.sc_renderer.width, self.sc_renderer.height)
+            # 尺寸变化后强制重绘
+            self.sc_renderer.last_version = None
+    
+    def _create_renderers(self):
+        from ui.renderer import (DanmakuRenderer, SC_PANEL_HEIGHT, PANEL_HEADER_HEIGHT,
+                                 SCROLL_MARGIN)
+        self.renderer = None
+        if self.config.get('split_overlays'):
+            smooth = bool(self.config.get('smooth_scroll', True))
+            # SC 面板单独渲染和上传，弹幕刷新不会重传 SC，反之亦然
+            # 平滑滚动时头部移入置顶面板，弹幕列表渲染到更高的纹理中，由纹理边界滚动
+            panel_height = SC_PANEL_HEIGHT + (PANEL_HEADER_HEIGHT if smooth else 0)
+            sc_renderer = DanmakuRenderer(BASE_WIDTH, panel_height, section='sc')
+            self.sc_overlay = self.overlay.create_panel('sc', sc_renderer.width, sc_renderer.height)
+            if self.sc_overlay:
+                self.sc_overlay.metrics_prefix = 'overlay.sc'
+                self.sc_overlay.apply_config(self._panel_config())
+                sc_renderer.show_header = smooth
+                self.sc_renderer = sc_renderer
+                
+                margin = SCROLL_MARGIN if smooth else 0
+                self.renderer = DanmakuRenderer(BASE_WIDTH, BASE_HEIGHT + margin, section='chat')
+                self.renderer.show_header = not smooth
+                self.renderer.scroll_margin = margin
+            else:
+                self.log("SC 面板创建失败，合并显示", "warning")
+        
+        if not self.renderer:
+            self.renderer = DanmakuRenderer()
+        for renderer in (self.renderer, self.sc_renderer):
+            if renderer:
+                renderer.set_font_size(int(self.config.get('font_size', 14)))
+                renderer.set_show_config(self.config)
+        if self._section_timing:
+            self._attach_section_timers()
+    
+    def _animate_scroll(self):
+        now = time.perf_counter()
+        self.renderer.advance_scroll(now - self._scroll_tick)
+        self._scroll_tick = now
+        self.overlay.set_texture_bounds(*self.renderer.texture_bounds())
+    
+    def _present_sc_panel(self, messages: list, state: tuple):
+        renderer = self.sc_renderer
+        if not renderer.should_render(renderer.content_key(messages, -1, state)):
+            return
+        renderer.render(messages, *state)
+        self.sc_overlay.update_texture(renderer.frame)
+    
+    def _present_worker_frame(self, messages: list, version: int, state: tuple):
+        worker = self.render_worker
+        if not worker.supervise():
+            return
+        worker.sync_messages(messages, version)
+        worker.set_state(*state)
+        
+        frame = worker.poll_frame()
+        if frame is None:
+            return
+        data, width, height = frame
+        if (width, height) != (self.overlay.width, self.overlay.height):
+            self.overlay.resize(width, height)
+        
+        self.overlay.update_texture(data)
+        if self.governor.record(worker.last_render_ms, self.overlay.last_upload_ms):
+            self._quality_dirty = True
+        worker.set_frame_interval(self.governor.frame_interval)
+    
+    # 弹幕：立即返回任务编号，结果通过 job 事件推送
     def connect(self, room_id: int) -> dict:
+        job_id = self.jobs.submit('connect', lambda progress: self._connect_job(room_id, progress))
+        return {"success": True, "job": job_id}
+    
+    def _connect_job(self, room_id: int, progress: Callable[[str], None],
+                     timeout: float = 3.0) -> dict:
         try:
+            progress('加载登录凭证')
+            from bilibili import load_credential, BiliDanmakuClient
             credential = load_credential()
             self.danmaku_client = BiliDanmakuClient(room_id, credential)
+            if self.config.get('broadcast_enabled'):
+                self._set_broadcast(True)
             
             # 保存房间号
             self.config['last_room_id'] = room_id
@@ -224,21 +619,81 @@ class AppController:
             
             self.log("[Tips] 弹幕中的 [舰长] 标识表示该用户在任意直播间开通了舰长及以上权益，不一定是本直播间的舰长", "info")
             
+            client = self.danmaku_client
+            
             def run():
-                asyncio.run(self._connect_loop())
+                profiling.register_thread('ingest')
+                try:
+                    asyncio.run(self._connect_loop())
+                finally:
+                    profiling.unregister_thread('ingest')
             
             threading.Thread(target=run, daemon=True).start()
-            time.sleep(1)
             
-            return {"success": True}
+            # 等待连接建立，超时也视为成功，客户端会自行重连
+            progress('连接直播间')
+            deadline = time.monotonic() + timeout
+            while not client.connected and time.monotonic() < deadline:
+                time.sleep(0.05)
+            if client.connected:
+                self.update_status(True, client.online)
+            
+            return {"success": True, "connected": client.connected}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     async def _connect_loop(self):
+        client = self.danmaku_client
+        watcher = asyncio.ensure_future(self._watch_status(client))
         try:
-            await self.danmaku_client.connect()
+            await client.connect()
         except Exception as e:
             self.log(f"连接异常: {e}", "error")
+        finally:
+            watcher.cancel()
+            profiling.thread_profiler('ingest').finish()
+    
+    # 连接状态与在线人数变化时推送；同时作为接收线程的分析检查点
+    async def _watch_status(self, client):
+        profiler = profiling.thread_profiler('ingest')
+        last = None
+        while True:
+            if profiler.pending:
+                try:
+                    profiler.checkpoint()
+                except Exception:
+                    pass
+            state = (client.connected, client.online)
+            if state != last:
+                last = state
+                self.update_status(*state)
+            await asyncio.sleep(0.5)
+    
+    # 本地推送：服务独立于直播间连接，切换房间时继续运行
+    def _set_broadcast(self, enabled: bool) -> None:
+        client = self.danmaku_client
+        if enabled:
+            if self.broadcast is None:
+                from bilibili.broadcast import BroadcastServer
+                server = BroadcastServer(port=int(self.config.get('broadcast_port', 18765)))
+                if not server.start():
+                    self.log(f"本地推送启动失败: {server.error}", "error")
+                    return
+                self.broadcast = server
+                self.log(f"本地推送已启动: ws://127.0.0.1:{server.port}/ws , http://127.0.0.1:{server.port}/events", "success")
+            if client and self.broadcast.publish not in client.listeners:
+                client.listeners.append(self.broadcast.publish)
+        elif self.broadcast:
+            if client and self.broadcast.publish in client.listeners:
+                client.listeners.remove(self.broadcast.publish)
+            self.broadcast.stop()
+            self.broadcast = None
+            self.log("本地推送已停止")
+    
+    def get_broadcast_status(self) -> dict:
+        if not self.broadcast:
+            return {"running": False}
+        return self.broadcast.status()
     
     def disconnect(self) -> dict:
         if self.danmaku_client:
@@ -256,14 +711,14 @@ class AppController:
     
     # 登录凭证
     def check_credential(self) -> dict:
-        cred = load_credential()
-        return {"has_credential": cred is not None}
+        from bilibili import has_credential
+        return {"has_credential": has_credential()}
     
     def logout(self) -> bool:
-        from config import CREDENTIAL_FILE
+        from config import CREDENTIAL_FILE, remove_json
         try:
-            if os.path.exists(CREDENTIAL_FILE):
-                os.remove(CREDENTIAL_FILE)
+            # 同时删除备份，避免读取时回退到旧凭证
+            remove_json(CREDENTIAL_FILE)
             return True
         except:
             return False
@@ -273,16 +728,20 @@ class AppController:
         self._qr_path = None
         self._qr_opened = False
         
+        # 状态变化直接推送，页面不再轮询
         def on_status(status, qr_path):
             self._qr_status = status
             if qr_path:
                 self._qr_path = qr_path
+            self.bridge.set_state('qr', self.get_qr_status())
         
         def run_login():
             try:
+                from bilibili import qr_login_async
                 asyncio.run(qr_login_async(on_status))
             except Exception as e:
                 self._qr_status = f'error: {e}'
+                self.bridge.set_state('qr', self.get_qr_status())
         
         threading.Thread(target=run_login, daemon=True).start()
         return {"status": "started"}
@@ -311,10 +770,26 @@ class AppController:
     
     def shutdown(self):
         self._running = False
+        self._stopping.set()
+        self.watchdog.disable()
+        self.bridge.stop()
+        if self._vr_initializer:
+            self._vr_initializer.cancel.set()
+        overlay = self.overlay
+        if overlay:
+            overlay.interrupt()
         if self.danmaku_client:
             self.danmaku_client.stop()
-        if self.overlay:
-            self.overlay.shutdown()
+        if self.broadcast:
+            self.broadcast.stop()
+        if self.render_worker:
+            self.render_worker.stop()
+        # 叠加层由 VR 线程在退出前释放，这里只等待
+        worker = self._vr_worker
+        if worker and worker.is_alive():
+            worker.join(VR_JOIN_TIMEOUT)
+        # 写出尚未落盘的配置
+        flush_storage()
 
 
 class HUDControlPanel:
@@ -331,6 +806,15 @@ class HUDControlPanel:
     def run(self) -> None:
         def on_closed():
             self.api.shutdown()
+
+        def on_preloaded(timings):
+            elapsed = startup.marks().get(startup.READY_MARK, 0.0)
+            self.api.log(f"依赖加载完成 ({elapsed * 1000:.0f}ms)")
+
+        # 窗口可见后再导入 bilibili_api / openvr 等重依赖
+        def on_shown():
+            startup.mark('window_visible')
+            startup.preload(on_done=on_preloaded)
         
         self.window = webview.create_window(
             'VRDanmaku',
@@ -344,6 +828,8 @@ class HUDControlPanel:
         )
         self.api.set_window(self.window)
         self.window.events.closed += on_closed
+        self.window.events.shown += on_shown
+        startup.mark('window_created')
 
         try:
             webview.start(gui='edgechromium', debug=False, private_mode=False)
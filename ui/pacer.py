@@ -0,0 +1,275 @@
+from collections import deque
+from typing import Deque, Dict, List
+
+from utils.metrics import get_metrics
+
+
+# 每行至少停留的时间（秒），之后才允许被新消息挤出可见区域
+MIN_DWELL = 1.5
+# 到达时间相差小于此值的消息视为同一批
+BATCH_GAP = 0.05
+# 服务端推送批次间隔的估计范围（秒），突发消息在一个间隔内均匀放出
+MIN_BATCH_INTERVAL = 0.1
+MAX_BATCH_INTERVAL = 1.0
+# 相邻两条的最小放出间隔（秒）
+MIN_SPACING = 0.01
+# 排队消息超过此数量时开始合并或丢弃低优先级消息
+BACKLOG_LIMIT = 40
+# 超过此时长（秒）才取到的消息（叠加层隐藏期间到达的）直接作为历史显示，不再排队
+STALE_AFTER = 10.0
+# 交给渲染端的已放出消息数，与 BiliDanmakuClient.messages 一致
+DISPLAY_SIZE = 50
+# 排队类型，按优先级从高到低；其余类型（SC、警告）不排队直接放出
+PRIORITY = ('guard', 'vip_enter', 'gift', 'danmaku', 'follow', 'enter')
+# 各类型在最近放出的一屏消息中的配额（比例）；配额满时该类型要等一屏中最旧的一行停留够久才继续放出
+TYPE_QUOTAS: Dict[str, float] = {'gift': 0.5, 'vip_enter': 0.3, 'follow': 0.2, 'enter': 0.2}
+# 积压时合并为 "某某 等 N 人" 的类型，其余低优先级类型直接丢弃最旧的
+COLLAPSIBLE = ('enter', 'follow')
+# 不会因积压被丢弃的类型
+KEEP = ('guard', 'vip_enter')
+
+_SHOW_KEYS = {
+    'danmaku': 'show_danmaku', 'gift': 'show_gift', 'enter': 'show_enter',
+    'follow': 'show_follow', 'vip_enter': 'show_guard', 'guard': 'show_guard',
+}
+
+
+# 消息仓库与渲染器之间的显示节奏控制，在 VR 线程中使用：
+# feed() 取走新消息放入按类型的队列，advance() 按批次间隔、停留时间和类型配额放出，
+# 渲染端只看到 messages() 返回的已放出列表。每帧只检查各队列队首，与积压数量无关。
+# 放出时拷贝一份消息再写入放出时刻和合并人数，客户端的消息（回看、本地推送共用）不被改动
+class DisplayPacer:
+
+    def __init__(self, capacity: int = 10, min_dwell: float = MIN_DWELL):
+        self.enabled = True
+        self.min_dwell = min_dwell
+        self._queues: Dict[str, Deque[tuple]] = {t: deque() for t in PRIORITY}
+        self._backlog = 0
+        # (客户端消息, 放出的拷贝)，原消息 rev 变化（礼物连击）时刷新拷贝
+        self._display: Deque[tuple] = deque(maxlen=DISPLAY_SIZE)
+        self._list: List[dict] = []
+        self._list_version = -1
+        # 最近放出的一屏消息：(放出时间, 类型)，以及其中各类型的数量；
+        # 按条数计算，多行弹幕会比估计的更早滚出
+        self._recent: Deque[tuple] = deque()
+        self._type_counts: Dict[str, int] = dict.fromkeys(PRIORITY, 0)
+        self.capacity = 1
+        self._quotas: Dict[str, int] = {}
+        self.set_capacity(capacity)
+        self._hidden: frozenset = frozenset()
+        # 积压时被合并的进入/关注数，附加到该类型下一条放出的消息上
+        self._collapsed: Dict[str, int] = dict.fromkeys(COLLAPSIBLE, 0)
+        self._seq = 0
+        self._last_id = 0
+        self._source_version = -1
+        # 批次估计
+        self._batch_arrival = 0.0
+        self._batch_ts = 0.0
+        self._batch_deadline = 0.0
+        self.batch_interval = 0.5
+        self._next_release = 0.0
+        # 显示版本：只在放出新消息或已放出消息被更新（礼物连击）时递增
+        self.version = 0
+        metrics = get_metrics()
+        self._released = metrics.counter('pacer.released')
+        self._dropped = metrics.counter('pacer.dropped')
+        self._merged = metrics.counter('pacer.collapsed')
+        self._wait_hist = metrics.histogram('pacer.wait_ms')
+        metrics.gauge_fn('pacer.backlog', lambda: self._backlog)
+
+    def set_capacity(self, capacity: int) -> None:
+        self.capacity = max(1, int(capacity))
+        self._quotas = {t: max(1, int(self.capacity * share)) for t, share in TYPE_QUOTAS.items()}
+        while len(self._recent) > self.capacity:
+            self._forget()
+
+    def configure(self, config: dict, capacity: int) -> None:
+        self.set_enabled(bool(config.get('display_pacing', True)))
+        self.min_dwell = max(0.0, float(config.get('min_dwell', MIN_DWELL)))
+        self._hidden = frozenset(t for t, key in _SHOW_KEYS.items() if not config.get(key, True))
+        self.set_capacity(capacity)
+
+    def set_enabled(self, enabled: bool) -> None:
+        if enabled != self.enabled:
+            self.enabled = enabled
+            self.reset()
+
+    # 切换直播间或客户端重建时清空
+    def reset(self) -> None:
+        for queue in self._queues.values():
+            queue.clear()
+        self._backlog = 0
+        self._display.clear()
+        self._recent.clear()
+        self._type_counts = dict.fromkeys(PRIORITY, 0)
+        self._collapsed = dict.fromkeys(COLLAPSIBLE, 0)
+        self._last_id = 0
+        self._source_version = -1
+        self.version += 1
+
+    @property
+    def backlog(self) -> int:
+        return self._backlog
+
+    # 从客户端的消息队列取走新消息，只在版本变化时执行，从右端按下标遍历新增部分，不拷贝队列
+    def feed(self, messages, version: int, now: float) -> None:
+        if version == self._source_version:
+            return
+        self._source_version = version
+        self._refresh_updated()
+        fresh = []
+        for i in range(1, len(messages) + 1):
+            try:
+                msg = messages[-i]
+            except IndexError:
+                break
+            mid = msg.get('id', 0)
+            if mid <= self._last_id:
+                break
+            # 遍历期间接收线程追加了消息，下标整体右移一位，跳过重复的一条
+            if fresh and mid >= fresh[-1].get('id', 0):
+                continue
+            fresh.append(msg)
+        if not fresh:
+            return
+        self._last_id = fresh[0].get('id', 0)
+        for msg in reversed(fresh):
+            self._enqueue(msg, now)
+
+    # 已放出的消息被连击合并更新时刷新拷贝
+    def _refresh_updated(self) -> None:
+        display = self._display
+        for i in range(len(display)):
+            msg, shown = display[i]
+            if msg.get('rev', 0) != shown.get('rev', 0):
+                copy = dict(msg)
+                for key in ('shown', 'collapsed'):
+                    if key in shown:
+                        copy[key] = shown[key]
+                display[i] = (msg, copy)
+                self.version += 1
+
+    def _enqueue(self, msg: dict, now: float) -> None:
+        msg_type = msg.get('type', '')
+        queue = self._queues.get(msg_type)
+        arrival = msg.get('time', now)
+        if now - arrival > STALE_AFTER:
+            self._display.append((msg, msg))
+            self.version += 1
+            return
+        if queue is None or msg_type in self._hidden:
+            self._show(msg, now)
+            return
+        ts = msg.get('ts')
+        if arrival - self._batch_arrival > BATCH_GAP:
+            # 新的一批：用批次间隔估计放出窗口
+            if self._batch_arrival:
+                gap = arrival - self._batch_arrival
+                self.batch_interval += (min(max(gap, MIN_BATCH_INTERVAL), MAX_BATCH_INTERVAL)
+                                        - self.batch_interval) * 0.2
+            self._batch_arrival = arrival
+            self._batch_ts = ts or 0.0
+            self._batch_deadline = now + self.batch_interval
+        # 服务端时间戳在批内的相对位置决定最早放出时间
+        offset = 0.0
+        if ts and self._batch_ts:
+            offset = min(max(ts - self._batch_ts, 0.0), self.batch_interval)
+        self._seq += 1
+        queue.append((self._seq, now + offset, now, msg))
+        self._backlog += 1
+        if self._backlog > BACKLOG_LIMIT:
+            self._shed()
+
+    # 积压过多：从最低优先级开始，进入/关注合并计数，其余丢弃最旧的
+    def _shed(self) -> None:
+        for msg_type in reversed(PRIORITY):
+            queue = self._queues[msg_type]
+            if not queue or msg_type in KEEP:
+                continue
+            queue.popleft()
+            self._backlog -= 1
+            if msg_type in self._collapsed:
+                self._collapsed[msg_type] += 1
+                self._merged.inc()
+            else:
+                self._dropped.inc()
+            return
+
+    # 按优先级和到达顺序放出消息，返回显示内容是否变化
+    def advance(self, now: float) -> bool:
+        changed = False
+        while self._backlog and now >= self._next_release:
+            # 一屏中最旧的一行停留够久才允许挤出
+            if len(self._recent) >= self.capacity:
+                if now - self._recent[0][0] < self.min_dwell:
+                    break
+            pick = None
+            blocked = False
+            for msg_type in PRIORITY:
+                queue = self._queues[msg_type]
+                if not queue:
+                    continue
+                quota = self._quotas.get(msg_type)
+                if quota is not None and self._type_counts[msg_type] >= quota:
+                    blocked = True
+                    continue
+                head = queue[0]
+                if head[1] > now:
+                    continue
+                if pick is None or head[0] < pick[0]:
+                    pick = head
+            if pick is None:
+                # 只剩配额已满的类型，等最旧的一行停留够久后让出配额
+                if not blocked or not self._release_expired(now):
+                    break
+                continue
+            msg = pick[3]
+            msg_type = msg.get('type', '')
+            self._queues[msg_type].popleft()
+            self._backlog -= 1
+            collapsed = self._collapsed.get(msg_type, 0)
+            if collapsed:
+                self._collapsed[msg_type] = 0
+            self._wait_hist.observe((now - pick[2]) * 1000)
+            self._show(msg, now, collapsed)
+            self._recent.append((now, msg_type))
+            self._type_counts[msg_type] += 1
+            if len(self._recent) > self.capacity:
+                self._forget()
+            # 剩余积压在本批截止前均匀放出，到了截止时间仍有积压时再顺延一个间隔
+            if self._backlog:
+                spacing = (self._batch_deadline - now) / (self._backlog + 1)
+                if spacing < MIN_SPACING:
+                    self._batch_deadline = now + self.batch_interval
+                    spacing = self.batch_interval / (self._backlog + 1)
+                self._next_release = now + spacing
+            changed = True
+        return changed
+
+    # 配额按一屏计算：最旧的一行已停留够久时视为已滚出
+    def _release_expired(self, now: float) -> bool:
+        if self._recent and now - self._recent[0][0] >= self.min_dwell:
+            self._forget()
+            return True
+        return False
+
+    def _forget(self) -> None:
+        _, msg_type = self._recent.popleft()
+        self._type_counts[msg_type] -= 1
+
+    def _show(self, msg: dict, now: float, collapsed: int = 0) -> None:
+        # 渲染端的滑入和高亮从放出时刻开始计算
+        shown = dict(msg)
+        shown['shown'] = now
+        if collapsed:
+            shown['collapsed'] = collapsed
+        self._display.append((msg, shown))
+        self._released.inc()
+        self.version += 1
+
+    # 已放出的消息，版本不变时返回同一个列表
+    def messages(self) -> List[dict]:
+        if self._list_version != self.version:
+            self._list_version = self.version
+            self._list = [shown for _, shown in self._display]
+        return self._list
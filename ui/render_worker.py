@@ -0,0 +1,272 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from utils import log
+from vr.quality import BASE_HEIGHT, BASE_WIDTH
+
+
+# 共享内存按最大帧尺寸分配，分辨率切换时无需重建
+MAX_FRAME_WIDTH = 1280
+MAX_FRAME_HEIGHT = MAX_FRAME_WIDTH * BASE_HEIGHT // BASE_WIDTH
+BUFFER_COUNT = 2
+
+# 同步到子进程的配置项
+_CONFIG_KEYS = ('font_size', 'bg_alpha', 'show_danmaku', 'show_gift', 'show_enter',
+                'show_follow', 'show_guard', 'show_sc', 'show_images')
+
+
+def _apply_worker_config(renderer, config: dict) -> None:
+    if 'font_size' in config:
+        renderer.set_font_size(int(config['font_size']))
+    renderer.set_show_config(config)
+
+
+# 子进程入口：只负责光栅化，结果写入共享内存
+def _worker_main(conn, shm_names: List[str]) -> None:
+    from ui.renderer import DanmakuRenderer
+
+    shms = [shared_memory.SharedMemory(name=name) for name in shm_names]
+    renderer = DanmakuRenderer()
+    messages: 'OrderedDict[int, dict]' = OrderedDict()
+    state = (0, 0, False, 0)
+    version = 0
+    free = list(range(len(shms)))
+
+    try:
+        while True:
+            timeout = min(renderer.active_frame_interval, renderer.idle_frame_interval) / 2
+            if conn.poll(timeout if free else None):
+                while True:
+                    cmd = conn.recv()
+                    kind = cmd[0]
+                    if kind == 'delta':
+                        _, _, upserts, order = cmd
+                        version += 1
+                        for msg in upserts:
+                            messages[msg['id']] = msg
+                        # 显示节奏控制可能不按 id 顺序放出，按父进程的列表顺序重建
+                        messages = OrderedDict((mid, messages[mid]) for mid in order if mid in messages)
+                    elif kind == 'state':
+                        state = cmd[1]
+                        version += 1
+                    elif kind == 'config':
+                        _apply_worker_config(renderer, cmd[1])
+                        version += 1
+                    elif kind == 'scale':
+                        renderer.set_render_scale(cmd[1])
+                        version += 1
+                    elif kind == 'interval':
+                        renderer.active_frame_interval = cmd[1]
+                    elif kind == 'release':
+                        if cmd[1] not in free:
+                            free.append(cmd[1])
+                    elif kind == 'stop':
+                        return
+                    if not conn.poll():
+                        break
+
+            if not free or not renderer.should_render(version):
+                continue
+
+            t0 = time.perf_counter()
+            idx = free.pop(0)
+            # 直接绘制到共享内存中，无需额外拷贝
+            renderer.render(list(messages.values()), *state, target=shms[idx].buf)
+            render_ms = (time.perf_counter() - t0) * 1000
+            conn.send(('frame', idx, renderer.width, renderer.height, render_ms))
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        # 先释放映射到共享内存的图像，否则无法关闭
+        renderer.release_targets()
+        for shm in shms:
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+
+class RenderWorker:
+
+    def __init__(self):
+        self._ctx = multiprocessing.get_context('spawn')
+        self._process = None
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._shms: List[shared_memory.SharedMemory] = []
+
+        # 已同步的消息 id -> rev，用于计算增量
+        self._sent: Dict[int, int] = {}
+        self._last_version = -1
+        self._state: Optional[tuple] = None
+        self._config: dict = {}
+        self._scale = 1.0
+        self._interval = 0.05
+
+        # 正在被 VR 线程上传的缓冲区
+        self._held: Optional[int] = None
+        self.restarts = 0
+        self._next_restart = 0.0
+        self.last_render_ms = 0.0
+
+    def start(self) -> None:
+        capacity = MAX_FRAME_WIDTH * MAX_FRAME_HEIGHT * 4
+        self._shms = [shared_memory.SharedMemory(create=True, size=capacity)
+                      for _ in range(BUFFER_COUNT)]
+        self._spawn()
+
+    def _spawn(self) -> None:
+        parent, child = self._ctx.Pipe()
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(child, [shm.name for shm in self._shms]),
+            name='VRDanmakuRender',
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        self._conn = parent
+        self._held = None
+
+        # 新进程需要完整状态
+        self._sent.clear()
+        self._last_version = -1
+        if self._config:
+            self._send(('config', self._config))
+        if self._scale != 1.0:
+            self._send(('scale', self._scale))
+        if self._interval != 0.05:
+            self._send(('interval', self._interval))
+        if self._state is not None:
+            self._send(('state', self._state))
+
+    def _send(self, cmd: tuple) -> None:
+        if self._conn is None:
+            return
+        try:
+            with self._send_lock:
+                self._conn.send(cmd)
+        except (OSError, EOFError, BrokenPipeError):
+            pass
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    # 崩溃后按退避重启
+    def supervise(self) -> bool:
+        if self.is_alive():
+            return True
+        now = time.monotonic()
+        if now < self._next_restart:
+            return False
+        self.restarts += 1
+        delay = min(10.0, 0.5 * (2 ** (self.restarts - 1)))
+        self._next_restart = now + delay
+        log(f"渲染进程已退出，正在重启 (第{self.restarts}次)", 'warning')
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._spawn()
+        return False
+
+    def sync_messages(self, messages: List[dict], version: int) -> None:
+        if version == self._last_version:
+            return
+        self._last_version = version
+
+        upserts = []
+        sent = {}
+        order = []
+        for msg in messages:
+            mid = msg.get('id')
+            if mid is None:
+                continue
+            rev = msg.get('rev', 0)
+            sent[mid] = rev
+            order.append(mid)
+            if self._sent.get(mid) != rev:
+                upserts.append(msg)
+        self._sent = sent
+
+        self._send(('delta', version, upserts, order))
+
+    def set_state(self, room_id: int, online: int, connected: bool, reconnect: int,
+                  header_stats: Optional[tuple] = None, scroll: Optional[tuple] = None) -> None:
+        state = (room_id, online, connected, reconnect, header_stats, scroll)
+        if state != self._state:
+            self._state = state
+            self._send(('state', state))
+
+    def set_config(self, config: dict) -> None:
+        subset = {k: config[k] for k in _CONFIG_KEYS if k in config}
+        if subset != self._config:
+            self._config = subset
+            self._send(('config', subset))
+
+    def set_render_scale(self, scale: float) -> None:
+        if scale != self._scale:
+            self._scale = scale
+            self._send(('scale', scale))
+
+    def set_frame_interval(self, interval: float) -> None:
+        if interval != self._interval:
+            self._interval = interval
+            self._send(('interval', interval))
+
+    # 取最新一帧，返回 (像素缓冲区, 宽, 高)；旧帧立即归还给子进程
+    def poll_frame(self) -> Optional[Tuple[memoryview, int, int]]:
+        if self._conn is None:
+            return None
+        latest = None
+        try:
+            while self._conn.poll():
+                msg = self._conn.recv()
+                if msg[0] != 'frame':
+                    continue
+                if latest is not None:
+                    self._send(('release', latest[1]))
+                latest = msg
+        except (OSError, EOFError):
+            return None
+        if latest is None:
+            return None
+
+        _, idx, width, height, render_ms = latest
+        if self._held is not None:
+            self._send(('release', self._held))
+        self._held = idx
+        self.last_render_ms = render_ms
+        return self._shms[idx].buf[:width * height * 4], width, height
+
+    def stop(self) -> None:
+        self._send(('stop',))
+        if self._process is not None:
+            self._process.join(timeout=1)
+            if self._process.is_alive():
+                self._process.terminate()
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        for shm in self._shms:
+            try:
+                shm.close()
+                shm.unlink()
+            except Exception:
+                pass
+        self._shms = []
+        self._process = None
+        self._conn = None
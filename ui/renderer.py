@@ -1,10 +1,12 @@
 import datetime
+import math
 import os
 import sys
 import time
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Dict, Optional, Tuple
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 
 
 _project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -12,6 +14,8 @@ if _project_root not in sys.path:
     sys.path.insert(0, _project_root)
 
 from utils.text import wrap_text, format_time
+from utils.fonts import get_font_manager
+from utils.metrics import get_metrics
 
 
 COLORS = {
@@ -74,13 +78,49 @@ COLORS = {
 }
 
 
+# 渲染区域：full 为完整画面，分离叠加层时 chat 为头部与弹幕列表，sc 为置顶的 SC / 上舰面板
+SECTIONS = ('full', 'chat', 'sc')
+# 置顶面板逻辑高度
+SC_PANEL_HEIGHT = 160
+# 头部移入置顶面板时增加的高度
+PANEL_HEADER_HEIGHT = 64
+# 平滑滚动时纹理额外的高度，滚动动画在这段范围内移动可见区域
+SCROLL_MARGIN = 120
+# 滚动衰减速度（每秒），与原先每帧 0.3 的插值接近
+SCROLL_SPEED = 7.0
+# 缓存的弹幕前缀（舰长图标、粉丝牌、用户名）度量数量
+PREFIX_CACHE_SIZE = 2048
+# 置顶面板头部的直播数据最多每隔此秒数刷新一次，弹幕速率不会让面板随每条弹幕重绘
+STATS_REFRESH = 2.0
+# 新消息高亮时长（秒）；平滑滚动时淡出按此间隔分档重绘
+HIGHLIGHT_DURATION = 3.0
+FADE_STEP = 10.0
+FADE_DURATION = 60.0
+GUARD_ICONS = {1: '[总督]', 2: '[提督]', 3: '[舰长]'}
+
+
 class DanmakuRenderer:
     
-    def __init__(self, width: int = 450, height: int = 400):
+    def __init__(self, width: int = 450, height: int = 400,
+                 clock: Optional[Callable[[], float]] = None, section: str = 'full'):
+        # 可注入时钟，便于无头基准测试得到确定结果
+        self.clock = clock or time.time
+        self.section = section
+        self.show_header = section != 'sc'
+        self._render_hist = None
+        # 分段计时，由控制面板按需开启，None 时没有任何开销
+        self.sections = None
+        # 逻辑尺寸固定，像素尺寸 = 逻辑尺寸 * render_scale
+        self.base_width = width
+        self.base_height = height
+        self.render_scale = 1.0
         self.width = width
         self.height = height
         self.font_size = 14
         self.bg_alpha = 0.85
+        self.fonts = get_font_manager()
+        # uref（或用户名 + 牌子）-> 前缀度量，字体变化时清空
+        self._prefixes: OrderedDict = OrderedDict()
         self._load_fonts(self.font_size)
         self._update_layout()
         
@@ -92,12 +132,23 @@ class DanmakuRenderer:
             'show_follow': True,
             'show_guard': True,
             'show_sc': True,
+            # 表情、礼物图标、头像
+            'show_images': True,
         }
+        # 图片由 AssetPipeline 在后台加载，None 时只绘制文字
+        self.assets = None
+        self._canvas: Optional[Image.Image] = None
         
         # 滚动动画
         self.scroll_offset = 0.0
         self.target_scroll = 0.0
         self.last_msg_count = 0
+        self.last_version = -1
+        
+        # 平滑滚动：scroll_margin 为逻辑像素，scroll_pos 为可见区域相对静止位置上移的纹理像素
+        self.scroll_margin = 0
+        self.scroll_pos = 0.0
+        self._bottom_id = None
         
         # 帧率控制
         self.last_render_time = 0
@@ -106,58 +157,94 @@ class DanmakuRenderer:
         
         # SC 显示队列
         self.sc_display_duration = 30
-        
-        # 复用图像缓冲区
+        # 置顶面板没有时钟等随时间变化的内容，只在内容变化时重绘
+        if section == 'sc':
+            self.idle_frame_interval = float('inf')
+        self._key_version = -1
+        self._key: Hashable = None
+        self._listed: List[dict] = []
+        self._header_stats: Optional[tuple] = None
+        self._header_stats_time = 0.0
+        
+        # 复用帧缓冲区：像素按 GL 行序（自下而上）存放，可直接上传
+        self._frame_buffer: Optional[bytearray] = None
         self._img_buffer: Optional[Image.Image] = None
+        self._mapped: Dict[int, Image.Image] = {}
+        self.frame: Optional[memoryview] = None
+        self._measure_draw: Optional[ImageDraw.ImageDraw] = None
+    
+    def _px(self, value: float) -> int:
+        return int(round(value * self.render_scale))
     
     def _load_fonts(self, size: int) -> None:
         self.font_size = size
-        try:
-            self.font = ImageFont.truetype("C:/Windows/Fonts/msyh.ttc", size + 4)
-            self.font_small = ImageFont.truetype("C:/Windows/Fonts/msyh.ttc", size)
-            self.font_bold = ImageFont.truetype("C:/Windows/Fonts/msyhbd.ttc", size)
-        except Exception:
-            self.font = self.font_small = self.font_bold = ImageFont.load_default()
+        # 字体由 FontManager 缓存，拖动字号滑块不会重复解析字体文件
+        self.font = self.fonts.get('regular', self._px(size + 4))
+        self.font_small = self.fonts.get('regular', self._px(size))
+        self.font_bold = self.fonts.get('bold', self._px(size))
+        self._prefixes.clear()
     
     def _update_layout(self) -> None:
-        fs = self.font_size
+        fs = self._px(self.font_size)
+        s = self.render_scale
         
         # 边距
-        self.padding = max(8, int(fs * 0.7))
+        self.padding = max(int(8 * s), int(fs * 0.7))
         # 行高
-        self.line_height = fs + max(6, int(fs * 0.5))
+        self.line_height = fs + max(int(6 * s), int(fs * 0.5))
         # 项目间距
-        self.item_gap = max(4, int(fs * 0.3))
+        self.item_gap = max(int(4 * s), int(fs * 0.3))
         # 底部边距
-        self.bottom_margin = max(4, int(fs * 0.3))
+        self.bottom_margin = max(int(4 * s), int(fs * 0.3))
         
         # 头部布局
-        self.header_padding_top = max(6, int(fs * 0.5))
-        self.header_height = fs + 8 + self.header_padding_top
-        self.room_line_height = fs + 4
+        self.header_padding_top = max(int(6 * s), int(fs * 0.5))
+        self.room_line_offset = fs + self._px(8)
+        self.header_height = self.room_line_offset + self.header_padding_top
+        self.room_line_height = fs + self._px(4)
         self.header_total = self.header_height + self.room_line_height + self.item_gap
         
         # SC 区域
-        self.sc_height = self.line_height + max(6, int(fs * 0.4))
-        self.sc_radius = max(4, int(fs * 0.4))
+        self.sc_height = self.line_height + max(int(6 * s), int(fs * 0.4))
+        self.sc_radius = max(int(4 * s), int(fs * 0.4))
         
         # 图标宽度
-        self.icon_width = fs + 4
+        self.icon_width = fs + self._px(4)
         
         # 时间戳宽度
-        self.time_width = max(35, int(fs * 2.8))
+        self.time_width = max(self._px(35), int(fs * 2.8))
     
     def set_font_size(self, size: int) -> None:
         if size != self.font_size:
             self._load_fonts(size)
             self._update_layout()
     
+    def set_render_scale(self, scale: float) -> None:
+        width = int(self.base_width * scale) // 2 * 2
+        height = int(self.base_height * scale) // 2 * 2
+        if (width, height) == (self.width, self.height) and scale == self.render_scale:
+            return
+        self.render_scale = scale
+        self.width = width
+        self.height = height
+        self._load_fonts(self.font_size)
+        self._update_layout()
+        # 按新的行高重新计算滚动
+        self.scroll_offset = self.target_scroll = 0.0
+        self.scroll_pos = 0.0
+    
     def set_show_config(self, config: dict) -> None:
         for key in self.show_config:
             if key in config:
                 self.show_config[key] = config[key]
         if 'bg_alpha' in config:
             self.bg_alpha = config['bg_alpha']
+        if self.show_config['show_images']:
+            if self.assets is None:
+                from ui.assets import get_asset_pipeline
+                self.assets = get_asset_pipeline()
+        else:
+            self.assets = None
     
     def _should_show(self, msg_type: str) -> bool:
         type_map = {
@@ -175,59 +262,215 @@ class DanmakuRenderer:
             return True
         return self.show_config.get(key, True)
     
-    def should_render(self, msg_count: int) -> bool:
-        now = time.time()
-        has_new_content = msg_count != self.last_msg_count
+    def _pinned_messages(self, messages: List[dict], now: float) -> List[dict]:
+        # 显示时长内的 SC 与上舰消息，各保留最近两条
+        sc = []
+        guards = []
+        for m in messages:
+            msg_type = m.get('type')
+            if msg_type == 'sc':
+                if now - m.get('time', 0) < self.sc_display_duration:
+                    sc.append(m)
+            elif msg_type == 'guard' and self.section == 'sc':
+                if now - m.get('time', 0) < self.sc_display_duration:
+                    guards.append(m)
+        if not self._should_show('sc'):
+            sc = []
+        if not self._should_show('guard'):
+            guards = []
+        return sc[-2:] + guards[-2:]
+    
+    def _is_listed(self, msg: dict) -> bool:
+        msg_type = msg.get('type', '')
+        if msg_type == 'sc' or (msg_type == 'guard' and self.section == 'chat'):
+            return False
+        return self._should_show(msg_type)
+    
+    # 本区域显示内容的标识，传给 should_render，只有自身内容变化时才重绘
+    def content_key(self, messages: List[dict], version: int, state: Optional[tuple] = None) -> Hashable:
+        key = self._content_key(messages, version, state)
+        # 图片加载完成后需要重绘
+        return key if self.assets is None else (key, self.assets.version)
+    
+    def _content_key(self, messages: List[dict], version: int, state: Optional[tuple]) -> Hashable:
+        if self.section == 'full':
+            return version
+        if self.section == 'sc':
+            now = self.clock()
+            pinned = self._pinned_messages(messages, now)
+            # 淡出阶段按帧刷新
+            fading = any(self.sc_display_duration - (now - m.get('time', now)) < 5 for m in pinned)
+            key = tuple((m.get('id'), m.get('rev', 0)) for m in pinned), now if fading else 0
+            if self.show_header:
+                # 头部时钟精确到分钟，直播数据按 STATS_REFRESH 节流
+                stats = state[4] if state and len(state) > 4 else None
+                if stats != self._header_stats and now - self._header_stats_time >= STATS_REFRESH:
+                    self._header_stats = stats
+                    self._header_stats_time = now
+                key += (state[:4] if state else state, self._header_stats, int(now // 60))
+            return key
+        if version != self._key_version:
+            self._key_version = version
+            self._listed = [m for m in messages if self._is_listed(m)]
+            self._key = tuple((m.get('id'), m.get('rev', 0)) for m in self._listed)
+        # 列表区域的 state 为回看滚动条信息
+        key = self._key if state is None else (self._key, state)
+        if self.scroll_margin and state is None:
+            # 平滑滚动时没有空闲重绘，高亮结束或淡出跨过一档时才算内容变化
+            now = self.clock()
+            ages = [self._age(m, now) for m in self._listed[-self.list_capacity():]]
+            highlighted = sum(1 for age in ages if age < HIGHLIGHT_DURATION)
+            fading = any(age < FADE_DURATION for age in ages)
+            key = (key, highlighted, int(now // FADE_STEP) if fading else 0)
+        return key
+
+    # 经过节奏控制的消息从放出时刻算起，礼物连击更新时重新计算
+    @staticmethod
+    def _age(msg: dict, now: float) -> float:
+        return max(0.0, now - max(msg.get('time', now), msg.get('shown', 0)))
+    
+    # 消息在列表中占用的行数，隐藏的类型为 0；回看索引据此修正估算
+    def measure_lines(self, msg: dict) -> int:
+        if not self._is_listed(msg):
+            return 0
+        if self._measure_draw is None:
+            self._measure_draw = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        height = self._calc_message_height(self._measure_draw, msg, self.width - self.time_width - self.padding)
+        return max(1, height // self.line_height)
+    
+    # 列表区域能容纳的单行消息数，显示节奏控制据此估算停留时间
+    def list_capacity(self) -> int:
+        top = self.header_total if self.show_header else 0
+        available = self.height - top - self.bottom_margin - self._px(self.scroll_margin)
+        return max(1, available // self.line_height)
+    
+    # 平滑滚动的可见区域，(u_min, v_min, u_max, v_max)，v 自图像顶部向下
+    def texture_bounds(self) -> Tuple[float, float, float, float]:
+        margin = self._px(self.scroll_margin)
+        top = (margin - self.scroll_pos) / self.height
+        return 0.0, top, 1.0, top + (self.height - margin) / self.height
+    
+    # 推进滚动动画，返回是否仍在滚动
+    def advance_scroll(self, dt: float) -> bool:
+        if self.scroll_pos <= 0:
+            return False
+        self.scroll_pos *= math.exp(-SCROLL_SPEED * dt)
+        if self.scroll_pos < 0.5:
+            self.scroll_pos = 0.0
+        return True
+    
+    def should_render(self, version: Hashable) -> bool:
+        now = self.clock()
+        has_new_content = version != self.last_version
         is_scrolling = abs(self.target_scroll - self.scroll_offset) > 0.5
         
-        interval = self.active_frame_interval if (has_new_content or is_scrolling) else self.idle_frame_interval
+        # 平滑滚动由纹理边界完成，列表区域只在内容变化时重绘和上传
+        idle = float('inf') if self.scroll_margin else self.idle_frame_interval
+        interval = self.active_frame_interval if (has_new_content or is_scrolling) else idle
         
         if now - self.last_render_time >= interval:
             self.last_render_time = now
+            self.last_version = version
             return True
         return False
     
+    def _map_image(self, buffer) -> Image.Image:
+        # 以负步长映射外部缓冲区：PIL 按自上而下绘制，内存中则是 GL 需要的自下而上
+        img = Image.frombuffer('RGBA', (self.width, self.height), buffer, 'raw', 'RGBA', 0, -1)
+        img.readonly = 0
+        return img
+    
+    def _target_image(self, target) -> Image.Image:
+        if target is not None:
+            # 外部缓冲区（如共享内存），按对象缓存映射
+            img = self._mapped.get(id(target))
+            if img is None or img.size != (self.width, self.height):
+                if len(self._mapped) > 4:
+                    self._mapped.clear()
+                img = self._mapped[id(target)] = self._map_image(target)
+            return img
+        
+        size = self.width * self.height * 4
+        if self._frame_buffer is None or len(self._frame_buffer) != size:
+            self._frame_buffer = bytearray(size)
+            self._img_buffer = self._map_image(self._frame_buffer)
+            self.frame = memoryview(self._frame_buffer)
+        return self._img_buffer
+    
+    def release_targets(self) -> None:
+        # 释放对外部缓冲区的映射，使共享内存可以关闭
+        self._mapped.clear()
+    
+    # header_stats 为 LiveStats.header() 的结果：(每分钟弹幕, 礼物金额, SC 金额)
+    # scroll 为回看时的滚动条信息 (顶部比例, 底部比例, 窗口之后的消息数)，None 表示跟随最新消息
     def render(self, messages: List[dict], room_id: int, online: int, 
-               connected: bool, reconnect_count: int) -> Image.Image:
+               connected: bool, reconnect_count: int, header_stats: Optional[tuple] = None,
+               scroll: Optional[tuple] = None, target=None) -> Image.Image:
+        t0 = time.perf_counter()
+        if self.sections:
+            self.sections.start()
+        img = self._render(messages, room_id, online, connected, reconnect_count, header_stats, scroll, target)
+        if self._render_hist is None:
+            self._render_hist = get_metrics().histogram(f'render.{self.section}_ms')
+        self._render_hist.observe((time.perf_counter() - t0) * 1000)
+        return img
+    
+    def _render(self, messages: List[dict], room_id: int, online: int,
+                connected: bool, reconnect_count: int, header_stats: Optional[tuple] = None,
+                scroll: Optional[tuple] = None, target=None) -> Image.Image:
         # 计算背景颜色
         bg_alpha_value = int(255 * self.bg_alpha)
         bg_color = COLORS['bg'][:3] + (bg_alpha_value,)
         
-        # 复用图像缓冲区
-        if self._img_buffer is None or self._img_buffer.size != (self.width, self.height):
-            self._img_buffer = Image.new('RGBA', (self.width, self.height), bg_color)
-        else:
-            # 清空画布
-            self._img_buffer.paste(bg_color, (0, 0, self.width, self.height))
-        
-        img = self._img_buffer
+        # 复用帧缓冲区，不产生整帧分配
+        img = self._target_image(target)
+        if self.section == 'sc':
+            # 置顶面板背景透明，只显示卡片
+            bg_color = (0, 0, 0, 0)
+        img.paste(bg_color, (0, 0, self.width, self.height))
         draw = ImageDraw.Draw(img)
+        self._canvas = img
+        
+        sections = self.sections
+        now = self.clock()
+        if self.section == 'sc':
+            y = 0
+            if self.show_header:
+                draw.rectangle([0, 0, self.width, self.header_total], fill=COLORS['bg'][:3] + (bg_alpha_value,))
+                y = self._render_header(draw, room_id, online, connected, reconnect_count, header_stats)
+            if sections:
+                sections.lap('header')
+            self._render_pinned(draw, self._pinned_messages(messages, now), y)
+            if sections:
+                sections.lap('sc')
+            return img
         
         # 渲染头部
-        header_bottom = self._render_header(draw, room_id, online, connected, reconnect_count)
+        header_bottom = 0
+        if self.show_header:
+            header_bottom = self._render_header(draw, room_id, online, connected, reconnect_count, header_stats)
+        if sections:
+            sections.lap('header')
         
         # 分离 SC 和普通消息
-        now = time.time()
-        sc_messages = [m for m in messages 
-                       if m.get('type') == 'sc' 
-                       and now - m.get('time', 0) < self.sc_display_duration
-                       and self._should_show('sc')]
-        normal_messages = [m for m in messages 
-                          if m.get('type') != 'sc' 
-                          and self._should_show(m.get('type', ''))]
+        sc_messages = self._pinned_messages(messages, now) if self.section == 'full' else []
+        normal_messages = [m for m in messages if self._is_listed(m)]
         
         # SC 区域
         sc_bottom = header_bottom
         if sc_messages:
             sc_bottom = self._render_sc_area(draw, sc_messages, header_bottom)
+        if sections:
+            sections.lap('sc')
         
         # 分隔线
         sep_y = sc_bottom + self.item_gap // 2
         draw.line([(self.padding, sep_y), (self.width - self.padding, sep_y)], fill=COLORS['separator'])
         
         # 滚动动画（使用相对偏移，定期重置防止浮点溢出）
+        # 平滑滚动时由纹理边界完成动画，无需持续重绘
         msg_count = len(normal_messages)
-        if msg_count > self.last_msg_count:
+        if msg_count > self.last_msg_count and not self.scroll_margin and scroll is None:
             new_count = msg_count - self.last_msg_count
             self.target_scroll += new_count * self.line_height
         self.last_msg_count = msg_count
@@ -241,15 +484,40 @@ class DanmakuRenderer:
         if self.scroll_offset == self.target_scroll and self.target_scroll > 10000:
             self.scroll_offset = 0.0
             self.target_scroll = 0.0
+        if sections:
+            sections.lap('layout')
         
         # 渲染弹幕列表
-        self._render_messages(draw, normal_messages, sc_bottom + self.item_gap)
+        if scroll is None:
+            self._render_messages(draw, normal_messages, sc_bottom + self.item_gap)
+        else:
+            self._render_scrollback(draw, normal_messages, sc_bottom + self.item_gap, scroll)
+        if sections:
+            sections.lap('draw')
         
-        return img.transpose(Image.FLIP_TOP_BOTTOM)
+        # 返回的图像与 self.frame（或 target）共享内存，下一帧会被覆盖
+        return img
 
+    # 绘制已加载的图片，未就绪时画占位框；返回占用的宽度
+    def _draw_asset(self, draw: ImageDraw.Draw, url: str, x: int, y: int, size: int,
+                    circle: bool = False) -> int:
+        bitmap = self.assets.get(url, size, circle)
+        if bitmap is not None:
+            self._canvas.paste(bitmap, (x, y), bitmap)
+            return bitmap.width
+        if circle:
+            draw.ellipse([x, y, x + size - 1, y + size - 1], outline=COLORS['separator'])
+        else:
+            draw.rounded_rectangle([x, y, x + size - 1, y + size - 1], radius=max(2, size // 6),
+                                   outline=COLORS['separator'])
+        return size
+    
+    def _sticker_size(self) -> int:
+        return self.line_height * 2 - self.item_gap
+    
     def _render_header(self, draw: ImageDraw.Draw, room_id: int, online: int,
-                       connected: bool, reconnect_count: int) -> int:
-        now_dt = datetime.datetime.now()
+                       connected: bool, reconnect_count: int, header_stats: Optional[tuple] = None) -> int:
+        now_dt = datetime.datetime.fromtimestamp(self.clock())
         weekdays = ['一', '二', '三', '四', '五', '六', '日']
         
         y_top = self.header_padding_top
@@ -284,16 +552,29 @@ class DanmakuRenderer:
         draw.text((self.width - self.padding - status_width, y_top + 2), status_text, font=self.font_small, fill=status_color)
         
         # 房间号
-        room_y = y_top + self.font_size + 8
+        room_y = y_top + self.room_line_offset
         room_text = f"#{room_id}"
         draw.text((self.padding, room_y), room_text, font=self.font_small, fill=COLORS['header_dim'])
         
+        # 直播数据
+        if header_stats and any(header_stats):
+            rate, gift_value, sc_value = header_stats
+            parts = [f"弹幕 {rate}/分"]
+            if gift_value:
+                parts.append(f"礼物 ¥{gift_value:,.1f}")
+            if sc_value:
+                parts.append(f"SC ¥{sc_value:,}")
+            stats_text = "  ".join(parts)
+            stats_width = self.fonts.measure(stats_text, self.font_small)
+            self.fonts.draw_text(draw, (self.width - self.padding - stats_width, room_y), stats_text,
+                                 self.font_small, COLORS['header_dim'])
+        
         return self.header_total
     
     def _render_sc_area(self, draw: ImageDraw.Draw, sc_messages: List[dict], 
                         start_y: int) -> int:
         y = start_y
-        now = time.time()
+        now = self.clock()
         
         for sc in sc_messages[-2:]:
             user = sc.get('user', '')[:10]
@@ -312,11 +593,15 @@ class DanmakuRenderer:
             
             # 计算用户名宽度
             user_text = f"{user}: "
-            bbox = draw.textbbox((0, 0), user_text, font=self.font_small)
-            user_width = bbox[2] - bbox[0]
+            user_width = self.fonts.measure(user_text, self.font_small)
+            
+            # 头像
+            face = sc.get('face') if self.assets else None
+            avatar_size = self._px(self.font_size)
+            lead = avatar_size + 4 if face else 0
             
             # 计算文本可用宽度并换行
-            content_start_x = self.padding + 6 + price_width + 6 + user_width
+            content_start_x = self.padding + 6 + lead + price_width + 6 + user_width
             text_max_width = self.width - content_start_x - self.padding - 6
             lines = wrap_text(text, self.font_small, text_max_width, draw)
             if not lines:
@@ -340,35 +625,57 @@ class DanmakuRenderer:
             
             # 价格
             text_y = y + self.item_gap
+            if face:
+                self._draw_asset(draw, face, self.padding + 8, text_y + 1, avatar_size, circle=True)
             price_color = tuple(int(c * alpha) for c in COLORS['sc_price'])
-            draw.text((self.padding + 8, text_y), price_text, font=self.font_bold, fill=price_color)
+            draw.text((self.padding + 8 + lead, text_y), price_text, font=self.font_bold, fill=price_color)
             
             # 用户名
             user_color = tuple(int(c * alpha) for c in COLORS['sc_user'])
-            draw.text((self.padding + 8 + price_width + 6, text_y), user_text, font=self.font_small, fill=user_color)
+            self.fonts.draw_text(draw, (self.padding + 8 + lead + price_width + 6, text_y), user_text, self.font_small, user_color)
             
             # 内容
             text_color = tuple(int(c * alpha) for c in COLORS['sc_text'])
             content_x = content_start_x + 2
             for i, line in enumerate(lines):
                 if i == 0:
-                    draw.text((content_x, text_y), line, font=self.font_small, fill=text_color)
+                    self.fonts.draw_text(draw, (content_x, text_y), line, self.font_small, text_color)
                 else:
                     text_y += self.line_height
-                    draw.text((self.padding + 8 + price_width + 6, text_y), line, font=self.font_small, fill=text_color)
+                    self.fonts.draw_text(draw, (self.padding + 8 + lead + price_width + 6, text_y), line, self.font_small, text_color)
             
             y += sc_total_height + self.item_gap
         
         return y
 
+    def _render_pinned(self, draw: ImageDraw.Draw, pinned: List[dict], start_y: int = 0) -> None:
+        sc_messages = [m for m in pinned if m.get('type') == 'sc']
+        y = start_y + self.item_gap
+        if sc_messages:
+            y = self._render_sc_area(draw, sc_messages, y)
+        
+        now = self.clock()
+        for msg in pinned:
+            if msg.get('type') != 'guard':
+                continue
+            remaining = max(0, self.sc_display_duration - (now - msg.get('time', now)))
+            alpha = min(1.0, remaining / 5)
+            bg_color = COLORS['sc_bg'][:3] + (int(200 * alpha),)
+            draw.rectangle([self.padding, y, self.width - self.padding, y + self.sc_height], fill=bg_color)
+            self._render_guard_buy(draw, msg.get('user', '')[:12], msg.get('text', ''),
+                                   y + self.item_gap, True, alpha, 6)
+            y += self.sc_height + self.item_gap
+    
     def _render_messages(self, draw: ImageDraw.Draw, messages: List[dict],
                          start_y: int) -> None:
-        now = time.time()
+        now = self.clock()
         available_height = self.height - start_y - self.bottom_margin
         content_max_width = self.width - self.time_width - self.padding
         
         if not messages:
-            draw.text((self.padding, start_y + self.line_height), "等待弹幕...", font=self.font_small, fill=COLORS['header_dim'])
+            # 平滑滚动时纹理顶部的额外区域不可见
+            y = start_y + self._px(self.scroll_margin) + self.line_height
+            draw.text((self.padding, y), "等待弹幕...", font=self.font_small, fill=COLORS['header_dim'])
             return
 
         msg_heights = []
@@ -386,29 +693,81 @@ class DanmakuRenderer:
         
         # 从上往下渲染
         y = start_y
+        if self.scroll_margin:
+            # 平滑滚动时贴底排列，新消息的高度即可见区域需要滚过的距离
+            y = self.height - self.bottom_margin - total_height
+            # 节奏控制可能打乱 id 顺序，按位置找出上一帧最底部之后新增的消息
+            added = 0
+            if self._bottom_id is not None:
+                for m, h in reversed(display_msgs):
+                    if m.get('id') == self._bottom_id:
+                        break
+                    added += h
+            if added:
+                self.scroll_pos = min(self._px(self.scroll_margin), self.scroll_pos + added)
+            self._bottom_id = display_msgs[-1][0].get('id') if display_msgs else None
         for msg, height in display_msgs:
             if y + height > self.height - self.bottom_margin:
                 break
             
             msg_type = msg.get('type', '')
-            age = now - msg.get('time', now)
-            is_new = age < 3
+            age = self._age(msg, now)
+            is_new = age < HIGHLIGHT_DURATION
             
             # 消息随时间变淡
-            fade = max(0.4, 1.0 - (age / 60))
+            fade = max(0.4, 1.0 - (age / FADE_DURATION))
             
-            # 新消息滑入动画
+            # 新消息滑入动画，平滑滚动时由纹理边界滚入
             slide_offset = 0
-            if age < 0.2:
-                slide_offset = int((1 - age / 0.2) * 30)
+            if age < 0.2 and not self.scroll_margin:
+                slide_offset = int((1 - age / 0.2) * self._px(30))
             
             y = self._render_single_message(draw, msg, msg_type, y, is_new, fade, content_max_width, slide_offset)
     
+    # 回看：从窗口顶部向下排列，不做滑入、高亮和淡出；右侧绘制滚动条，底部提示窗口之后的新消息数
+    def _render_scrollback(self, draw: ImageDraw.Draw, messages: List[dict],
+                           start_y: int, scroll: tuple) -> None:
+        top_frac, bottom_frac, newer = scroll
+        # 回看期间不做平滑滚动，回到跟随时也不从旧位置滚入
+        self.scroll_pos = 0.0
+        self._bottom_id = None
+        top = start_y + self._px(self.scroll_margin)
+        bottom = self.height - self.bottom_margin
+        content_max_width = self.width - self.time_width - self.padding
+        y = top
+        for msg in messages:
+            height = self._calc_message_height(draw, msg, content_max_width)
+            if y + height > bottom:
+                break
+            y = self._render_single_message(draw, msg, msg.get('type', ''), y, False, 1.0, content_max_width, 0)
+        
+        bar_width = max(2, self._px(3))
+        x = self.width - bar_width - self._px(2)
+        draw.rectangle([x, top, x + bar_width, bottom], fill=COLORS['separator'])
+        span = bottom - top
+        thumb_top = top + int(span * top_frac)
+        thumb_bottom = max(thumb_top + self._px(8), top + int(span * bottom_frac))
+        draw.rectangle([x, thumb_top, x + bar_width, min(bottom, thumb_bottom)], fill=COLORS['header_dim'])
+        
+        if newer:
+            label = f"{newer} 条新消息"
+            text_width = self.fonts.measure(label, self.font_small)
+            pad = self._px(6)
+            box_h = self._px(self.font_size) + pad
+            x0 = (self.width - text_width) // 2 - pad
+            y0 = bottom - box_h - self._px(4)
+            draw.rounded_rectangle([x0, y0, x0 + text_width + pad * 2, y0 + box_h],
+                                   radius=box_h // 2, fill=COLORS['user_dim'])
+            self.fonts.draw_text(draw, (x0 + pad, y0 + pad // 2 - self._px(1)), label, self.font_small, COLORS['text'])
+    
     def _calc_message_height(self, draw: ImageDraw.Draw, msg: dict, max_width: int) -> int:
         msg_type = msg.get('type', '')
         
         if msg_type != 'danmaku':
             return self.line_height
+        # 表情弹幕占两行
+        if self.assets and msg.get('emoticon'):
+            return self.line_height * 2
         
         # 计算弹幕前缀宽度
         prefix_width = self._calc_prefix_width(draw, msg)
@@ -416,7 +775,7 @@ class DanmakuRenderer:
         
         # 计算文本需要的行数
         remaining_width = max_width - prefix_width
-        if remaining_width < 50:
+        if remaining_width < self._px(50):
             remaining_width = max_width - self.padding
             lines = wrap_text(text, self.font_small, remaining_width, draw)
             return self.line_height * (1 + len(lines))
@@ -424,29 +783,45 @@ class DanmakuRenderer:
         lines = wrap_text(text, self.font_small, remaining_width, draw)
         return self.line_height * max(1, len(lines))
     
-    def _calc_prefix_width(self, draw: ImageDraw.Draw, msg: dict) -> int:
-        width = self.padding
+    # 返回 (舰长图标, 图标宽度, 粉丝牌文本, 粉丝牌宽度, 用户名文本, 前缀总宽度)，常驻观众只测量一次
+    def _prefix_metrics(self, draw: ImageDraw.Draw, msg: dict) -> tuple:
         guard = msg.get('guard', 0)
         medal = msg.get('medal')
-        user = msg.get('user', '')[:12]
-        
-        if guard:
-            guard_icons = {1: '[总督]', 2: '[提督]', 3: '[舰长]'}
-            icon = guard_icons.get(guard, '')
-            if icon:
-                bbox = draw.textbbox((0, 0), icon, font=self.font_small)
-                width += bbox[2] - bbox[0] + 2
+        key = msg.get('uref')
+        if key is None:
+            key = (msg.get('user', ''), guard, medal['name'], medal['level']) if medal else (msg.get('user', ''), guard)
+        cached = self._prefixes.get(key)
+        if cached is not None:
+            self._prefixes.move_to_end(key)
+            return cached
         
+        width = self.padding
+        icon = GUARD_ICONS.get(guard, '') if guard else ''
+        icon_width = 0
+        if icon:
+            bbox = draw.textbbox((0, 0), icon, font=self.font_small)
+            icon_width = bbox[2] - bbox[0] + 2
+            width += icon_width
+        
+        medal_text = ''
+        medal_width = 0
         if medal:
             medal_text = f"[{medal['name'][:4]}{medal['level']}]"
             bbox = draw.textbbox((0, 0), medal_text, font=self.font_small)
-            width += bbox[2] - bbox[0] + 2
+            medal_width = bbox[2] - bbox[0] + 2
+            width += medal_width
         
-        user_text = f"{user}: "
-        bbox = draw.textbbox((0, 0), user_text, font=self.font_small)
-        width += bbox[2] - bbox[0]
+        user_text = f"{msg.get('user', '')[:12]}: "
+        width += self.fonts.measure(user_text, self.font_small)
         
-        return width
+        metrics = (icon, icon_width, medal_text, medal_width, user_text, width)
+        self._prefixes[key] = metrics
+        if len(self._prefixes) > PREFIX_CACHE_SIZE:
+            self._prefixes.popitem(last=False)
+        return metrics
+    
+    def _calc_prefix_width(self, draw: ImageDraw.Draw, msg: dict) -> int:
+        return self._prefix_metrics(draw, msg)[5]
     
     def _render_single_message(self, draw: ImageDraw.Draw, msg: dict, msg_type: str,
                                 y: int, is_new: bool, fade: float, content_max_width: int, slide_offset: int = 0) -> int:
@@ -462,11 +837,11 @@ class DanmakuRenderer:
         if msg_type == 'danmaku':
             y = self._render_danmaku(draw, msg, user[:12], text, y, is_new, fade, content_max_width, x_offset)
         elif msg_type == 'gift':
-            y = self._render_gift(draw, user[:12], text, y, is_new, fade, x_offset)
+            y = self._render_gift(draw, user[:12], text, y, is_new, fade, x_offset, msg.get('icon'))
         elif msg_type == 'enter':
-            y = self._render_enter(draw, user[:12], y, is_new, fade, x_offset)
+            y = self._render_enter(draw, self._collapsed_user(msg, user), y, is_new, fade, x_offset)
         elif msg_type == 'follow':
-            y = self._render_follow(draw, user[:12], y, is_new, fade, x_offset)
+            y = self._render_follow(draw, self._collapsed_user(msg, user), y, is_new, fade, x_offset)
         elif msg_type == 'vip_enter':
             y = self._render_vip_enter(draw, user, y, is_new, fade, x_offset)
         elif msg_type == 'guard':
@@ -478,37 +853,40 @@ class DanmakuRenderer:
         
         return y
     
+    # 积压时合并的进入/关注显示为 "某某 等N人"
+    def _collapsed_user(self, msg: dict, user: str) -> str:
+        collapsed = msg.get('collapsed')
+        if collapsed:
+            return f"{user[:12]} 等{collapsed + 1}人"
+        return user[:12]
+    
     def _render_danmaku(self, draw, msg, user, text, y, is_new, fade, max_width, x_offset=0) -> int:
-        guard = msg.get('guard', 0)
-        medal = msg.get('medal')
+        icon, icon_width, medal_text, medal_width, user_text, _ = self._prefix_metrics(draw, msg)
         
         x = self.padding + x_offset
         
         # 舰长图标
-        if guard:
-            guard_icons = {1: '[总督]', 2: '[提督]', 3: '[舰长]'}
-            icon = guard_icons.get(guard, '')
-            if icon:
-                guard_color = tuple(int(c * fade) for c in COLORS['guard'])
-                draw.text((x, y), icon, font=self.font_small, fill=guard_color)
-                bbox = draw.textbbox((0, 0), icon, font=self.font_small)
-                x += bbox[2] - bbox[0] + 2
+        if icon:
+            guard_color = tuple(int(c * fade) for c in COLORS['guard'])
+            draw.text((x, y), icon, font=self.font_small, fill=guard_color)
+            x += icon_width
         
         # 粉丝牌
-        if medal:
-            medal_text = f"[{medal['name'][:4]}{medal['level']}]"
+        if medal_text:
             medal_color = tuple(int(c * fade * 0.7) for c in COLORS['medal'])
             draw.text((x, y), medal_text, font=self.font_small, fill=medal_color)
-            bbox = draw.textbbox((0, 0), medal_text, font=self.font_small)
-            x += bbox[2] - bbox[0] + 2
+            x += medal_width
         
         # 用户名
         user_color = COLORS['user'] if is_new else COLORS['user_dim']
         user_color = tuple(int(c * fade) for c in user_color)
-        user_text = f"{user}: "
-        draw.text((x, y), user_text, font=self.font_small, fill=user_color)
-        bbox = draw.textbbox((0, 0), user_text, font=self.font_small)
-        x += bbox[2] - bbox[0]
+        x += self.fonts.draw_text(draw, (x, y), user_text, self.font_small, user_color)
+        
+        # 表情弹幕：绘制图片代替文字
+        emoticon = msg.get('emoticon') if self.assets else None
+        if emoticon:
+            self._draw_asset(draw, emoticon, x, y + self.item_gap // 2, self._sticker_size())
+            return y + self.line_height * 2
         
         # 弹幕内容
         text_color = COLORS['text'] if is_new else COLORS['text_dim']
@@ -516,7 +894,7 @@ class DanmakuRenderer:
         
         remaining_width = max_width - x + self.padding
 
-        if remaining_width < 50:
+        if remaining_width < self._px(50):
             y += self.line_height
             x = self.padding
             remaining_width = max_width - self.padding
@@ -524,47 +902,51 @@ class DanmakuRenderer:
         lines = wrap_text(text, self.font_small, remaining_width, draw)
         
         if lines:
-            draw.text((x, y), lines[0], font=self.font_small, fill=text_color)
+            self.fonts.draw_text(draw, (x, y), lines[0], self.font_small, text_color)
             y += self.line_height
             for line in lines[1:]:
-                draw.text((self.padding, y), line, font=self.font_small, fill=text_color)
+                self.fonts.draw_text(draw, (self.padding, y), line, self.font_small, text_color)
                 y += self.line_height
         else:
             y += self.line_height
         
         return y
 
-    def _render_gift(self, draw, user, text, y, is_new, fade, x_offset=0) -> int:
+    def _render_gift(self, draw, user, text, y, is_new, fade, x_offset=0, icon=None) -> int:
         color = COLORS['gift'] if is_new else COLORS['gift_dim']
         color = tuple(int(c * fade) for c in color)
-        draw.text((self.padding + x_offset, y), f"[礼物] {user} {text}", font=self.font_small, fill=color)
+        x = self.padding + x_offset
+        x += self.fonts.draw_text(draw, (x, y), f"[礼物] {user} {text}", self.font_small, color)
+        if icon and self.assets:
+            size = self._px(self.font_size) + 2
+            self._draw_asset(draw, icon, x + 4, y - 1, size)
         return y + self.line_height
     
     def _render_enter(self, draw, user, y, is_new, fade, x_offset=0) -> int:
         color = COLORS['enter'] if is_new else COLORS['enter_dim']
         color = tuple(int(c * fade) for c in color)
-        draw.text((self.padding + x_offset, y), f"[加入] {user} 进入", font=self.font_small, fill=color)
+        self.fonts.draw_text(draw, (self.padding + x_offset, y), f"[加入] {user} 进入", self.font_small, color)
         return y + self.line_height
     
     def _render_follow(self, draw, user, y, is_new, fade, x_offset=0) -> int:
         color = COLORS['follow'] if is_new else COLORS['follow_dim']
         color = tuple(int(c * fade) for c in color)
-        draw.text((self.padding + x_offset, y), f"[关注] {user} 关注了直播间", font=self.font_small, fill=color)
+        self.fonts.draw_text(draw, (self.padding + x_offset, y), f"[关注] {user} 关注了直播间", self.font_small, color)
         return y + self.line_height
     
     def _render_vip_enter(self, draw, user, y, is_new, fade, x_offset=0) -> int:
         color = COLORS['guard'] if is_new else COLORS['guard_dim']
         color = tuple(int(c * fade) for c in color)
-        draw.text((self.padding + x_offset, y), f"[舰长] {user}", font=self.font_small, fill=color)
+        self.fonts.draw_text(draw, (self.padding + x_offset, y), f"[舰长] {user}", self.font_small, color)
         return y + self.line_height
     
     def _render_guard_buy(self, draw, user, text, y, is_new, fade, x_offset=0) -> int:
         color = COLORS['guard'] if is_new else COLORS['guard_dim']
         color = tuple(int(c * fade) for c in color)
-        draw.text((self.padding + x_offset, y), f"[上舰] {user} {text}", font=self.font_small, fill=color)
+        self.fonts.draw_text(draw, (self.padding + x_offset, y), f"[上舰] {user} {text}", self.font_small, color)
         return y + self.line_height
     
     def _render_warning(self, draw, user, text, y, fade, x_offset=0) -> int:
         color = tuple(int(c * fade) for c in COLORS['warning'])
-        draw.text((self.padding + x_offset, y), f"{user} {text}", font=self.font_small, fill=color)
+        self.fonts.draw_text(draw, (self.padding + x_offset, y), f"{user} {text}", self.font_small, color)
         return y + self.line_height
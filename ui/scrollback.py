@@ -0,0 +1,239 @@
+from typing import Callable, List, Optional, Tuple
+
+from utils.metrics import get_metrics
+
+
+# 回看保留的消息数，内存上限与此成正比，与直播时长无关
+HISTORY_SIZE = 5000
+# 未测量消息的估算：每行大约容纳的字符数
+ESTIMATE_CHARS = 20
+
+
+# 行数前缀和（树状数组），下标为环形缓冲区的槽位；更新、求和、按偏移定位都是 O(log n)
+class HeightIndex:
+    __slots__ = ('size', '_tree', '_values', '_step')
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tree = [0] * (size + 1)
+        self._values = [0] * size
+        self._step = 1 << (size.bit_length() - 1)
+
+    def get(self, slot: int) -> int:
+        return self._values[slot]
+
+    def set(self, slot: int, value: int) -> None:
+        delta = value - self._values[slot]
+        if not delta:
+            return
+        self._values[slot] = value
+        i = slot + 1
+        tree = self._tree
+        while i <= self.size:
+            tree[i] += delta
+            i += i & -i
+
+    # 槽位 [0, n) 的总行数
+    def prefix(self, n: int) -> int:
+        total = 0
+        tree = self._tree
+        while n > 0:
+            total += tree[n]
+            n -= n & -n
+        return total
+
+    # 找到覆盖第 offset 行的槽位，返回 (槽位, 该槽位之前的行数)
+    def find(self, offset: int) -> Tuple[int, int]:
+        pos = 0
+        before = 0
+        tree = self._tree
+        step = self._step
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and before + tree[nxt] <= offset:
+                pos = nxt
+                before += tree[nxt]
+            step >>= 1
+        return pos, before
+
+
+_SHOW_KEYS = {
+    'danmaku': 'show_danmaku', 'gift': 'show_gift', 'enter': 'show_enter',
+    'follow': 'show_follow', 'vip_enter': 'show_guard', 'guard': 'show_guard',
+}
+
+
+def estimate_lines(msg: dict) -> int:
+    msg_type = msg.get('type')
+    # SC 置顶显示，不占列表行
+    if msg_type == 'sc':
+        return 0
+    if msg_type != 'danmaku':
+        return 1
+    if msg.get('emoticon'):
+        return 2
+    return 1 + len(msg.get('text', '')) // ESTIMATE_CHARS
+
+
+# 滚动回看：保存最近 HISTORY_SIZE 条消息，按行数建立前缀和索引。
+# 新消息先按估算行数入索引，滚动到可见时才用渲染器的实际排版修正，每帧只测量可见窗口
+class ScrollbackView:
+
+    def __init__(self, size: int = HISTORY_SIZE):
+        self.size = size
+        self._messages: List[Optional[dict]] = [None] * size
+        # 槽位测量时的排版版本，字号、分辨率、过滤变化后递增，可见时重新测量
+        self._epochs = [-1] * size
+        self.index = HeightIndex(size)
+        self._head = 0
+        self.count = 0
+        self.epoch = 0
+        # 返回消息占用的行数（隐藏的类型为 0）；None 时按估算
+        self.measure: Optional[Callable[[dict], int]] = None
+        # 无法实际测量时（独立进程渲染），按显示开关把隐藏的类型计为 0 行
+        self._hidden: frozenset = frozenset()
+        self._last_id = 0
+        self._source_version = -1
+        # 视图顶部距最早一条消息顶部的行数，None 表示跟随最新消息
+        self.offset: Optional[float] = None
+        self._window: Optional[tuple] = None
+        metrics = get_metrics()
+        metrics.gauge_fn('scrollback.messages', lambda: self.count)
+        self._measured = metrics.counter('scrollback.measured')
+
+    @property
+    def active(self) -> bool:
+        return self.offset is not None
+
+    def reset(self) -> None:
+        self._messages = [None] * self.size
+        self._epochs = [-1] * self.size
+        self.index = HeightIndex(self.size)
+        self._head = 0
+        self.count = 0
+        self._last_id = 0
+        self._source_version = -1
+        self.offset = None
+        self._window = None
+
+    # 排版变化：已有的测量结果失效，滚动到时重新测量
+    def invalidate(self) -> None:
+        self.epoch += 1
+        self._window = None
+
+    def configure(self, config: dict, measure: Optional[Callable[[dict], int]]) -> None:
+        self.measure = measure
+        self._hidden = frozenset(t for t, key in _SHOW_KEYS.items() if not config.get(key, True))
+        self.invalidate()
+
+    @property
+    def total(self) -> int:
+        return self.index.prefix(self.size)
+
+    def _slot(self, position: int) -> int:
+        return (self._head + position) % self.size
+
+    # 覆盖第 offset 行的逻辑位置及其之前的行数
+    def _locate(self, offset: int) -> Tuple[int, int]:
+        start_lines = self.index.prefix(self._head)
+        upper = self.total - start_lines
+        if offset < upper:
+            slot, before = self.index.find(offset + start_lines)
+            return slot - self._head, before - start_lines
+        slot, before = self.index.find(offset - upper)
+        return slot + self.size - self._head, before + upper
+
+    # 从客户端的消息队列取新消息，只在版本变化时拷贝
+    def feed(self, messages, version: int) -> None:
+        if version == self._source_version:
+            return
+        self._source_version = version
+        fresh = []
+        for msg in reversed(list(messages)):
+            if msg.get('id', 0) <= self._last_id:
+                break
+            fresh.append(msg)
+        if not fresh:
+            return
+        self._last_id = fresh[0].get('id', 0)
+        for msg in reversed(fresh):
+            self._append(msg)
+        self._window = None
+
+    def _append(self, msg: dict) -> None:
+        if self.count == self.size:
+            # 覆盖最早的一条，视图位置随之上移
+            slot = self._head
+            evicted = self.index.get(slot)
+            self._head = (self._head + 1) % self.size
+            if self.offset is not None:
+                self.offset = max(0.0, self.offset - evicted)
+        else:
+            slot = self._slot(self.count)
+            self.count += 1
+        self._messages[slot] = msg
+        self._epochs[slot] = -1
+        self.index.set(slot, self._estimate(msg))
+
+    def _estimate(self, msg: dict) -> int:
+        return 0 if msg.get('type') in self._hidden else estimate_lines(msg)
+
+    def _measure(self, slot: int) -> None:
+        msg = self._messages[slot]
+        self.index.set(slot, self.measure(msg) if self.measure else self._estimate(msg))
+        self._epochs[slot] = self.epoch
+        self._measured.inc()
+
+    # 正值向更早的消息滚动，单位为行；滚到底部时恢复跟随
+    def scroll(self, lines: float, visible: int) -> None:
+        total = self.total
+        bottom = max(0, total - visible)
+        if self.offset is None:
+            if lines <= 0 or total <= visible:
+                return
+            self.offset = float(bottom)
+        self.offset = max(0.0, self.offset - lines)
+        if self.offset >= bottom:
+            self.offset = None
+        self._window = None
+
+    def follow(self) -> None:
+        if self.offset is not None:
+            self.offset = None
+            self._window = None
+
+    # 可见窗口：返回 (消息列表, 窗口标识, 滚动条信息)，只测量和返回窗口内的消息；
+    # 每一行都通过索引定位，隐藏类型（0 行）直接被跳过。滚动条信息为 (顶部比例, 底部比例, 窗口之后的消息数)
+    def window(self, visible: int) -> Tuple[List[dict], tuple, tuple]:
+        if self._window is not None and self._window[0] == visible:
+            return self._window[1]
+        line = int(self.offset or 0)
+        rows: List[dict] = []
+        used = 0
+        top = 0
+        last = -1
+        while used < visible:
+            if line >= self.total:
+                break
+            position, before = self._locate(line)
+            slot = self._slot(position)
+            if self._epochs[slot] != self.epoch:
+                # 行数修正后重新定位
+                self._measure(slot)
+                continue
+            lines = self.index.get(slot)
+            if rows and used + lines > visible:
+                break
+            if not rows:
+                top = before
+            rows.append(self._messages[slot])
+            used += lines
+            last = position
+            line = before + lines
+        total = max(self.total, 1)
+        newer = self.count - 1 - last if rows else 0
+        key = (rows[0].get('id') if rows else None, rows[-1].get('id') if rows else None, newer)
+        scrollbar = (top / total, min(1.0, (top + used) / total), newer)
+        result = rows, key, scrollbar
+        self._window = (visible, result)
+        return result
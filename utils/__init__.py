@@ -1,3 +1,24 @@
 # 工具
-from .text import wrap_text, format_time
 from .logger import log, set_log_callback
+
+# 文本与字体依赖 PIL，首次使用时才导入
+_LAZY = {
+    'wrap_text': 'text',
+    'measure_text': 'text',
+    'format_time': 'text',
+    'FontManager': 'fonts',
+    'get_font_manager': 'fonts',
+    'font_key': 'fonts',
+    'get_metrics': 'metrics',
+    'export_snapshots': 'metrics',
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
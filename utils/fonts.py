@@ -0,0 +1,295 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from PIL import ImageDraw, ImageFont
+
+
+FontKey = Tuple[str, int, int]
+AnyFont = Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]
+
+# 候选字体 (文件名, ttc 索引)，按优先级排列
+_WINDOWS_CANDIDATES: Dict[str, List[Tuple[str, int]]] = {
+    'regular': [('msyh.ttc', 0), ('simhei.ttf', 0), ('simsun.ttc', 0), ('arial.ttf', 0)],
+    'bold': [('msyhbd.ttc', 0), ('simhei.ttf', 0), ('msyh.ttc', 0), ('arialbd.ttf', 0)],
+    'fallback': [('seguiemj.ttf', 0), ('seguisym.ttf', 0), ('simsun.ttc', 0),
+                 ('simsunb.ttf', 0), ('mingliub.ttc', 0)],
+}
+
+# Noto CJK 的 ttc 中索引 2 为简体中文
+_LINUX_CANDIDATES: Dict[str, List[Tuple[str, int]]] = {
+    'regular': [('notosanscjk-regular.ttc', 2), ('notosanscjksc-regular.otf', 0),
+                ('wqy-microhei.ttc', 0), ('wqy-zenhei.ttc', 0),
+                ('droidsansfallbackfull.ttf', 0), ('dejavusans.ttf', 0)],
+    'bold': [('notosanscjk-bold.ttc', 2), ('notosanscjksc-bold.otf', 0),
+             ('wqy-microhei.ttc', 0), ('wqy-zenhei.ttc', 0),
+             ('dejavusans-bold.ttf', 0), ('dejavusans.ttf', 0)],
+    'fallback': [('notocoloremoji.ttf', 0), ('notoemoji-regular.ttf', 0), ('symbola.ttf', 0),
+                 ('notosanscjk-regular.ttc', 2), ('wqy-zenhei.ttc', 0),
+                 ('droidsansfallbackfull.ttf', 0), ('dejavusans.ttf', 0)],
+}
+
+_FONT_EXTS = ('.ttf', '.ttc', '.otf')
+
+# 一定不存在的码位，用于获取 .notdef 字形
+_NOTDEF_CHAR = '\uffff'
+
+
+def font_key(font: AnyFont) -> FontKey:
+    # 稳定的字体标识，供度量缓存使用，避免 id() 被回收后复用
+    try:
+        return font._vr_font_key
+    except AttributeError:
+        pass
+    path = getattr(font, 'path', None)
+    if not isinstance(path, str):
+        path = '<default>'
+    key = (path, int(getattr(font, 'size', 0) or 0), int(getattr(font, 'index', 0) or 0))
+    try:
+        font._vr_font_key = key
+    except AttributeError:
+        pass
+    return key
+
+
+def _font_dirs() -> List[str]:
+    if sys.platform == 'win32':
+        windir = os.environ.get('WINDIR', 'C:/Windows')
+        dirs = [os.path.join(windir, 'Fonts')]
+        local = os.environ.get('LOCALAPPDATA')
+        if local:
+            dirs.append(os.path.join(local, 'Microsoft', 'Windows', 'Fonts'))
+        return dirs
+    home = os.path.expanduser('~')
+    return [
+        '/usr/share/fonts',
+        '/usr/local/share/fonts',
+        os.path.join(home, '.local', 'share', 'fonts'),
+        os.path.join(home, '.fonts'),
+    ]
+
+
+def _scan_fonts(dirs: List[str]) -> Dict[str, str]:
+    # 文件名（小写） -> 完整路径
+    found: Dict[str, str] = {}
+    for base in dirs:
+        if not os.path.isdir(base):
+            continue
+        for root, _, files in os.walk(base):
+            for name in files:
+                lower = name.lower()
+                if lower.endswith(_FONT_EXTS) and lower not in found:
+                    found[lower] = os.path.join(root, name)
+    return found
+
+
+class FontManager:
+
+    def __init__(self, max_faces: int = 32, max_glyph_entries: int = 8192):
+        self.max_faces = max_faces
+        self.max_glyph_entries = max_glyph_entries
+        self._faces: 'OrderedDict[FontKey, ImageFont.FreeTypeFont]' = OrderedDict()
+        self._candidates: Optional[Dict[str, List[Tuple[str, int]]]] = None
+        # role -> 首个可加载的 (path, index)
+        self._resolved: Dict[str, Tuple[str, int]] = {}
+        self._defaults: Dict[int, AnyFont] = {}
+        self._fallbacks: Dict[int, List[ImageFont.FreeTypeFont]] = {}
+        # 字形覆盖缓存 (font_key, char) -> bool
+        self._glyph_cache: Dict[Tuple[FontKey, str], bool] = {}
+        self._notdef_cache: Dict[FontKey, Tuple[Tuple[int, int], bytes]] = {}
+        # 每个主字体的 字符 -> 实际使用字体
+        self._char_fonts: Dict[FontKey, Dict[str, AnyFont]] = {}
+        self._lock = threading.Lock()
+
+    # 字体发现
+    def discover(self) -> Dict[str, List[Tuple[str, int]]]:
+        if self._candidates is not None:
+            return self._candidates
+
+        table = _WINDOWS_CANDIDATES if sys.platform == 'win32' else _LINUX_CANDIDATES
+        found = _scan_fonts(_font_dirs())
+
+        candidates: Dict[str, List[Tuple[str, int]]] = {}
+        for role, names in table.items():
+            paths = []
+            for name, index in names:
+                path = found.get(name)
+                if path:
+                    paths.append((path, index))
+            candidates[role] = paths
+
+        # 兜底：任意可用字体
+        if not candidates['regular'] and found:
+            any_font = sorted(found.values())[0]
+            candidates['regular'] = [(any_font, 0)]
+        if not candidates['bold']:
+            candidates['bold'] = list(candidates['regular'])
+
+        self._candidates = candidates
+        return candidates
+
+    # 按 (path, size, index) 缓存字体
+    def get_face(self, path: str, size: int, index: int = 0) -> ImageFont.FreeTypeFont:
+        key = (path, size, index)
+        with self._lock:
+            face = self._faces.get(key)
+            if face is not None:
+                self._faces.move_to_end(key)
+                return face
+
+        face = ImageFont.truetype(path, size, index=index)
+
+        with self._lock:
+            self._faces[key] = face
+            while len(self._faces) > self.max_faces:
+                self._faces.popitem(last=False)
+        return face
+
+    def get(self, role: str, size: int) -> AnyFont:
+        # 已解析过的候选直接走 LRU，避免重复尝试加载失败的字体
+        resolved = self._resolved.get(role)
+        if resolved is not None:
+            try:
+                return self.get_face(resolved[0], size, resolved[1])
+            except Exception:
+                pass
+
+        for path, index in self.discover().get(role, []):
+            try:
+                font = self.get_face(path, size, index)
+            except Exception:
+                continue
+            self._resolved[role] = (path, index)
+            return font
+
+        return self._default_font(size)
+
+    def _default_font(self, size: int) -> AnyFont:
+        font = self._defaults.get(size)
+        if font is None:
+            try:
+                font = ImageFont.load_default(size)
+            except TypeError:
+                font = ImageFont.load_default()
+            self._defaults[size] = font
+        return font
+
+    def fallback_chain(self, size: int) -> List[ImageFont.FreeTypeFont]:
+        chain = self._fallbacks.get(size)
+        if chain is not None:
+            return chain
+
+        chain = []
+        for path, index in self.discover().get('fallback', []):
+            try:
+                chain.append(self.get_face(path, size, index))
+            except Exception:
+                # 彩色 emoji 字体只支持固定字号，加载失败则跳过
+                continue
+        self._fallbacks[size] = chain
+        return chain
+
+    # 字形覆盖检测
+    def has_glyph(self, font: AnyFont, char: str) -> bool:
+        if char.isspace() or not isinstance(font, ImageFont.FreeTypeFont):
+            return True
+
+        key = font_key(font)
+        cache_key = (key, char)
+        hit = self._glyph_cache.get(cache_key)
+        if hit is not None:
+            return hit
+
+        try:
+            notdef = self._notdef_cache.get(key)
+            if notdef is None:
+                mask = font.getmask(_NOTDEF_CHAR)
+                notdef = (mask.size, bytes(mask))
+                self._notdef_cache[key] = notdef
+            mask = font.getmask(char)
+            result = (mask.size, bytes(mask)) != notdef
+        except Exception:
+            result = False
+
+        if len(self._glyph_cache) >= self.max_glyph_entries:
+            self._glyph_cache.clear()
+        self._glyph_cache[cache_key] = result
+        return result
+
+    def font_for_char(self, char: str, font: AnyFont) -> AnyFont:
+        if ord(char) < 0x80:
+            return font
+        return self._char_map(font).get(char) or self._resolve_char(char, font)
+
+    def _char_map(self, font: AnyFont) -> Dict[str, AnyFont]:
+        key = font_key(font)
+        mapping = self._char_fonts.get(key)
+        if mapping is None or len(mapping) >= self.max_glyph_entries:
+            mapping = self._char_fonts[key] = {}
+        return mapping
+
+    def _resolve_char(self, char: str, font: AnyFont) -> AnyFont:
+        result = font
+        if not self.has_glyph(font, char):
+            for fallback in self.fallback_chain(font_key(font)[1]):
+                if self.has_glyph(fallback, char):
+                    result = fallback
+                    break
+        self._char_map(font)[char] = result
+        return result
+
+    # 按字体切分文本
+    def split_runs(self, text: str, font: AnyFont) -> List[Tuple[str, AnyFont]]:
+        if not text:
+            return []
+        if text.isascii():
+            return [(text, font)]
+
+        mapping = self._char_map(font)
+        runs: List[Tuple[str, AnyFont]] = []
+        start = 0
+        current = None
+        for i, ch in enumerate(text):
+            if ord(ch) < 0x80:
+                f = font
+            else:
+                f = mapping.get(ch) or self._resolve_char(ch, font)
+            if f is not current:
+                if current is not None:
+                    runs.append((text[start:i], current))
+                start = i
+                current = f
+        runs.append((text[start:], current))
+        return runs
+
+    def measure(self, text: str, font: AnyFont) -> int:
+        total = 0.0
+        for run, f in self.split_runs(text, font):
+            total += f.getlength(run)
+        return int(round(total))
+
+    def draw_text(self, draw: ImageDraw.ImageDraw, xy: Tuple[int, int], text: str,
+                  font: AnyFont, fill) -> int:
+        x, y = xy
+        runs = self.split_runs(text, font)
+        if len(runs) == 1 and runs[0][1] is font:
+            draw.text((x, y), text, font=font, fill=fill)
+            return int(round(font.getlength(text)))
+
+        start_x = x
+        for run, f in runs:
+            draw.text((x, y), run, font=f, fill=fill, embedded_color=f is not font)
+            x += f.getlength(run)
+        return int(round(x - start_x))
+
+
+_manager: Optional[FontManager] = None
+
+
+def get_font_manager() -> FontManager:
+    global _manager
+    if _manager is None:
+        _manager = FontManager()
+    return _manager
@@ -0,0 +1,254 @@
+import bisect
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+
+# 毫秒耗时的默认分桶上界
+MS_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 12, 16, 25, 33, 50, 100, 250)
+# 保留的快照数量，每秒一次约两小时
+HISTORY_SIZE = 7200
+
+
+# 热路径上只做属性自增，不加锁；+= 本身不是原子操作，安全是因为每个指标只有一个写线程
+class Counter:
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+
+class Gauge:
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    __slots__ = ('name', 'bounds', 'counts', 'count', 'total', 'max', 'window_max')
+
+    def __init__(self, name: str, bounds: Sequence[float] = MS_BUCKETS):
+        self.name = name
+        self.bounds = tuple(bounds)
+        # 最后一个桶收纳超过上界的值
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # 上次快照以来的最大值，由快照清零；与写线程竞争时最多漏记一个区间的一次观测
+        self.window_max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if value > self.window_max:
+            self.window_max = value
+
+    # 按桶上界估算分位数，不超过同一范围内观测到的最大值（默认为全程最大值）
+    def percentile(self, counts: List[int], pct: float, maximum: Optional[float] = None) -> float:
+        if maximum is None:
+            maximum = self.max
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = total * pct / 100
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return min(self.bounds[i], maximum) if i < len(self.bounds) else maximum
+        return maximum
+
+
+def _process_rss_kb() -> Optional[int]:
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ('cb', wintypes.DWORD),
+                    ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize // 1024
+            return None
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except Exception:
+        return None
+
+
+class MetricsRegistry:
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        # 只在创建指标时加锁
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Counter] = {}
+        self._gauges: Dict[str, Gauge] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        # 快照时才求值的指标（队列长度等）
+        self._callbacks: Dict[str, Callable[[], float]] = {}
+        self.history: deque = deque(maxlen=history_size)
+        self._last_time = time.time()
+        self._last_counters: Dict[str, int] = {}
+        self._last_buckets: Dict[str, List[int]] = {}
+        self._last_totals: Dict[str, float] = {}
+        self._started = self._last_time
+
+    def counter(self, name: str) -> Counter:
+        metric = self._counters.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._counters.setdefault(name, Counter(name))
+        return metric
+
+    def gauge(self, name: str) -> Gauge:
+        metric = self._gauges.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._gauges.setdefault(name, Gauge(name))
+        return metric
+
+    def histogram(self, name: str, bounds: Sequence[float] = MS_BUCKETS) -> Histogram:
+        metric = self._histograms.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._histograms.setdefault(name, Histogram(name, bounds))
+        return metric
+
+    def gauge_fn(self, name: str, fn: Callable[[], float]) -> None:
+        with self._lock:
+            self._callbacks[name] = fn
+
+    # 生成快照：计数器给出区间速率；直方图的平均、分位数与最大值均为区间值，count 为累计次数
+    def snapshot(self) -> dict:
+        now = time.time()
+        elapsed = max(now - self._last_time, 1e-6)
+        with self._lock:
+            counters = list(self._counters.values())
+            gauges = list(self._gauges.values())
+            histograms = list(self._histograms.values())
+            callbacks = list(self._callbacks.items())
+
+        counter_data = {}
+        for metric in counters:
+            value = metric.value
+            previous = self._last_counters.get(metric.name, 0)
+            self._last_counters[metric.name] = value
+            counter_data[metric.name] = {'value': value, 'rate': round((value - previous) / elapsed, 2)}
+
+        gauge_data = {metric.name: metric.value for metric in gauges}
+        for name, fn in callbacks:
+            try:
+                gauge_data[name] = fn()
+            except Exception:
+                pass
+        rss = _process_rss_kb()
+        if rss is not None:
+            gauge_data['process.rss_kb'] = rss
+
+        histogram_data = {}
+        for metric in histograms:
+            counts = list(metric.counts)
+            previous = self._last_buckets.get(metric.name) or [0] * len(counts)
+            self._last_buckets[metric.name] = counts
+            window = [a - b for a, b in zip(counts, previous)]
+            window_count = sum(window)
+            total = metric.total
+            window_total = total - self._last_totals.get(metric.name, 0.0)
+            self._last_totals[metric.name] = total
+            window_max = metric.window_max
+            metric.window_max = 0.0
+            histogram_data[metric.name] = {
+                'count': metric.count,
+                'mean': round(window_total / window_count, 3) if window_count else 0.0,
+                'p50': metric.percentile(window, 50, window_max),
+                'p90': metric.percentile(window, 90, window_max),
+                'p99': metric.percentile(window, 99, window_max),
+                'max': round(window_max, 3),
+            }
+
+        self._last_time = now
+        snap = {
+            'time': round(now, 3),
+            'uptime': round(now - self._started, 1),
+            'counters': counter_data,
+            'gauges': gauge_data,
+            'histograms': histogram_data,
+        }
+        self.history.append(snap)
+        return snap
+
+
+def _flatten(snap: dict) -> Dict[str, float]:
+    row = {'time': snap['time'], 'uptime': snap['uptime']}
+    for name, data in snap['counters'].items():
+        row[f'{name}'] = data['value']
+        row[f'{name}/s'] = data['rate']
+    for name, value in snap['gauges'].items():
+        row[name] = value
+    for name, data in snap['histograms'].items():
+        for key in ('p50', 'p90', 'p99', 'max'):
+            row[f'{name}.{key}'] = data[key]
+    return row
+
+
+# 导出为 JSON（完整快照列表）或 CSV（每个快照一行）
+def export_snapshots(path: str, snapshots: Iterable[dict]) -> str:
+    snapshots = list(snapshots)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    if path.endswith('.csv'):
+        rows = [_flatten(snap) for snap in snapshots]
+        columns: List[str] = []
+        for row in rows:
+            for key in row:
+                if key not in columns:
+                    columns.append(key)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(snapshots, f, ensure_ascii=False)
+    return path
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    return _registry
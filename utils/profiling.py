@@ -0,0 +1,289 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from .metrics import get_metrics
+
+
+# 分析结果输出目录
+PROFILE_DIR = "profiles"
+# 采样间隔（秒）
+SAMPLE_INTERVAL = 0.005
+# 采样时保留的最大栈深度
+MAX_STACK_DEPTH = 64
+
+# 线程名 -> 线程 ident，由各线程启动时登记
+_threads: Dict[str, int] = {}
+
+
+def register_thread(name: str) -> None:
+    _threads[name] = threading.get_ident()
+
+
+# 线程退出前调用；同名线程已重新登记时不影响新的 ident
+def unregister_thread(name: str) -> None:
+    if _threads.get(name) == threading.get_ident():
+        del _threads[name]
+
+
+def thread_ident(name: str) -> Optional[int]:
+    return _threads.get(name)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def capture_stack(ident: int, limit: int = MAX_STACK_DEPTH) -> List[str]:
+    frame = sys._current_frames().get(ident)
+    stack = []
+    while frame is not None and len(stack) < limit:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    # 由外向内
+    stack.reverse()
+    return stack
+
+
+def _output_path(name: str, ext: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    return os.path.join(PROFILE_DIR, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.{ext}")
+
+
+# cProfile 只统计调用 enable 的线程，因此由目标线程在检查点自行开启和关闭
+class ThreadProfiler:
+
+    def __init__(self, name: str):
+        self.name = name
+        # 只有状态需要切换时为 True，目标线程每轮只读这一个属性
+        self.pending = False
+        self._want = False
+        self._profile: Optional[cProfile.Profile] = None
+        self._done = threading.Event()
+        self.last_path: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    def start(self) -> None:
+        self._want = True
+        self.last_path = None
+        self._done.clear()
+        self.pending = True
+
+    # 目标线程未在超时内到达检查点时返回 None
+    def stop(self, timeout: float = 2.0) -> Optional[str]:
+        if not self._want:
+            return self.last_path
+        self._want = False
+        self._done.clear()
+        self.pending = True
+        if not self._done.wait(timeout):
+            return None
+        return self.last_path
+
+    # 在目标线程中调用
+    def checkpoint(self) -> None:
+        self.pending = False
+        if self._want:
+            if self._profile is None:
+                self._profile = cProfile.Profile()
+                self._profile.enable()
+            return
+        profile = self._profile
+        if profile is not None:
+            self._profile = None
+            profile.disable()
+            try:
+                path = _output_path(self.name, 'pstats')
+                profile.dump_stats(path)
+                self.last_path = os.path.abspath(path)
+            except Exception:
+                pass
+        # 开始后尚未到达检查点就被停止时没有结果，同样通知等待方
+        self._done.set()
+
+    # 目标线程退出前调用，仍在分析时写出结果
+    def finish(self) -> None:
+        if self._profile is not None:
+            self._want = False
+            self.checkpoint()
+
+
+# 定时采样目标线程的调用栈，输出 collapsed stack（flamegraph.pl / speedscope 可直接读取）
+class StackSampler:
+
+    def __init__(self, name: str, ident: int, interval: float = SAMPLE_INTERVAL):
+        self.name = name
+        self.ident = ident
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=f'Sampler-{self.name}', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            stack = capture_stack(self.ident)
+            if not stack:
+                continue
+            key = ';'.join(stack)
+            self._stacks[key] = self._stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def stop(self) -> Optional[str]:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+        try:
+            path = _output_path(self.name, 'collapsed')
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in sorted(self._stacks.items(), key=lambda item: -item[1]):
+                    f.write(f"{stack} {count}\n")
+            return os.path.abspath(path)
+        except Exception:
+            return None
+
+
+# 帧超时看门狗：帧耗时超过预算时由后台线程抓取当时的调用栈
+class FrameWatchdog:
+
+    def __init__(self, name: str, budget_ms: float = 50.0, keep: int = 50):
+        self.name = name
+        self.budget_ms = budget_ms
+        self.enabled = False
+        self.slow_frames: deque = deque(maxlen=keep)
+        self._ident: Optional[int] = None
+        self._frame_start = 0.0
+        self._frame_id = 0
+        self._captured_id = -1
+        self._captured_stack: List[str] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._counter = get_metrics().counter(f'{name}.slow_frames')
+
+    def enable(self, budget_ms: Optional[float] = None) -> None:
+        if budget_ms:
+            self.budget_ms = budget_ms
+        self.enabled = True
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f'Watchdog-{self.name}', daemon=True)
+            self._thread.start()
+
+    def disable(self) -> None:
+        self.enabled = False
+        self._stop.set()
+
+    # 在被监视线程中调用，仅在 enabled 时
+    def begin(self) -> None:
+        self._ident = threading.get_ident()
+        self._frame_id += 1
+        self._frame_start = time.perf_counter()
+
+    def end(self) -> None:
+        start = self._frame_start
+        self._frame_start = 0.0
+        if not start:
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        if elapsed <= self.budget_ms:
+            return
+        self._counter.inc()
+        stack = self._captured_stack if self._captured_id == self._frame_id else []
+        self.slow_frames.append({'time': time.time(), 'ms': round(elapsed, 2), 'stack': stack})
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.budget_ms / 2000):
+            start = self._frame_start
+            if not start or self._captured_id == self._frame_id:
+                continue
+            if (time.perf_counter() - start) * 1000 > self.budget_ms and self._ident:
+                frame_id = self._frame_id
+                self._captured_stack = capture_stack(self._ident)
+                self._captured_id = frame_id
+
+    def dump(self) -> Optional[str]:
+        if not self.slow_frames:
+            return None
+        try:
+            path = _output_path(f'{self.name}_slow_frames', 'txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                for entry in self.slow_frames:
+                    stamp = time.strftime('%H:%M:%S', time.localtime(entry['time']))
+                    f.write(f"{stamp} {entry['ms']}ms\n")
+                    for line in entry['stack']:
+                        f.write(f"    {line}\n")
+            return os.path.abspath(path)
+        except Exception:
+            return None
+
+
+# 分段计时：lap(name) 记录距上一次 lap 的耗时；未启用时调用方持有 None，不产生任何开销
+class SectionTimer:
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._registry = get_metrics()
+        self._histograms = {}
+        self._last = 0.0
+
+    def start(self) -> None:
+        self._last = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        now = time.perf_counter()
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = self._registry.histogram(f'{self.prefix}.{name}_ms')
+        histogram.observe((now - self._last) * 1000)
+        self._last = now
+
+
+_profilers: Dict[str, ThreadProfiler] = {}
+_samplers: Dict[str, StackSampler] = {}
+
+
+def thread_profiler(name: str) -> ThreadProfiler:
+    profiler = _profilers.get(name)
+    if profiler is None:
+        profiler = _profilers[name] = ThreadProfiler(name)
+    return profiler
+
+
+# mode: cprofile（目标线程需调用检查点）/ sample（外部采样，任何已登记线程均可）
+def start_profile(name: str, mode: str = 'cprofile') -> bool:
+    if mode == 'sample':
+        ident = thread_ident(name)
+        if ident is None or name in _samplers:
+            return False
+        sampler = _samplers[name] = StackSampler(name, ident)
+        sampler.start()
+        return True
+    thread_profiler(name).start()
+    return True
+
+
+def stop_profile(name: str) -> List[str]:
+    paths = []
+    sampler = _samplers.pop(name, None)
+    if sampler:
+        path = sampler.stop()
+        if path:
+            paths.append(path)
+    profiler = _profilers.get(name)
+    if profiler and (profiler.running or profiler.pending):
+        path = profiler.stop()
+        if path:
+            paths.append(path)
+    return paths
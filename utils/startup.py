@@ -0,0 +1,160 @@
+import builtins
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# 启动时间线，以本模块首次导入为零点（main.py 最先导入）
+_t0 = time.perf_counter()
+_marks: Dict[str, float] = {}
+_marks_lock = threading.Lock()
+
+# 窗口显示后在后台预加载的模块，按首次使用的先后排列
+PRELOAD_MODULES = (
+    'bilibili_api',
+    'bilibili.credential',
+    'bilibili.danmaku_client',
+    'ui.renderer',
+    'vr.texture',
+    'vr.overlay',
+)
+
+# 预加载完成后可以立即连接直播间
+READY_MARK = 'ready_to_connect'
+
+
+def mark(name: str) -> float:
+    elapsed = time.perf_counter() - _t0
+    with _marks_lock:
+        _marks.setdefault(name, elapsed)
+    return elapsed
+
+
+def marks() -> Dict[str, float]:
+    with _marks_lock:
+        return dict(_marks)
+
+
+def wait_for(name: str, timeout: Optional[float] = None) -> bool:
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    while name not in _marks:
+        if deadline is not None and time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class ImportProfiler:
+
+    def __init__(self):
+        # 模块名 -> (累计耗时, 自身耗时)
+        self.records: Dict[str, Tuple[float, float]] = {}
+        self._local = threading.local()
+        self._original = None
+
+    def install(self) -> None:
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original
+        try:
+            if level:
+                package = (globals or {}).get('__package__') or ''
+                full_name = importlib.util.resolve_name('.' * level + name, package)
+            else:
+                full_name = name
+        except Exception:
+            full_name = name
+        # 只统计首次加载
+        if full_name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - t0
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if full_name not in self.records:
+                self.records[full_name] = (elapsed, elapsed - children)
+
+    def top(self, count: int = 25, by_self: bool = False) -> List[Tuple[str, float, float]]:
+        key = (lambda item: item[1][1]) if by_self else (lambda item: item[1][0])
+        ordered = sorted(self.records.items(), key=key, reverse=True)
+        return [(name, total, own) for name, (total, own) in ordered[:count]]
+
+    def report(self, count: int = 25) -> str:
+        lines = [f"{'累计ms':>10} {'自身ms':>10}  模块"]
+        for name, total, own in self.top(count):
+            lines.append(f"{total * 1000:>10.1f} {own * 1000:>10.1f}  {name}")
+        return '\n'.join(lines)
+
+
+_profiler: Optional[ImportProfiler] = None
+
+
+def enable_import_profile() -> ImportProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = ImportProfiler()
+        _profiler.install()
+    return _profiler
+
+
+def get_import_profiler() -> Optional[ImportProfiler]:
+    return _profiler
+
+
+def report(count: int = 25) -> str:
+    lines = ['启动时间线 (ms):']
+    for name, elapsed in sorted(marks().items(), key=lambda item: item[1]):
+        lines.append(f"  {elapsed * 1000:>8.1f}  {name}")
+    if _profiler is not None:
+        lines.append('')
+        lines.append(_profiler.report(count))
+    return '\n'.join(lines)
+
+
+def preload_now(modules: Iterable[str] = PRELOAD_MODULES) -> Dict[str, float]:
+    timings = {}
+    for name in modules:
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+        timings[name] = time.perf_counter() - t0
+    mark(READY_MARK)
+    return timings
+
+
+# 窗口显示后在后台线程导入重依赖，用户点击时通常已加载完成
+def preload(modules: Iterable[str] = PRELOAD_MODULES,
+            on_done: Optional[Callable[[Dict[str, float]], None]] = None) -> threading.Thread:
+    def run():
+        timings = preload_now(modules)
+        if on_done:
+            try:
+                on_done(timings)
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=run, name='StartupPreload', daemon=True)
+    thread.start()
+    return thread
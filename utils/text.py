@@ -1,51 +1,155 @@
+import bisect
 import datetime
-from typing import List, Dict
+import re
+from collections import OrderedDict
+from typing import List, Optional
 
 from PIL import ImageDraw, ImageFont
 
+from .fonts import FontKey, font_key, get_font_manager
 
-# 字符宽度缓存，避免重复测量
-_char_width_cache: Dict[int, Dict[str, int]] = {}
 
+# 度量缓存 (字体标识, 片段) -> 宽度，LRU 限制大小
+_metric_cache: 'OrderedDict[tuple, float]' = OrderedDict()
+_METRIC_CACHE_SIZE = 8192
 
-def _get_char_width(char: str, font: ImageFont.FreeTypeFont, draw: ImageDraw.Draw) -> int:
-    font_id = id(font)
-    cache = _char_width_cache.get(font_id)
-    if cache is None:
-        cache = {}
-        _char_width_cache[font_id] = cache
-    
-    w = cache.get(char)
-    if w is None:
-        bbox = draw.textbbox((0, 0), char, font=font)
-        w = bbox[2] - bbox[0]
-        cache[char] = w
+# 换行结果缓存 (字体标识, 文本, 最大宽度) -> 行列表，同一条消息每帧都会重新布局
+_wrap_cache: 'OrderedDict[tuple, List[str]]' = OrderedDict()
+_WRAP_CACHE_SIZE = 2048
+
+# 禁则：不能出现在行首的标点
+_NO_LINE_START = frozenset(
+    '，。！？、；：”’）》」』】〉〕…—～·,.!?;:)]}%'
+    'ぁぃぅぇぉっゃゅょゎァィゥェォッャュョヮヵヶー々'
+)
+# 禁则：不能出现在行尾的标点
+_NO_LINE_END = frozenset('“‘（《「『【〈〔([{')
+
+# 分词：URL、拉丁单词/数字、空白，其余按单字切分
+_TOKEN_RE = re.compile(
+    r"(?:https?://|www\.)[^\s　-〿一-鿿＀-￯]+"
+    r"|[A-Za-z0-9][A-Za-z0-9_\-'./@#&+=%]*"
+    r"|\s+"
+    r"|.",
+    re.S,
+)
+
+
+def _advance(text: str, font: ImageFont.FreeTypeFont) -> float:
+    # 整段用 getlength 测量，回退字体的片段分别测量
+    return sum(f.getlength(run) for run, f in get_font_manager().split_runs(text, font))
+
+
+def measure_text(text: str, font: ImageFont.FreeTypeFont, fkey: Optional[FontKey] = None) -> float:
+    key = (fkey or font_key(font), text)
+    w = _metric_cache.get(key)
+    if w is not None:
+        _metric_cache.move_to_end(key)
+        return w
+
+    w = _advance(text, font)
+    _metric_cache[key] = w
+    if len(_metric_cache) > _METRIC_CACHE_SIZE:
+        _metric_cache.popitem(last=False)
     return w
 
 
-def wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int, draw: ImageDraw.Draw) -> List[str]:
+def _split_units(text: str) -> List[str]:
+    # 切分为不可拆分的单元，并按禁则把标点粘到相邻单元上
+    units: List[str] = []
+    glue_next = False
+    for m in _TOKEN_RE.finditer(text):
+        tok = m.group()
+        if glue_next and units:
+            units[-1] += tok
+            glue_next = tok in _NO_LINE_END
+            continue
+        if units and tok[0] in _NO_LINE_START and not units[-1].isspace():
+            units[-1] += tok
+        else:
+            units.append(tok)
+        glue_next = tok in _NO_LINE_END
+    return units
+
+
+def _hard_break(unit: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
+    # 单元本身超宽时按字符强制断行，前缀和 + 二分查找断点
+    fkey = font_key(font)
+    prefix = [0.0]
+    for ch in unit:
+        prefix.append(prefix[-1] + measure_text(ch, font, fkey))
+
+    parts = []
+    start = 0
+    n = len(unit)
+    while start < n:
+        end = bisect.bisect_right(prefix, prefix[start] + max_width, start + 1) - 1
+        if end <= start:
+            end = start + 1
+        parts.append(unit[start:end])
+        start = end
+    return parts
+
+
+def wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int,
+              draw: Optional[ImageDraw.ImageDraw] = None) -> List[str]:
     if not text:
         return []
-    
-    lines = []
-    current_line = ""
-    current_width = 0
-    
-    for char in text:
-        char_w = _get_char_width(char, font, draw)
-        
-        if current_width + char_w <= max_width:
-            current_line += char
-            current_width += char_w
+
+    key = (font_key(font), text, max_width)
+    lines = _wrap_cache.get(key)
+    if lines is not None:
+        _wrap_cache.move_to_end(key)
+        return lines
+
+    lines = _break_lines(text, font, max_width)
+    _wrap_cache[key] = lines
+    if len(_wrap_cache) > _WRAP_CACHE_SIZE:
+        _wrap_cache.popitem(last=False)
+    return lines
+
+
+def _break_lines(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
+    fkey = font_key(font)
+    units: List[str] = []
+    widths: List[float] = []
+    for unit in _split_units(text):
+        w = measure_text(unit, font, fkey)
+        if w > max_width and len(unit) > 1:
+            # 单元本身超宽，预先按字符拆开
+            for part in _hard_break(unit, font, max_width):
+                units.append(part)
+                widths.append(measure_text(part, font, fkey))
         else:
-            if current_line:
-                lines.append(current_line)
-            current_line = char
-            current_width = char_w
-    
-    if current_line:
-        lines.append(current_line)
-    
+            units.append(unit)
+            widths.append(w)
+
+    prefix = [0.0]
+    for w in widths:
+        prefix.append(prefix[-1] + w)
+
+    # 整段放得下，直接返回
+    if prefix[-1] <= max_width:
+        return [text]
+
+    lines: List[str] = []
+    n = len(units)
+    i = 0
+    while i < n:
+        # 行首跳过空白
+        while i < n and units[i].isspace():
+            i += 1
+        if i >= n:
+            break
+
+        end = bisect.bisect_right(prefix, prefix[i] + max_width, i + 1) - 1
+        if end <= i:
+            end = i + 1
+        line = ''.join(units[i:end]).rstrip()
+        if line:
+            lines.append(line)
+        i = end
+
     return lines
 
 
@@ -1,3 +1,25 @@
 # VR
-from .overlay import VROverlay
-from .controller import VRControllerInput
+# 后端依赖 PIL，OpenVR 后端还依赖 openvr / glfw / OpenGL，均在首次使用时导入
+_LAZY = {
+    'OverlayBackend': 'backend',
+    'NullOverlayBackend': 'backend',
+    'FileOverlayBackend': 'backend',
+    'SharedMemoryOverlayBackend': 'backend',
+    'create_overlay_backend': 'backend',
+    'BACKENDS': 'backend',
+    'VROverlay': 'overlay',
+    'VRControllerInput': 'controller',
+    'DeviceRegistry': 'devices',
+    'VRInitializer': 'initializer',
+    'is_steamvr_running': 'steamvr',
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,286 @@
+import os
+import struct
+import time
+from typing import Callable, Optional
+
+from PIL import Image
+
+from utils.metrics import get_metrics
+
+
+# 帧转储默认目录
+DUMP_DIR = "overlay_frames"
+# 共享内存帧头：序号、宽、高、时间戳
+SHM_HEADER = struct.Struct('<QIId')
+
+
+def _frame_bytes(img, width: int, height: int) -> memoryview:
+    # 统一为按 GL 行序排列的 RGBA 缓冲区
+    if isinstance(img, Image.Image):
+        return memoryview(img.transpose(Image.FLIP_TOP_BOTTOM).tobytes())
+    return memoryview(img)[:width * height * 4]
+
+
+class OverlayBackend:
+    name = "base"
+
+    def __init__(self, width: int = 450, height: int = 400):
+        self.width = width
+        self.height = height
+        self.visible = True
+        self.config = {}
+        self.frames = 0
+        self.last_upload_ms = 0.0
+        self._init_error = ""
+        # 纹理显示区域 (u_min, v_min, u_max, v_max)，v 自图像顶部向下
+        self.bounds = (0.0, 0.0, 1.0, 1.0)
+        self.bounds_updates = 0
+        # 合成器刷新率，用于驱动纹理边界动画
+        self.display_frequency = 90.0
+        self._on_toggle_callback: Optional[Callable] = None
+        # left, right, always_on
+        self.toggle_hand = "left"
+        # 指标名前缀，分离的面板使用自己的前缀
+        self.metrics_prefix = "overlay"
+        self._upload_hist = None
+        self._frame_counter = None
+        # 上传分段计时，None 表示关闭
+        self.sections = None
+        # 回看滚动输入：pointer（激光指针滚轮）、stick（摇杆）、off
+        self.scroll_input = "pointer"
+        # 累计的滚动行数（正值向更早的消息）与摇杆滚动速度（行/秒）
+        self._scroll_lines = 0.0
+        self.scroll_velocity = 0.0
+        self._scroll_home = False
+
+    def init(self) -> bool:
+        return True
+
+    # 不依赖运行时的本地准备（图形上下文、纹理），在调用 init 的线程上执行
+    def prepare(self) -> bool:
+        return True
+
+    # 等待运行时就绪，可在其他线程与 prepare 并行；cancel 置位时应尽快返回
+    def wait_until_ready(self, cancel=None, on_progress: Optional[Callable[[str, str], None]] = None) -> bool:
+        return True
+
+    # 完整应用；增量更新时按变化的配置项只调用对应的一项
+    def apply_config(self, config: dict) -> None:
+        self.apply_width(config)
+        self.apply_alpha(config)
+        self.apply_transform(config)
+
+    def apply_width(self, config: dict) -> None:
+        self.config = config
+
+    def apply_alpha(self, config: dict) -> None:
+        self.config = config
+
+    def apply_transform(self, config: dict) -> None:
+        self.config = config
+
+    def resize(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+
+    # img 为 PIL 图像或按 GL 行序排列的 RGBA 缓冲区；rect 为 GL 坐标下的脏区域
+    def update_texture(self, img, rect=None) -> None:
+        t0 = time.perf_counter()
+        if self.sections:
+            self.sections.start()
+        self.submit(img, rect)
+        if self.sections:
+            self.sections.lap('submit')
+        self.frames += 1
+        self.last_upload_ms = (time.perf_counter() - t0) * 1000
+        self._record_upload(self.last_upload_ms)
+
+    def _record_upload(self, ms: float) -> None:
+        if self._upload_hist is None:
+            registry = get_metrics()
+            self._upload_hist = registry.histogram(self.metrics_prefix + '.upload_ms')
+            self._frame_counter = registry.counter(self.metrics_prefix + '.frames')
+        self._upload_hist.observe(ms)
+        self._frame_counter.inc()
+
+    def submit(self, img, rect=None) -> None:
+        pass
+
+    def set_texture_bounds(self, u_min: float, v_min: float, u_max: float, v_max: float) -> None:
+        self.bounds = (u_min, v_min, u_max, v_max)
+        self.bounds_updates += 1
+
+    def show(self) -> None:
+        self.visible = True
+
+    def hide(self) -> None:
+        self.visible = False
+
+    # 开关隐藏
+    def toggle(self) -> None:
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    # 输入
+    def on_toggle(self, callback: Callable) -> None:
+        self._on_toggle_callback = callback
+
+    def set_toggle_hand(self, hand: str) -> None:
+        self.toggle_hand = hand
+
+    def has_controller(self) -> bool:
+        return False
+
+    def poll_input(self) -> None:
+        pass
+
+    def set_scroll_input(self, mode: str) -> None:
+        self.scroll_input = mode
+        self.scroll_velocity = 0.0
+
+    def add_scroll(self, lines: float) -> None:
+        self._scroll_lines += lines
+
+    # 回到最新消息
+    def request_scroll_home(self) -> None:
+        self._scroll_home = True
+
+    # 取走上次调用以来的滚动输入，返回 (行数, 是否回到最新)
+    def take_scroll(self, dt: float) -> tuple:
+        lines = self._scroll_lines + self.scroll_velocity * dt
+        home = self._scroll_home
+        self._scroll_lines = 0.0
+        self._scroll_home = False
+        return lines, home
+
+    # 额外的叠加层（如分离的 SC 面板），共享同一后端连接；不支持时返回 None
+    def create_panel(self, name: str, width: int, height: int) -> Optional['OverlayBackend']:
+        return None
+
+    # 可从任意线程调用：打断初始化中的等待与重试，不释放资源
+    def interrupt(self) -> None:
+        pass
+
+    # 在调用 init 的线程上释放资源（纹理、图形上下文、运行时连接）
+    def shutdown(self) -> None:
+        pass
+
+
+# 无头后端：只计数，用于在无头显的机器上跑完整管线
+class NullOverlayBackend(OverlayBackend):
+    name = "null"
+
+    def __init__(self, width: int = 450, height: int = 400):
+        super().__init__(width, height)
+        self.bytes_submitted = 0
+
+    def submit(self, img, rect=None) -> None:
+        if rect:
+            self.bytes_submitted += rect[2] * rect[3] * 4
+        else:
+            self.bytes_submitted += self.width * self.height * 4
+
+    def create_panel(self, name: str, width: int, height: int) -> Optional[OverlayBackend]:
+        return NullOverlayBackend(width, height)
+
+
+# 将帧保存为 PNG，便于检查渲染结果
+class FileOverlayBackend(OverlayBackend):
+    name = "file"
+
+    def __init__(self, width: int = 450, height: int = 400,
+                 output_dir: str = DUMP_DIR, every: int = 1):
+        super().__init__(width, height)
+        self.output_dir = output_dir
+        self.every = max(1, every)
+
+    def init(self) -> bool:
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            return True
+        except Exception as e:
+            self._init_error = str(e)
+            return False
+
+    def submit(self, img, rect=None) -> None:
+        if self.frames % self.every:
+            return
+        data = _frame_bytes(img, self.width, self.height)
+        frame = Image.frombuffer('RGBA', (self.width, self.height), data, 'raw', 'RGBA', 0, -1)
+        path = os.path.join(self.output_dir, f"frame_{self.frames:06d}.png")
+        frame.save(path, compress_level=1)
+
+    def create_panel(self, name: str, width: int, height: int) -> Optional[OverlayBackend]:
+        panel = FileOverlayBackend(width, height, os.path.join(self.output_dir, name), self.every)
+        return panel if panel.init() else None
+
+
+# 写入命名共享内存，供外部进程（预览、录制）读取
+class SharedMemoryOverlayBackend(OverlayBackend):
+    name = "shm"
+
+    def __init__(self, width: int = 450, height: int = 400,
+                 shm_name: str = "vr_danmaku_frame", capacity: int = 1280 * 1136 * 4):
+        super().__init__(width, height)
+        self.shm_name = shm_name
+        self.capacity = capacity
+        self._shm = None
+
+    def init(self) -> bool:
+        from multiprocessing import shared_memory
+        try:
+            self._shm = shared_memory.SharedMemory(
+                name=self.shm_name, create=True, size=SHM_HEADER.size + self.capacity
+            )
+        except FileExistsError:
+            # 上次异常退出残留的同名共享内存，直接复用
+            try:
+                self._shm = shared_memory.SharedMemory(name=self.shm_name)
+            except Exception as e:
+                self._init_error = str(e)
+                return False
+        except Exception as e:
+            self._init_error = str(e)
+            return False
+        return True
+
+    def submit(self, img, rect=None) -> None:
+        size = self.width * self.height * 4
+        if self._shm is None or size > self.capacity:
+            return
+        data = _frame_bytes(img, self.width, self.height)
+        buf = self._shm.buf
+        buf[SHM_HEADER.size:SHM_HEADER.size + size] = data
+        # 最后写帧头，读取方以序号变化判断新帧
+        SHM_HEADER.pack_into(buf, 0, self.frames + 1, self.width, self.height, time.time())
+
+    def create_panel(self, name: str, width: int, height: int) -> Optional[OverlayBackend]:
+        panel = SharedMemoryOverlayBackend(width, height, f"{self.shm_name}_{name}", self.capacity)
+        return panel if panel.init() else None
+
+    def shutdown(self) -> None:
+        if self._shm is not None:
+            try:
+                self._shm.close()
+                self._shm.unlink()
+            except Exception:
+                pass
+            self._shm = None
+
+
+BACKENDS = ("openvr", "null", "file", "shm")
+
+
+def create_overlay_backend(name: str = "openvr", width: int = 450, height: int = 400,
+                           **options) -> OverlayBackend:
+    if name == "null":
+        return NullOverlayBackend(width, height)
+    if name == "file":
+        return FileOverlayBackend(width, height, **options)
+    if name == "shm":
+        return SharedMemoryOverlayBackend(width, height, **options)
+    # OpenVR 依赖 openvr / glfw / OpenGL，只在需要时导入
+    from .overlay import VROverlay
+    return VROverlay(width, height)
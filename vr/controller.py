@@ -1,71 +1,105 @@
+import math
 import time
 from typing import Callable, Optional
 
 import openvr
 
+from .devices import DeviceRegistry, INVALID_INDEX
+
+
+# 摇杆回看：死区与满推时的滚动速度（行/秒）
+STICK_DEADZONE = 0.3
+STICK_SPEED = 12.0
+# 按键以事件为准，读取手柄状态兜底的最小间隔（秒）；摇杆回看时每帧读取
+STATE_FALLBACK_INTERVAL = 0.5
+
 
 class VRControllerInput:
-    
-    def __init__(self, vr_system: openvr.IVRSystem):
+
+    def __init__(self, vr_system: openvr.IVRSystem, registry: Optional[DeviceRegistry] = None):
         self.vr_system = vr_system
+        # 设备表由事件维护，查找手柄为 O(1)
+        self.registry = registry or DeviceRegistry(vr_system)
+        self.registry.add_button_listener(self._on_button)
         self.grip_was_pressed = False
         self.last_toggle_time = 0
         self.toggle_cooldown = 0.5
         self._on_toggle_callback: Optional[Callable] = None
         # left, right, always_on
-        self.toggle_hand = "left"  
+        self.toggle_hand = "left"
         self._controller_found = False
-    
+        # 摇杆滚动回看，摇杆输入同时会传给游戏，默认关闭
+        self.stick_scroll = False
+        self.scroll_velocity = 0.0
+        self._last_state_poll = 0.0
+
     def on_toggle(self, callback: Callable) -> None:
         self._on_toggle_callback = callback
-    
+
     def set_toggle_hand(self, hand: str) -> None:
         self.toggle_hand = hand
-    
-    def _find_controller(self, role: int) -> int:
-        for i in range(openvr.k_unMaxTrackedDeviceCount):
-            if self.vr_system.getTrackedDeviceClass(i) != openvr.TrackedDeviceClass_Controller:
-                continue
-            if self.vr_system.getControllerRoleForTrackedDeviceIndex(i) == role:
-                return i
-        return openvr.k_unTrackedDeviceIndexInvalid
-    
+        self.grip_was_pressed = False
+
+    def _target_index(self) -> int:
+        role = (openvr.TrackedControllerRole_LeftHand
+                if self.toggle_hand == "left"
+                else openvr.TrackedControllerRole_RightHand)
+        return self.registry.index_for_role(role)
+
     def has_controller(self) -> bool:
-        left = self._find_controller(openvr.TrackedControllerRole_LeftHand)
-        right = self._find_controller(openvr.TrackedControllerRole_RightHand)
-        return left != openvr.k_unTrackedDeviceIndexInvalid or right != openvr.k_unTrackedDeviceIndexInvalid
-    
+        return self.registry.has_controller()
+
+    def _grip(self, pressed: bool) -> None:
+        if pressed and not self.grip_was_pressed:
+            now = time.time()
+            if now - self.last_toggle_time > self.toggle_cooldown:
+                self.last_toggle_time = now
+                if self._on_toggle_callback:
+                    self._on_toggle_callback()
+        self.grip_was_pressed = pressed
+
+    # 事件队列中的按键，不会因为轮询间隔错过短按
+    def _on_button(self, event_type: int, index: int, button: int) -> None:
+        if self.toggle_hand == "always_on" or button != openvr.k_EButton_Grip:
+            return
+        if index != self._target_index():
+            return
+        self._grip(event_type == openvr.VREvent_ButtonPress)
+
     def poll(self) -> None:
-        # 常开模式
-        if self.toggle_hand == "always_on":
+        self.registry.poll_events()
+
+        self.scroll_velocity = 0.0
+        # 常开模式不处理握把，只在开启摇杆回看时读取手柄
+        always_on = self.toggle_hand == "always_on"
+        if always_on and not self.stick_scroll:
             return
-        
-        now = time.time()
-        target_role = (openvr.TrackedControllerRole_LeftHand 
-                       if self.toggle_hand == "left" 
-                       else openvr.TrackedControllerRole_RightHand)
-        
-        controller_idx = self._find_controller(target_role)
-        
+
+        controller_idx = self._target_index()
+
         # 未找到手柄
-        if controller_idx == openvr.k_unTrackedDeviceIndexInvalid:
+        if controller_idx == INVALID_INDEX:
             if self._controller_found:
                 self._controller_found = False
             return
-        
+
         if not self._controller_found:
             self._controller_found = True
-        
+
+        # 叠加层应用不一定收到按键事件，按间隔读一次状态兜底
+        if not self.stick_scroll:
+            now = time.monotonic()
+            if now - self._last_state_poll < STATE_FALLBACK_INTERVAL:
+                return
+            self._last_state_poll = now
         result, state = self.vr_system.getControllerState(controller_idx)
         if not result:
             return
-        
-        grip_pressed = bool(state.ulButtonPressed & (1 << openvr.k_EButton_Grip))
-        
-        if grip_pressed and not self.grip_was_pressed:
-            if now - self.last_toggle_time > self.toggle_cooldown:
-                self.last_toggle_time = now
-                if self._on_toggle_callback:
-                    self._on_toggle_callback()
-        
-        self.grip_was_pressed = grip_pressed
+
+        if not always_on:
+            self._grip(bool(state.ulButtonPressed & (1 << openvr.k_EButton_Grip)))
+        if self.stick_scroll:
+            # 向上推查看更早的消息
+            y = state.rAxis[0].y
+            if abs(y) > STICK_DEADZONE:
+                self.scroll_velocity = (y - math.copysign(STICK_DEADZONE, y)) / (1 - STICK_DEADZONE) * STICK_SPEED
@@ -0,0 +1,108 @@
+import threading
+from typing import Callable, Dict, List
+
+import openvr
+
+
+INVALID_INDEX = openvr.k_unTrackedDeviceIndexInvalid
+
+# 会改变设备表的事件
+_DEVICE_EVENTS = (
+    openvr.VREvent_TrackedDeviceActivated,
+    openvr.VREvent_TrackedDeviceDeactivated,
+    openvr.VREvent_TrackedDeviceRoleChanged,
+    openvr.VREvent_TrackedDeviceUpdated,
+)
+_BUTTON_EVENTS = (openvr.VREvent_ButtonPress, openvr.VREvent_ButtonUnpress)
+
+
+class DeviceRegistry:
+
+    def __init__(self, vr_system, event_factory: Callable = openvr.VREvent_t):
+        self.vr_system = vr_system
+        self._event = event_factory()
+        self._lock = threading.Lock()
+        # 设备索引 -> 设备类型，角色 -> 手柄索引
+        self._classes: Dict[int, int] = {}
+        self._roles: Dict[int, int] = {}
+        # (event_type, device_index, button)
+        self._button_listeners: List[Callable[[int, int, int], None]] = []
+        # 设备表每次变化递增，供使用方判断是否需要重新绑定
+        self.generation = 0
+        self.rescans = 0
+        self.rescan()
+
+    # 完整扫描一次设备槽位，只在启动和角色整体变化时调用
+    def rescan(self) -> None:
+        classes = {}
+        roles = {}
+        for i in range(openvr.k_unMaxTrackedDeviceCount):
+            device_class = self.vr_system.getTrackedDeviceClass(i)
+            if device_class == openvr.TrackedDeviceClass_Invalid:
+                continue
+            classes[i] = device_class
+            if device_class == openvr.TrackedDeviceClass_Controller:
+                role = self.vr_system.getControllerRoleForTrackedDeviceIndex(i)
+                roles.setdefault(role, i)
+        with self._lock:
+            self._classes = classes
+            self._roles = roles
+            self.generation += 1
+        self.rescans += 1
+
+    def _update_device(self, index: int) -> None:
+        device_class = self.vr_system.getTrackedDeviceClass(index)
+        with self._lock:
+            self.generation += 1
+            for role, idx in list(self._roles.items()):
+                if idx == index:
+                    del self._roles[role]
+            if device_class == openvr.TrackedDeviceClass_Invalid:
+                self._classes.pop(index, None)
+                return
+            self._classes[index] = device_class
+            if device_class == openvr.TrackedDeviceClass_Controller:
+                role = self.vr_system.getControllerRoleForTrackedDeviceIndex(index)
+                self._roles.setdefault(role, index)
+
+    def _remove_device(self, index: int) -> None:
+        with self._lock:
+            self.generation += 1
+            self._classes.pop(index, None)
+            for role, idx in list(self._roles.items()):
+                if idx == index:
+                    del self._roles[role]
+
+    def index_for_role(self, role: int) -> int:
+        return self._roles.get(role, INVALID_INDEX)
+
+    def has_controller(self) -> bool:
+        return (openvr.TrackedControllerRole_LeftHand in self._roles
+                or openvr.TrackedControllerRole_RightHand in self._roles)
+
+    def add_button_listener(self, callback: Callable[[int, int, int], None]) -> None:
+        self._button_listeners.append(callback)
+
+    # 取空事件队列：设备事件更新缓存，按键事件分发给监听者
+    def poll_events(self) -> int:
+        event = self._event
+        count = 0
+        while self.vr_system.pollNextEvent(event):
+            count += 1
+            event_type = event.eventType
+            index = event.trackedDeviceIndex
+            if event_type in _BUTTON_EVENTS:
+                button = event.data.controller.button
+                for callback in self._button_listeners:
+                    try:
+                        callback(event_type, index, button)
+                    except Exception:
+                        pass
+            elif event_type == openvr.VREvent_TrackedDeviceDeactivated:
+                self._remove_device(index)
+            elif event_type == openvr.VREvent_TrackedDeviceRoleChanged:
+                # 角色变化事件不一定携带设备索引，左右手可能同时交换
+                self.rescan()
+            elif event_type in _DEVICE_EVENTS:
+                self._update_device(index)
+        return count
@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .backend import OverlayBackend
+
+
+# 并行初始化：运行时检测、图形上下文与渲染预热同时进行，全部就绪后再连接
+class VRInitializer:
+
+    def __init__(self, backend: OverlayBackend,
+                 on_progress: Optional[Callable[[str, str], None]] = None):
+        self.backend = backend
+        self.on_progress = on_progress
+        self.cancel = threading.Event()
+        self._tasks: List[Tuple[str, Callable[[], None]]] = []
+        # 阶段 -> 耗时（秒），相对 run 开始
+        self.timings: Dict[str, float] = {}
+        self.error = ""
+
+    # 与检测并行执行的准备工作（字体加载、渲染预热），异常只记录不影响初始化
+    def add_task(self, name: str, fn: Callable[[], None]) -> None:
+        self._tasks.append((name, fn))
+
+    def _progress(self, stage: str, detail: str) -> None:
+        if self.on_progress:
+            try:
+                self.on_progress(stage, detail)
+            except Exception:
+                pass
+
+    def _run_task(self, name: str, fn: Callable[[], None], t0: float) -> None:
+        try:
+            fn()
+        except Exception:
+            pass
+        self.timings[name] = time.perf_counter() - t0
+
+    def run(self) -> bool:
+        t0 = time.perf_counter()
+        backend = self.backend
+        ready = {}
+
+        def detect():
+            ready['ok'] = backend.wait_until_ready(self.cancel, self._progress)
+            self.timings['runtime'] = time.perf_counter() - t0
+
+        self._progress('detecting', '检测 SteamVR...')
+        detector = threading.Thread(target=detect, name='VRDetect', daemon=True)
+        detector.start()
+        workers = [threading.Thread(target=self._run_task, args=(name, fn, t0), name=f'VRInit-{name}', daemon=True)
+                   for name, fn in self._tasks]
+        for worker in workers:
+            worker.start()
+
+        # 图形上下文绑定在当前线程，必须在这里创建
+        self._progress('preparing', '准备渲染上下文...')
+        prepared = backend.prepare()
+        self.timings['prepare'] = time.perf_counter() - t0
+        if not prepared:
+            # 先取错误信息再取消检测，检测线程被打断后会覆盖 _init_error；不等待检测结束
+            self.error = backend._init_error or '渲染上下文创建失败'
+            self.cancel.set()
+            self._progress('failed', self.error)
+            return False
+
+        detector.join()
+        if not ready.get('ok'):
+            self.cancel.set()
+            self.error = backend._init_error or 'SteamVR 未运行'
+            self._progress('failed', self.error)
+            return False
+
+        self._progress('connecting', '连接 SteamVR...')
+        if not backend.init():
+            self.error = backend._init_error or '未知错误'
+            self._progress('failed', self.error)
+            return False
+        self.timings['connect'] = time.perf_counter() - t0
+
+        if any(worker.is_alive() for worker in workers):
+            self._progress('warming', '加载字体...')
+        for worker in workers:
+            worker.join()
+        self.timings['ready'] = time.perf_counter() - t0
+        self._progress('ready', f"{self.timings['ready'] * 1000:.0f}ms")
+        return True
@@ -1,105 +1,165 @@
 import ctypes
 import math
-import subprocess
+import threading
 import time
-from typing import Optional
+from typing import Callable, Optional
 
 import openvr
-from OpenGL import GL
 import glfw
 from PIL import Image
 
+from . import steamvr
+from .backend import OverlayBackend
+from .controller import VRControllerInput
+from .devices import DeviceRegistry
+from .texture import TextureStreamer
 
-class VROverlay:
+
+# 激光指针滚轮每单位对应的回看行数
+POINTER_SCROLL_LINES = 3.0
+
+
+class VROverlay(OverlayBackend):
+    name = "openvr"
     
-    def __init__(self, width: int = 450, height: int = 400):
-        self.width = width
-        self.height = height
+    def __init__(self, width: int = 450, height: int = 400,
+                 key: str = "vr_bili_danmaku", title: str = "VR Bilibili Danmaku",
+                 parent: Optional['VROverlay'] = None):
+        super().__init__(width, height)
+        self.key = key
+        self.title = title
+        # 面板共享主叠加层的 OpenVR 连接与 GL 上下文
+        self.parent = parent
         self.vr_system: Optional[openvr.IVRSystem] = None
         self.overlay: Optional[openvr.IVROverlay] = None
         self.overlay_handle: Optional[int] = None
         self.texture_id: Optional[int] = None
-        self.visible = True
-        self.config = {}
+        self.streamer = TextureStreamer()
+        self._texture: Optional[openvr.Texture_t] = None
+        self.controller: Optional[VRControllerInput] = None
+        self.devices: Optional[DeviceRegistry] = None
+        self._device_generation = 0
+        self._window = None
+        self._runtime_ready = False
+        # 关闭时打断等待与重试
+        self._cancel = threading.Event()
     
     def init(self) -> bool:
-        # OpenGL 初始化
+        if self.parent:
+            return self._init_panel()
+        
+        if not self.prepare():
+            return False
+        if not self._runtime_ready and not self.wait_until_ready():
+            return False
+        return self._connect()
+    
+    # OpenGL 上下文与纹理不依赖 SteamVR，可与运行时检测并行；上下文绑定在调用线程
+    def prepare(self) -> bool:
+        if self._window:
+            return True
         if not glfw.init():
+            self._init_error = "OpenGL 初始化失败"
             return False
         
         glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
         window = glfw.create_window(self.width, self.height, "", None, None)
         if not window:
+            self._init_error = "OpenGL 初始化失败"
             return False
         
         glfw.make_context_current(window)
-        self.texture_id = GL.glGenTextures(1)
-        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture_id)
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
-        
-        # OpenVR 初始化
-        max_retries = 3
-        retry_delay = 2.0
-        last_error = ""
-        
-        for attempt in range(max_retries):
-            # 检查 SteamVR 进程是否存在
-            if not self._is_steamvr_running():
-                last_error = "SteamVR 未运行"
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                continue
-            
+        self._window = window
+        self.texture_id = self.streamer.create()
+        self.streamer.allocate(self.width, self.height)
+        return True
+    
+    # 进程内探测 SteamVR，按退避间隔等待，shutdown 可随时打断
+    def wait_until_ready(self, cancel: Optional[threading.Event] = None,
+                         on_progress: Optional[Callable[[str, str], None]] = None,
+                         timeout: float = steamvr.READY_TIMEOUT) -> bool:
+        if self._runtime_ready:
+            return True
+        cancel = cancel or self._cancel
+        if steamvr.wait_for_steamvr(cancel, timeout, on_progress):
+            self._runtime_ready = True
+            return True
+        self._init_error = "已取消" if cancel.is_set() else "SteamVR 未运行"
+        return False
+    
+    def _connect(self, timeout: float = 10.0) -> bool:
+        # 服务进程刚启动时 openvr.init 可能暂时失败，退避重试
+        backoff = steamvr.Backoff(0.1, 1.0)
+        deadline = time.perf_counter() + timeout
+        while not self._cancel.is_set():
             try:
                 self.vr_system = openvr.init(openvr.VRApplication_Overlay)
                 self.overlay = openvr.IVROverlay()
-                self.overlay_handle = self.overlay.createOverlay(
-                    "vr_bili_danmaku", "VR Bilibili Danmaku"
-                )
+                self.overlay_handle = self.overlay.createOverlay(self.key, self.title)
                 self.overlay.showOverlay(self.overlay_handle)
+                self._read_display_frequency()
+                self.devices = DeviceRegistry(self.vr_system)
+                self.controller = VRControllerInput(self.vr_system, self.devices)
+                self.controller.on_toggle(self._fire_toggle)
+                self.controller.set_toggle_hand(self.toggle_hand)
                 return True
-            except openvr.OpenVRError as e:
-                last_error = str(e)
-                # 如果是残留状态，先 shutdown 再重试
-                try:
-                    openvr.shutdown()
-                except Exception:
-                    pass
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
             except Exception as e:
-                last_error = str(e)
+                self._init_error = str(e)
+                self.vr_system = None
+                # 如果是残留状态，先 shutdown 再重试
                 try:
                     openvr.shutdown()
                 except Exception:
                     pass
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-        
-        self._init_error = last_error
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._cancel.wait(min(backoff.next(), remaining))
         return False
     
-    def _is_steamvr_running(self) -> bool:
+    def _read_display_frequency(self) -> None:
         try:
-            result = subprocess.run(
-                ['tasklist', '/FI', 'IMAGENAME eq vrserver.exe', '/NH'],
-                capture_output=True, text=True, timeout=5,
-                creationflags=0x08000000  # CREATE_NO_WINDOW
+            freq = self.vr_system.getFloatTrackedDeviceProperty(
+                openvr.k_unTrackedDeviceIndex_Hmd, openvr.Prop_DisplayFrequency_Float
             )
-            return 'vrserver.exe' in result.stdout.lower()
+            if freq > 0:
+                self.display_frequency = freq
         except Exception:
-            # 如果检测失败，假设在运行，让 openvr.init 自己判断
+            pass
+    
+    def _init_panel(self) -> bool:
+        try:
+            self.vr_system = self.parent.vr_system
+            self.overlay = self.parent.overlay
+            self.devices = self.parent.devices
+            self.texture_id = self.streamer.create()
+            self.streamer.allocate(self.width, self.height)
+            self.overlay_handle = self.overlay.createOverlay(self.key, self.title)
+            self.overlay.showOverlay(self.overlay_handle)
+            self.display_frequency = self.parent.display_frequency
             return True
+        except Exception as e:
+            self._init_error = str(e)
+            return False
     
-    def apply_config(self, config: dict) -> None:
+    def create_panel(self, name: str, width: int, height: int) -> Optional['VROverlay']:
+        panel = VROverlay(width, height, f"{self.key}.{name}", f"{self.title} ({name})", parent=self)
+        return panel if panel.init() else None
+    
+    def apply_width(self, config: dict) -> None:
         self.config = config
         self.overlay.setOverlayWidthInMeters(
             self.overlay_handle, config.get('scale', 0.4)
         )
+    
+    def apply_alpha(self, config: dict) -> None:
+        self.config = config
         self.overlay.setOverlayAlpha(
             self.overlay_handle, config.get('alpha', 0.92)
         )
+    
+    def apply_transform(self, config: dict) -> None:
+        self.config = config
         
         attach_mode = config.get('attach_mode', 'hmd')
         x = config.get('x', -0.4)
@@ -131,12 +191,9 @@ class VROverlay:
             self._apply_hmd_transform(transform, x, y, z, cp, sp, cy, sy, cr, sr)
     
     def _find_left_controller(self) -> int:
-        for i in range(openvr.k_unMaxTrackedDeviceCount):
-            if self.vr_system.getTrackedDeviceClass(i) == openvr.TrackedDeviceClass_Controller:
-                role = self.vr_system.getControllerRoleForTrackedDeviceIndex(i)
-                if role == openvr.TrackedControllerRole_LeftHand:
-                    return i
-        return openvr.k_unTrackedDeviceIndexInvalid
+        if self.devices is None:
+            return openvr.k_unTrackedDeviceIndexInvalid
+        return self.devices.index_for_role(openvr.TrackedControllerRole_LeftHand)
     
     def _apply_hmd_transform(self, transform, x, y, z, cp, sp, cy, sy, cr, sr) -> None:
         transform[0] = (cy * cr, -cy * sr, sy, x)
@@ -146,19 +203,49 @@ class VROverlay:
             self.overlay_handle, openvr.k_unTrackedDeviceIndex_Hmd, transform
         )
     
-    def update_texture(self, img: Image.Image) -> None:
-        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture_id)
-        GL.glTexImage2D(
-            GL.GL_TEXTURE_2D, 0, GL.GL_RGBA,
-            self.width, self.height, 0,
-            GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, img.tobytes()
-        )
+    def resize(self, width: int, height: int) -> None:
+        # 纹理存储在下一次上传时按新尺寸重新分配
+        self.width = width
+        self.height = height
+    
+    # rect=(x, y, w, h) 为 GL 坐标下的脏区域，None 表示整帧
+    def update_texture(self, img, rect=None) -> None:
+        sections = self.sections
+        if sections:
+            sections.start()
+        # 渲染器的帧缓冲区已按 GL 行序排列，直接上传；普通 PIL 图像需要先翻转
+        if isinstance(img, Image.Image):
+            data = img.transpose(Image.FLIP_TOP_BOTTOM).tobytes()
+        else:
+            data = img
+        if sections:
+            sections.lap('convert')
+        self.streamer.upload(data, self.width, self.height, rect)
+        if sections:
+            sections.lap('upload')
+        self.last_upload_ms = self.streamer.last_upload_ms
+        self.frames += 1
+        self._record_upload(self.last_upload_ms)
         
-        texture = openvr.Texture_t()
-        texture.handle = ctypes.c_void_p(int(self.texture_id))
-        texture.eType = openvr.TextureType_OpenGL
-        texture.eColorSpace = openvr.ColorSpace_Gamma
-        self.overlay.setOverlayTexture(self.overlay_handle, texture)
+        # 纹理句柄不变，描述结构只创建一次
+        if self._texture is None:
+            texture = openvr.Texture_t()
+            texture.handle = ctypes.c_void_p(int(self.texture_id))
+            texture.eType = openvr.TextureType_OpenGL
+            texture.eColorSpace = openvr.ColorSpace_Gamma
+            self._texture = texture
+        self.overlay.setOverlayTexture(self.overlay_handle, self._texture)
+        if sections:
+            sections.lap('submit')
+    
+    def set_texture_bounds(self, u_min: float, v_min: float, u_max: float, v_max: float) -> None:
+        super().set_texture_bounds(u_min, v_min, u_max, v_max)
+        bounds = openvr.VRTextureBounds_t()
+        bounds.uMin = u_min
+        bounds.vMin = v_min
+        bounds.uMax = u_max
+        bounds.vMax = v_max
+        self.overlay.setOverlayTextureBounds(self.overlay_handle, bounds)
     
     def show(self) -> None:
         self.visible = True
@@ -168,22 +255,81 @@ class VROverlay:
         self.visible = False
         self.overlay.hideOverlay(self.overlay_handle)
     
-    # 开关隐藏
-    def toggle(self) -> None:
-        if self.visible:
-            self.hide()
-        else:
-            self.show()
+    # 手柄输入
+    def _fire_toggle(self) -> None:
+        if self._on_toggle_callback:
+            self._on_toggle_callback()
+    
+    def set_toggle_hand(self, hand: str) -> None:
+        self.toggle_hand = hand
+        if self.controller:
+            self.controller.set_toggle_hand(hand)
+    
+    def has_controller(self) -> bool:
+        return bool(self.controller and self.controller.has_controller())
+    
+    def set_scroll_input(self, mode: str) -> None:
+        super().set_scroll_input(mode)
+        if self.controller:
+            self.controller.stick_scroll = mode == "stick"
+        if not self.overlay or self.overlay_handle is None:
+            return
+        # 激光指针指向叠加层时接收滚轮事件，不影响游戏输入
+        try:
+            pointer = mode == "pointer"
+            self.overlay.setOverlayInputMethod(
+                self.overlay_handle,
+                openvr.VROverlayInputMethod_Mouse if pointer else openvr.VROverlayInputMethod_None)
+            self.overlay.setOverlayFlag(self.overlay_handle, openvr.VROverlayFlags_SendVRSmoothScrollEvents, pointer)
+        except Exception:
+            pass
+    
+    def poll_input(self) -> None:
+        if self.controller:
+            self.controller.poll()
+            self.scroll_velocity = self.controller.scroll_velocity
+        if self.scroll_input == "pointer" and self.overlay and self.overlay_handle is not None:
+            self._poll_overlay_events()
+        # 手柄连接或左右手变化后重新绑定到手上
+        if self.devices and self.devices.generation != self._device_generation:
+            self._device_generation = self.devices.generation
+            if self.config.get('attach_mode') == 'hand':
+                self.apply_transform(self.config)
+    
+    # 叠加层事件：滚轮滚动回看，点击回到最新消息
+    def _poll_overlay_events(self) -> None:
+        event = openvr.VREvent_t()
+        try:
+            while True:
+                result, event = self.overlay.pollNextOverlayEvent(self.overlay_handle, event)
+                if not result:
+                    break
+                if event.eventType in (openvr.VREvent_ScrollSmooth, openvr.VREvent_ScrollDiscrete):
+                    self.add_scroll(event.data.scroll.ydelta * POINTER_SCROLL_LINES)
+                elif event.eventType == openvr.VREvent_MouseButtonUp:
+                    self.request_scroll_home()
+        except Exception:
+            pass
+    
+    def interrupt(self) -> None:
+        self._cancel.set()
     
+    # GL 资源属于创建上下文的线程，必须由 VR 线程在主循环结束后调用
     def shutdown(self) -> None:
+        self._cancel.set()
+        self.streamer.release()
         if self.overlay and self.overlay_handle:
             try:
                 self.overlay.destroyOverlay(self.overlay_handle)
             except Exception:
                 pass
+        # 面板只销毁自己的叠加层
+        if self.parent:
+            return
         if self.vr_system:
             try:
                 openvr.shutdown()
             except Exception:
                 pass
         glfw.terminate()
+        self._window = None
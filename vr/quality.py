@@ -0,0 +1,146 @@
+from typing import Optional, Tuple
+
+
+# 基准：0.4 米宽对应 450 像素
+BASE_WIDTH = 450
+BASE_HEIGHT = 400
+BASE_METERS = 0.4
+
+# 超采样 / 降采样档位
+QUALITY_LEVELS = (0.75, 1.0, 1.25, 1.5, 2.0)
+# 活动帧间隔档位（秒），默认 0.05
+FRAME_INTERVALS = (1 / 30, 0.05, 1 / 15, 0.1)
+
+
+class QualityGovernor:
+
+    def __init__(self, cpu_budget: float = 0.2, min_width: int = 360, max_width: int = 1280,
+                 upgrade_frames: int = 60, downgrade_frames: int = 8, cooldown_frames: int = 30):
+        # 渲染 + 上传耗时占帧间隔的比例上限
+        self.cpu_budget = cpu_budget
+        self.min_width = min_width
+        self.max_width = max_width
+        self.upgrade_frames = upgrade_frames
+        self.downgrade_frames = downgrade_frames
+        self.cooldown_frames = cooldown_frames
+        self.enabled = True
+
+        self.width_m = BASE_METERS
+        self.level_index = QUALITY_LEVELS.index(1.0)
+        self.interval_index = FRAME_INTERVALS.index(0.05)
+
+        # 指数滑动平均
+        self.avg_ms: Optional[float] = None
+        self.last_render_ms = 0.0
+        self.last_upload_ms = 0.0
+        self._smoothing = 0.1
+        self._over = 0
+        self._under = 0
+        self._cooldown = 0
+
+    @property
+    def frame_interval(self) -> float:
+        return FRAME_INTERVALS[self.interval_index]
+
+    @property
+    def level(self) -> float:
+        return QUALITY_LEVELS[self.level_index] if self.enabled else 1.0
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        if not self.enabled:
+            return BASE_WIDTH, BASE_HEIGHT
+        return self._size(self.level)
+
+    # 分辨率由物理宽度推导，乘以质量档位后再限制在 [min_width, max_width] 内
+    def _size(self, level: float) -> Tuple[int, int]:
+        base = self.width_m / BASE_METERS * BASE_WIDTH
+        width = int(min(self.max_width, max(self.min_width, base * level))) // 2 * 2
+        height = int(width * BASE_HEIGHT / BASE_WIDTH) // 2 * 2
+        return width, height
+
+    @property
+    def render_scale(self) -> float:
+        return self.size[0] / BASE_WIDTH
+
+    @property
+    def load(self) -> float:
+        if self.avg_ms is None:
+            return 0.0
+        return self.avg_ms / (self.frame_interval * 1000)
+
+    def set_enabled(self, enabled: bool) -> bool:
+        if enabled == self.enabled:
+            return False
+        old = self.size
+        self.enabled = enabled
+        if not enabled:
+            self.interval_index = FRAME_INTERVALS.index(0.05)
+        self._reset()
+        return self.size != old
+
+    def set_physical_width(self, meters: float) -> bool:
+        old = self.size
+        self.width_m = max(0.05, float(meters))
+        return self.size != old
+
+    def _reset(self) -> None:
+        self.avg_ms = None
+        self._over = 0
+        self._under = 0
+        self._cooldown = self.cooldown_frames
+
+    # 记录一帧耗时，返回分辨率是否变化
+    def record(self, render_ms: float, upload_ms: float) -> bool:
+        self.last_render_ms = render_ms
+        self.last_upload_ms = upload_ms
+        if not self.enabled:
+            return False
+
+        if self._cooldown > 0:
+            # 切换后的首帧包含缓冲区重建，不计入统计
+            self._cooldown -= 1
+            return False
+
+        cost = render_ms + upload_ms
+        if self.avg_ms is None:
+            self.avg_ms = cost
+        else:
+            self.avg_ms += (cost - self.avg_ms) * self._smoothing
+
+        load = self.load
+        if load > self.cpu_budget:
+            self._over += 1
+            self._under = 0
+        elif load < self.cpu_budget * 0.5:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = 0
+            self._under = 0
+
+        old = self.size
+        if self._over >= self.downgrade_frames:
+            self._degrade()
+        elif self._under >= self.upgrade_frames:
+            self._upgrade()
+        return self.size != old
+
+    def _degrade(self) -> None:
+        # 先降分辨率，再降帧率；已到最小宽度时降档无效，直接降帧率
+        if self.level_index > 0 and self._size(QUALITY_LEVELS[self.level_index - 1]) != self.size:
+            self.level_index -= 1
+        elif self.interval_index < len(FRAME_INTERVALS) - 1:
+            self.interval_index += 1
+        self._reset()
+
+    def _upgrade(self) -> None:
+        # 先恢复默认帧率，再提高分辨率，最后提高帧率
+        default_interval = FRAME_INTERVALS.index(0.05)
+        if self.interval_index > default_interval:
+            self.interval_index -= 1
+        elif self.level_index < len(QUALITY_LEVELS) - 1 and self.size[0] < self.max_width:
+            self.level_index += 1
+        elif self.interval_index > 0:
+            self.interval_index -= 1
+        self._reset()
@@ -0,0 +1,124 @@
+import ctypes
+import os
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+
+# SteamVR 服务进程名
+SERVER_PROCESS = "vrserver"
+# 等待 SteamVR 就绪的上限（秒），用户常在点击后才启动 SteamVR
+READY_TIMEOUT = 30.0
+# 探测间隔从 BACKOFF_MIN 起倍增到 BACKOFF_MAX
+BACKOFF_MIN = 0.05
+BACKOFF_MAX = 1.0
+
+
+class Backoff:
+
+    def __init__(self, minimum: float = BACKOFF_MIN, maximum: float = BACKOFF_MAX, factor: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.delay = minimum
+
+    def next(self) -> float:
+        delay = self.delay
+        self.delay = min(self.delay * self.factor, self.maximum)
+        return delay
+
+    def reset(self) -> None:
+        self.delay = self.minimum
+
+
+def _probe_windows(name: str) -> Optional[bool]:
+    from ctypes import wintypes
+
+    class PROCESSENTRY32W(ctypes.Structure):
+        _fields_ = [
+            ('dwSize', wintypes.DWORD),
+            ('cntUsage', wintypes.DWORD),
+            ('th32ProcessID', wintypes.DWORD),
+            ('th32DefaultHeapID', ctypes.c_size_t),
+            ('th32ModuleID', wintypes.DWORD),
+            ('cntThreads', wintypes.DWORD),
+            ('th32ParentProcessID', wintypes.DWORD),
+            ('pcPriClassBase', ctypes.c_long),
+            ('dwFlags', wintypes.DWORD),
+            ('szExeFile', ctypes.c_wchar * 260),
+        ]
+
+    TH32CS_SNAPPROCESS = 0x00000002
+    INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    kernel32.CreateToolhelp32Snapshot.argtypes = (wintypes.DWORD, wintypes.DWORD)
+    kernel32.Process32FirstW.argtypes = (wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W))
+    kernel32.Process32NextW.argtypes = (wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W))
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+
+    snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+    if not snapshot or snapshot == INVALID_HANDLE_VALUE:
+        return None
+    target = name.lower() + '.exe'
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+        found = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while found:
+            if entry.szExeFile.lower() == target:
+                return True
+            found = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+        return False
+    finally:
+        kernel32.CloseHandle(snapshot)
+
+
+def _probe_proc(name: str) -> Optional[bool]:
+    # /proc/<pid>/comm 最长 15 字符，vrserver 不受截断影响
+    try:
+        pids = [entry for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return None
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/comm', 'rb') as f:
+                if f.read().strip().decode('utf-8', 'replace') == name:
+                    return True
+        except OSError:
+            continue
+    return False
+
+
+# 进程内探测 SteamVR 服务是否在运行；无法判断时返回 None，交给 openvr.init 决定
+def is_steamvr_running(name: str = SERVER_PROCESS) -> Optional[bool]:
+    try:
+        if sys.platform == 'win32':
+            return _probe_windows(name)
+        if os.path.isdir('/proc'):
+            return _probe_proc(name)
+    except Exception:
+        pass
+    return None
+
+
+# 按退避间隔探测直到 SteamVR 就绪；cancel 置位时立即返回
+def wait_for_steamvr(cancel: Optional[threading.Event] = None, timeout: float = READY_TIMEOUT,
+                     on_progress: Optional[Callable[[str, str], None]] = None,
+                     probe: Callable[[], Optional[bool]] = is_steamvr_running) -> bool:
+    cancel = cancel or threading.Event()
+    backoff = Backoff()
+    deadline = time.perf_counter() + timeout
+    notified = False
+    while not cancel.is_set():
+        if probe() is not False:
+            return True
+        if not notified and on_progress:
+            on_progress('waiting_steamvr', '等待 SteamVR 启动...')
+            notified = True
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+        cancel.wait(min(backoff.next(), remaining))
+    return False
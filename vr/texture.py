@@ -0,0 +1,172 @@
+import ctypes
+import time
+from typing import List, Optional, Tuple
+
+from OpenGL import GL
+
+
+Rect = Tuple[int, int, int, int]
+
+_PBO_COUNT = 2
+
+
+def _buffer_address(data) -> Tuple[int, object]:
+    # 返回源数据地址；只读的 bytes 通过 ctypes 取地址，需保持引用直到拷贝完成
+    if isinstance(data, bytes):
+        holder = ctypes.c_char_p(data)
+        return ctypes.cast(holder, ctypes.c_void_p).value, holder
+    view = memoryview(data)
+    if view.readonly:
+        copy = bytes(view)
+        holder = ctypes.c_char_p(copy)
+        return ctypes.cast(holder, ctypes.c_void_p).value, (holder, copy)
+    holder = (ctypes.c_char * view.nbytes).from_buffer(view)
+    return ctypes.addressof(holder), holder
+
+
+class TextureStreamer:
+
+    def __init__(self, use_pbo: bool = True, allow_persistent: bool = True):
+        self.use_pbo = use_pbo
+        self.allow_persistent = allow_persistent
+        self.texture_id: Optional[int] = None
+        self.width = 0
+        self.height = 0
+        self.last_upload_ms = 0.0
+        self.persistent = False
+
+        self._pbos: List[int] = []
+        self._pbo_index = 0
+        # 持久映射模式下每个 PBO 的映射地址与栅栏
+        self._mapped: List[int] = []
+        self._fences: List[Optional[object]] = []
+
+    def create(self) -> int:
+        self.texture_id = int(GL.glGenTextures(1))
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture_id)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE)
+        return self.texture_id
+
+    # 纹理存储只在尺寸变化时分配一次
+    def allocate(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture_id)
+        GL.glTexImage2D(
+            GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8,
+            width, height, 0,
+            GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, None
+        )
+        if self.use_pbo:
+            try:
+                self._create_pbos(width * height * 4)
+            except Exception:
+                # 驱动不支持 PBO 时退回直接上传
+                self._delete_pbos()
+                self.use_pbo = False
+
+    def _create_pbos(self, size: int) -> None:
+        self._delete_pbos()
+        self._pbos = [int(b) for b in GL.glGenBuffers(_PBO_COUNT)]
+        self._fences = [None] * _PBO_COUNT
+        # GL 4.4 / ARB_buffer_storage 可用时持久映射，否则每帧孤立重分配
+        self.persistent = (self.allow_persistent and bool(GL.glBufferStorage)
+                           and bool(GL.glMapBufferRange))
+
+        for pbo in self._pbos:
+            GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, pbo)
+            if self.persistent:
+                flags = GL.GL_MAP_WRITE_BIT | GL.GL_MAP_PERSISTENT_BIT | GL.GL_MAP_COHERENT_BIT
+                GL.glBufferStorage(GL.GL_PIXEL_UNPACK_BUFFER, size, None, flags)
+                ptr = GL.glMapBufferRange(GL.GL_PIXEL_UNPACK_BUFFER, 0, size, flags)
+                self._mapped.append(ctypes.cast(ptr, ctypes.c_void_p).value)
+            else:
+                GL.glBufferData(GL.GL_PIXEL_UNPACK_BUFFER, size, None, GL.GL_STREAM_DRAW)
+        GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, 0)
+
+    def _delete_pbos(self) -> None:
+        if not self._pbos:
+            return
+        for i, pbo in enumerate(self._pbos):
+            if self._mapped:
+                GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, pbo)
+                GL.glUnmapBuffer(GL.GL_PIXEL_UNPACK_BUFFER)
+            if self._fences[i] is not None:
+                GL.glDeleteSync(self._fences[i])
+        GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, 0)
+        GL.glDeleteBuffers(len(self._pbos), self._pbos)
+        self._pbos = []
+        self._mapped = []
+        self._fences = []
+
+    # data 为按 GL 行序排列的 RGBA 像素；rect=(x, y, w, h) 时只更新该区域（GL 坐标，y 自下而上）
+    def upload(self, data, width: int, height: int, rect: Optional[Rect] = None) -> None:
+        t0 = time.perf_counter()
+        if (width, height) != (self.width, self.height):
+            self.allocate(width, height)
+            rect = None
+
+        x, y, w, h = rect if rect else (0, 0, width, height)
+        stride = width * 4
+
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture_id)
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 4)
+        GL.glPixelStorei(GL.GL_UNPACK_ROW_LENGTH, width)
+        GL.glPixelStorei(GL.GL_UNPACK_SKIP_PIXELS, x)
+        GL.glPixelStorei(GL.GL_UNPACK_SKIP_ROWS, y)
+
+        if self.use_pbo and self._pbos:
+            idx = self._pbo_index
+            self._pbo_index = (idx + 1) % len(self._pbos)
+            pbo = self._pbos[idx]
+            GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, pbo)
+
+            # 只拷贝脏区域所在的整行，DMA 时再按矩形裁剪
+            offset = y * stride
+            size = h * stride
+            src, holder = _buffer_address(data)
+            if self.persistent:
+                fence = self._fences[idx]
+                if fence is not None:
+                    # 等待上次使用该 PBO 的传输完成，双缓冲下通常已完成
+                    GL.glClientWaitSync(fence, GL.GL_SYNC_FLUSH_COMMANDS_BIT, 1_000_000_000)
+                    GL.glDeleteSync(fence)
+                    self._fences[idx] = None
+                ctypes.memmove(self._mapped[idx] + offset, src + offset, size)
+            else:
+                # 孤立旧存储，避免等待 GPU 读取完成
+                GL.glBufferData(GL.GL_PIXEL_UNPACK_BUFFER, width * height * 4, None, GL.GL_STREAM_DRAW)
+                GL.glBufferSubData(GL.GL_PIXEL_UNPACK_BUFFER, offset, size, ctypes.c_void_p(src + offset))
+            del holder
+
+            GL.glTexSubImage2D(
+                GL.GL_TEXTURE_2D, 0, x, y, w, h,
+                GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, ctypes.c_void_p(0)
+            )
+            if self.persistent:
+                self._fences[idx] = GL.glFenceSync(GL.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+            GL.glBindBuffer(GL.GL_PIXEL_UNPACK_BUFFER, 0)
+        else:
+            GL.glTexSubImage2D(
+                GL.GL_TEXTURE_2D, 0, x, y, w, h,
+                GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, data
+            )
+
+        GL.glPixelStorei(GL.GL_UNPACK_ROW_LENGTH, 0)
+        GL.glPixelStorei(GL.GL_UNPACK_SKIP_PIXELS, 0)
+        GL.glPixelStorei(GL.GL_UNPACK_SKIP_ROWS, 0)
+        # 提交命令，使传输与下一帧渲染并行
+        GL.glFlush()
+        self.last_upload_ms = (time.perf_counter() - t0) * 1000
+
+    def release(self) -> None:
+        try:
+            self._delete_pbos()
+            if self.texture_id is not None:
+                GL.glDeleteTextures([self.texture_id])
+        except Exception:
+            pass
+        self.texture_id = None